@@ -0,0 +1,22 @@
+from celery import chain
+from celery.canvas import Signature
+
+from highlights.tasks import extract_game_events, create_game_highlights
+from scrapers.models import GameVod
+from scrapers.tasks import download_game_vod
+from videos.tasks import render_game_preview_video
+
+
+def create_game_pipeline(game_vod: GameVod) -> Signature:
+    """
+    Return the canvas that takes a finished game from the VOD to the highlight video. Each stage is routed to the queue
+    that matches the resources it uses (see CELERY_TASK_ROUTES), so for example a long render cannot block the light
+    tasks that poll the match status. The pipeline ends with a preview of the highlight video, and the final render is
+    started when the preview is approved or the approval times out (see videos.tasks.start_timed_out_final_renders).
+    """
+    return chain(
+        download_game_vod.si(game_vod.id),  # io
+        extract_game_events.si(game_vod.id),  # cpu-analysis
+        create_game_highlights.s(game_vod.id),  # cpu-analysis
+        render_game_preview_video.si(game_vod.id),  # render
+    )
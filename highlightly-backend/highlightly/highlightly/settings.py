@@ -164,3 +164,108 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
+
+# Celery queues. Each stage of the game pipeline (see highlightly/pipeline.py) is routed to a queue based on the
+# resources it uses, so each queue can be consumed by a worker with a fitting concurrency.
+CELERY_TASK_DEFAULT_QUEUE = "light"
+CELERY_TASK_ROUTES = {
+    "scrapers.tasks.scrape_*": {"queue": "io"},
+    "scrapers.tasks.download_game_vod": {"queue": "io"},
+    "highlights.tasks.*": {"queue": "cpu-analysis"},
+    "videos.tasks.render_game_preview_video": {"queue": "render"},
+    "videos.tasks.render_game_highlight_video": {"queue": "render"},
+    "videos.tasks.render_game_video_part": {"queue": "render"},
+    "videos.tasks.assemble_game_highlight_video": {"queue": "render"},
+}
+
+# Tasks that are run periodically by celery beat. The database scheduler adds them to the periodic tasks on startup.
+CELERY_BEAT_SCHEDULE = {
+    "start-timed-out-final-renders": {"task": "videos.tasks.start_timed_out_final_renders", "schedule": 60},
+}
+
+# Long-running tasks should not reserve tasks that another worker in the same queue could start on instead.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# The number of ffmpeg processes that cut highlight clips out of a VOD at the same time.
+CLIP_EXTRACTION_WORKERS = int(os.environ.get("CLIP_EXTRACTION_WORKERS", 4))
+
+# How the highlight video of a game is rendered. "clips" cuts each highlight into a separate clip before combining the
+# clips, "filtergraph" renders the video straight from the VOD in a single ffmpeg invocation, and "smart" only
+# re-encodes the crossfades and the post game statistics while copying the rest of the VOD. "distributed" splits the
+# smart render into parts that are rendered in parallel by any render worker before being assembled.
+VIDEO_RENDER_MODE = os.environ.get("VIDEO_RENDER_MODE", "clips")
+
+# Seconds to wait for the preview of a highlight video to be approved before the final render is started anyway.
+FINAL_RENDER_APPROVAL_TIMEOUT = int(os.environ.get("FINAL_RENDER_APPROVAL_TIMEOUT", 2 * 60 * 60))
+
+# Clips and smart render parts cut from the VODs are cached here, so re-renders only cut the segments that changed.
+CLIP_CACHE_FOLDER = os.environ.get("CLIP_CACHE_FOLDER", "media/clip_cache")
+
+# The least recently used clips are removed when the clip cache grows larger than this.
+CLIP_CACHE_MAX_BYTES = int(os.environ.get("CLIP_CACHE_MAX_BYTES", 20 * 1024 ** 3))
+
+# Where the render workers read the VODs and write the rendered videos. "local" uses the filesystem of the worker, so
+# all render workers must run on the same node. "shared" uses a filesystem that every stage of the pipeline writes its
+# media to, so the root must be the media folder in the working directory of every node, or the target of its link.
+RENDER_STORAGE_BACKEND = os.environ.get("RENDER_STORAGE_BACKEND", "local")
+RENDER_SHARED_STORAGE_ROOT = os.environ.get("RENDER_SHARED_STORAGE_ROOT", "/mnt/highlightly")
+
+# How the post game statistics cards are rendered. "browser" takes a screenshot of the HTML of the card with a headless
+# browser that is kept open in each worker process, and "pil" draws the card directly with PIL without a browser.
+STATISTICS_CARD_RENDERER = os.environ.get("STATISTICS_CARD_RENDERER", "browser")
+CHROMIUM_EXECUTABLE_PATH = os.environ.get("CHROMIUM_EXECUTABLE_PATH", "/usr/bin/chromium")
+
+# The headless browser is restarted after rendering this many cards to release the memory it has built up.
+STATISTICS_CARD_BROWSER_MAX_CARDS = int(os.environ.get("STATISTICS_CARD_BROWSER_MAX_CARDS", 100))
+
+STATISTICS_CARD_FONT_FILE = os.environ.get("STATISTICS_CARD_FONT_FILE",
+                                           "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+STATISTICS_CARD_BOLD_FONT_FILE = os.environ.get("STATISTICS_CARD_BOLD_FONT_FILE",
+                                                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
+
+# The team logo, text, and match frame parts of the video thumbnails are cached here.
+THUMBNAIL_CACHE_FOLDER = os.environ.get("THUMBNAIL_CACHE_FOLDER", "media/thumbnail_parts")
+
+# Seconds without further changes to an organization before the video metadata of its matches is regenerated.
+VIDEO_METADATA_REGENERATION_DELAY = int(os.environ.get("VIDEO_METADATA_REGENERATION_DELAY", 60))
+
+# The number of frames kept as thumbnail match frame candidates for each game, at least this many seconds apart.
+THUMBNAIL_FRAME_CANDIDATES = int(os.environ.get("THUMBNAIL_FRAME_CANDIDATES", 8))
+THUMBNAIL_FRAME_CANDIDATE_SPACING = int(os.environ.get("THUMBNAIL_FRAME_CANDIDATE_SPACING", 20))
+
+# The number of thumbnail variants with the next frame candidates that are rendered ahead when refreshing the frame.
+THUMBNAIL_VARIANT_COUNT = int(os.environ.get("THUMBNAIL_VARIANT_COUNT", 4))
+
+# How the pre-match thumbnails are created. "eager" creates the thumbnail of every scraped match, and "lazy" only
+# creates it when the match is selected for a video or the video metadata is first requested.
+PRE_MATCH_THUMBNAIL_MODE = os.environ.get("PRE_MATCH_THUMBNAIL_MODE", "lazy")
+
+# The thumbnails of the selected matches starting within this many hours are created in the background after scraping.
+THUMBNAIL_WARM_UP_HOURS = int(os.environ.get("THUMBNAIL_WARM_UP_HOURS", 48))
+
+# Timeouts in seconds and retries of the requests sent by the shared HTTP client, and the connections kept per host.
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+
+# The maximum number of concurrent requests to each host, and limits for specific hosts like "liquipedia.net=1,...".
+HTTP_HOST_CONCURRENCY = int(os.environ.get("HTTP_HOST_CONCURRENCY", 4))
+HTTP_HOST_CONCURRENCY_LIMITS = {host.strip(): int(limit) for host, limit in
+                                (item.split("=") for item in os.environ.get("HTTP_HOST_CONCURRENCY_LIMITS",
+                                                                            "liquipedia.net=2").split(",") if item)}
+
+# The number of threads fetching the tournament and team data of new upcoming matches concurrently.
+SCRAPER_ENRICHMENT_WORKERS = int(os.environ.get("SCRAPER_ENRICHMENT_WORKERS", 8))
+
+# Responses from URLs matching one of the patterns are cached on disk for the given seconds, after which they are
+# revalidated with their ETag or Last-Modified header. Match pages change while the match is live, so they expire fast.
+HTTP_CACHE_FOLDER = os.environ.get("HTTP_CACHE_FOLDER", "media/http_cache")
+HTTP_CACHE_MAX_SIZE_MB = int(os.environ.get("HTTP_CACHE_MAX_SIZE_MB", 256))
+HTTP_CACHE_TTLS = [
+    (r"https://liquipedia\.net/", 24 * 60 * 60),
+    (r"https://www\.hltv\.org/(team|player)/", 6 * 60 * 60),
+    (r"https://www\.vlr\.gg/(team|player)/", 6 * 60 * 60),
+    (r"https://www\.vlr\.gg/\d+/", 60),
+]
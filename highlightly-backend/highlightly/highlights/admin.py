@@ -1,5 +1,7 @@
 from django.contrib import admin
 
-from highlights.models import Highlight
+from highlights.models import Highlight, GameRound, FrameCandidate
 
 admin.site.register(Highlight)
+admin.site.register(GameRound)
+admin.site.register(FrameCandidate)
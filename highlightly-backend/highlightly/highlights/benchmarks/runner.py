@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import resource
+import shutil
+import time
+from typing import Callable
+
+from highlights.benchmarks.synthetic_vods import render_valorant_vod, render_league_of_legends_vod
+from highlights.highlighters import league_of_legends, valorant
+from highlights.highlighters.frame_reader import FrameReader
+from highlights.highlighters.util import optical_character_recognition, get_ocr_call_count
+from scrapers.models import GameVod, Match, Tournament
+
+
+def run_benchmarks(workdir: str, duration: int = 600, frame_rate: int = 60, skip_ocr: bool = False) -> dict:
+    """
+    Render the synthetic VODs in the working directory and run each highlighter stage against them. Return the
+    measurements of each stage. The Counter-Strike highlighter is not included since it parses GOTV demos, not VODs.
+    """
+    os.makedirs(workdir, exist_ok=True)
+
+    return {"duration": duration, "frame_rate": frame_rate,
+            "valorant": benchmark_valorant(workdir, duration, frame_rate, skip_ocr),
+            "league_of_legends": benchmark_league_of_legends(workdir, duration, frame_rate, skip_ocr)}
+
+
+def benchmark_valorant(workdir: str, duration: int, frame_rate: int, skip_ocr: bool) -> dict:
+    """Run the Valorant frame extraction and OCR stages against a synthetic VOD."""
+    vod_filepath = f"{workdir}/valorant.mkv"
+    render_valorant_vod(vod_filepath, duration, frame_rate)
+
+    timer_folder = create_empty_folder(f"{workdir}/valorant_timer_frames")
+    kill_feed_folder = create_empty_folder(f"{workdir}/valorant_kill_feed_frames")
+
+    timer_frames = list(range(0, duration, 10))
+    kill_feed_frames = list(range(0, duration, 2))
+
+    stages = {
+        "timer_frames": measure_stage(lambda: valorant.save_video_frames(vod_filepath, timer_frames, timer_folder),
+                                      len(timer_frames), timer_folder),
+        "kill_feed_frames": measure_stage(lambda: valorant.save_kill_feed_images(vod_filepath, kill_feed_frames,
+                                                                                 kill_feed_folder),
+                                          len(kill_feed_frames), kill_feed_folder),
+    }
+
+    if not skip_ocr:
+        stages["timer_ocr"] = measure_ocr_stage(timer_folder, valorant.create_initial_round_timeline)
+        stages["kill_feed_ocr"] = measure_ocr_stage(kill_feed_folder)
+
+    return stages
+
+
+def benchmark_league_of_legends(workdir: str, duration: int, frame_rate: int, skip_ocr: bool) -> dict:
+    """Run the League of Legends timer extraction, OCR, and kill feed template matching stages against a synthetic VOD."""
+    # The stages only use the tournament to find the kill feed placement and templates, so nothing is saved.
+    game_vod = GameVod(match=Match(tournament=Tournament(name="Benchmark", short_name="LPL")))
+
+    kill_feed_placement = league_of_legends.get_kill_feed_placement(game_vod)
+    template_path = league_of_legends.get_kill_feed_templates(game_vod)[0]
+
+    vod_filepath = f"{workdir}/league_of_legends.mkv"
+    render_league_of_legends_vod(vod_filepath, duration, kill_feed_placement, template_path, frame_rate)
+
+    timer_folder = create_empty_folder(f"{workdir}/league_of_legends_timer_frames")
+    timer_frames = list(range(0, duration, 20))
+    kill_feed_frames = list(range(0, duration))
+
+    events = []
+    stages = {
+        "timer_frames": measure_stage(lambda: league_of_legends.save_timer_images(vod_filepath, timer_frames, timer_folder),
+                                      len(timer_frames), timer_folder),
+        "kill_feed_template_matching": measure_stage(
+            lambda: events.extend(league_of_legends.get_game_events(game_vod, vod_filepath, kill_feed_frames,
+                                                                    duration)),
+            len(kill_feed_frames)
+        ),
+    }
+
+    # Every kill feed icon is visible for two seconds and there is one every 30 seconds after the first minute.
+    stages["kill_feed_template_matching"]["events_found"] = len(events) - 1
+
+    if not skip_ocr:
+        stages["timer_ocr"] = measure_ocr_stage(timer_folder)
+
+    return stages
+
+
+def measure_stage(stage: Callable[[], object], frames: int, crop_folder: str | None = None) -> dict:
+    """
+    Run the stage and return the wall time, the throughput, and the peak memory usage after the stage. The throughput
+    is based on the frames that the frame readers of the stage decoded, not the frames that were requested.
+    """
+    frames_decoded_before = FrameReader.total_frames_decoded
+
+    start = time.perf_counter()
+    stage()
+    wall_time = time.perf_counter() - start
+
+    frames_decoded = FrameReader.total_frames_decoded - frames_decoded_before
+    measurements = {"wall_time_seconds": round(wall_time, 3), "frames_requested": frames,
+                    "frames_decoded": frames_decoded, "frames_per_second": round(frames_decoded / wall_time, 2)}
+
+    if crop_folder is not None:
+        crops = len(os.listdir(crop_folder))
+        measurements["crops"] = crops
+        measurements["crops_per_second"] = round(crops / wall_time, 2)
+
+    return measurements | get_peak_memory_usage()
+
+
+def measure_ocr_stage(image_folder: str, parse_detections: Callable[[dict], object] | None = None) -> dict:
+    """Run OCR on the images in the folder and return the wall time, the number of OCR calls, and the peak memory."""
+    images = len(os.listdir(image_folder))
+    ocr_calls_before = get_ocr_call_count()
+
+    start = time.perf_counter()
+    frame_detections = optical_character_recognition(image_folder)
+
+    if parse_detections is not None:
+        parse_detections(frame_detections)
+
+    wall_time = time.perf_counter() - start
+
+    return {"wall_time_seconds": round(wall_time, 3), "ocr_calls": get_ocr_call_count() - ocr_calls_before,
+            "ocr_images": images, "images_with_detections": len(frame_detections),
+            "images_per_second": round(images / wall_time, 2)} | get_peak_memory_usage()
+
+
+def get_peak_memory_usage() -> dict:
+    """Return the peak resident set size in megabytes of this process and of the largest child process (ffmpeg, OCR)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    return {"peak_rss_mb": round(own / 1024, 1), "peak_child_rss_mb": round(children / 1024, 1)}
+
+
+def create_empty_folder(folder_path: str) -> str:
+    """Create the folder, removing the images from a previous run first."""
+    shutil.rmtree(folder_path, ignore_errors=True)
+    os.makedirs(folder_path)
+
+    return folder_path
+
+
+def write_results(results: dict, output_path: str) -> None:
+    """Write the benchmark results as JSON, so they can be compared between runs to catch regressions."""
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    logging.info(f"Wrote highlighter benchmark results to {output_path}.")
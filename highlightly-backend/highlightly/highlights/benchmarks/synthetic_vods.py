@@ -0,0 +1,84 @@
+import logging
+import os
+import subprocess
+
+# Fonts that are commonly available on Linux. The first that exists is used for the HUD text.
+DEFAULT_FONT_FILES = ["/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+                      "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+                      "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf"]
+
+
+def render_valorant_vod(filepath: str, duration: int, frame_rate: int = 60, round_length: int = 100,
+                        font_file: str | None = None) -> None:
+    """
+    Render a synthetic Valorant VOD with a test pattern background, the "ROUND N" and timer HUD in the top center, and
+    a kill feed entry in the top right in the middle of each round. The HUD is placed where the highlighter crops it.
+    """
+    time_left = f"{round_length}-mod(floor(t),{round_length})"
+
+    filters = [
+        drawtext(f"ROUND %{{eif\\:floor(t/{round_length})+1\\:d}}", 918, 8, 18, font_file),
+        drawtext(f"%{{eif\\:floor(({time_left})/60)\\:d}}\\:%{{eif\\:mod({time_left},60)\\:d\\:2}}", 935, 36, 24,
+                 font_file),
+        drawtext("Phantom    Jett", 1380, 95, 28, font_file,
+                 enable=f"between(mod(t,{round_length}),30,36)"),
+    ]
+
+    render_vod(filepath, duration, frame_rate, [f"[0:v]{','.join(filters)}[v]"], [])
+
+
+def render_league_of_legends_vod(filepath: str, duration: int, kill_feed_placement: tuple[tuple[int, int], tuple[int, int]],
+                                 template_path: str, frame_rate: int = 60, game_start: int = 60,
+                                 font_file: str | None = None) -> None:
+    """
+    Render a synthetic League of Legends VOD with a test pattern background, the game clock in the top center once
+    the game has started, and the kill feed template icon pasted into the kill feed area every 30 seconds.
+    """
+    (top, _bottom), (left, _right) = kill_feed_placement
+    game_time = f"max(floor(t)-{game_start},0)"
+
+    clock = drawtext(f"%{{eif\\:floor(({game_time})/60)\\:d\\:2}}\\:%{{eif\\:mod({game_time},60)\\:d\\:2}}", 925, 40,
+                     28, font_file, enable=f"gte(t,{game_start})")
+
+    filter_complex = [f"[0:v]{clock}[clock]",
+                      f"[clock][1:v]overlay=x={left + 2}:y={top + 20}:shortest=1"
+                      f":enable='gte(t,{game_start})*between(mod(t,30),10,12)'[v]"]
+
+    render_vod(filepath, duration, frame_rate, filter_complex, [template_path])
+
+
+def drawtext(text: str, x: int, y: int, font_size: int, font_file: str | None, enable: str | None = None) -> str:
+    """Return a drawtext filter that draws white text with a black box behind it."""
+    font_file = font_file or next((path for path in DEFAULT_FONT_FILES if os.path.exists(path)), None)
+
+    options = [f"text='{text}'", f"x={x}", f"y={y}", f"fontsize={font_size}", "fontcolor=white", "box=1",
+               "boxcolor=black"]
+
+    if font_file is not None:
+        options.append(f"fontfile='{font_file}'")
+
+    if enable is not None:
+        options.append(f"enable='{enable}'")
+
+    return f"drawtext={':'.join(options)}"
+
+
+def render_vod(filepath: str, duration: int, frame_rate: int, filter_complex: list[str], images: list[str]) -> None:
+    """
+    Render a 1920x1080 test pattern VOD with a silent audio track, using the given filters to draw the HUD. The given
+    images are looped as extra inputs, so they can be overlaid by the filters.
+    """
+    logging.info(f"Rendering {duration} second synthetic VOD to {filepath}.")
+
+    image_inputs = [argument for image in images for argument in ["-loop", "1", "-i", image]]
+
+    cmd = ["ffmpeg", "-y", "-v", "error",
+           "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate={frame_rate}:duration={duration}",
+           *image_inputs,
+           "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=48000",
+           "-filter_complex", "; ".join(filter_complex),
+           "-map", "[v]", "-map", f"{len(images) + 1}:a", "-t", str(duration),
+           "-c:v", "libx264", "-preset", "ultrafast", "-g", str(frame_rate * 2), "-pix_fmt", "yuv420p",
+           "-c:a", "aac", filepath]
+
+    subprocess.run(cmd, check=True)
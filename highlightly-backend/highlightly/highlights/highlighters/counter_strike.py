@@ -5,7 +5,6 @@ import pandas as pd
 from demoparser import DemoParser
 
 from highlights.highlighters.highlighter import Highlighter, group_events
-from highlights.models import Highlight
 from highlights.types import Event, RoundData
 from scrapers.models import GameVod
 
@@ -55,15 +54,23 @@ class CounterStrikeHighlighter(Highlighter):
 
         return events
 
-    def combine_events(self, game: GameVod, events: list[Event]) -> None:
+    def create_rounds(self, game: GameVod, events: list[Event]) -> list[RoundData]:
+        # The events might have been extracted by another worker, in which case the demo needs to be opened again.
+        if self.demo_parser is None:
+            self.demo_filepath = f"{game.match.create_unique_folder_path('demos')}/{game.gotvdemo.filename}"
+            self.demo_parser = DemoParser(self.demo_filepath)
+
         rounds = split_events_into_rounds(events, self.demo_parser)
         calibrate_event_times(rounds)
         clean_rounds(rounds)
 
-        logging.info(f"Split events for {game} into {len(rounds)} rounds.")
+        return rounds
+
+    def group_round_events(self, round: RoundData) -> list[list[Event]]:
+        return group_events(round["events"], "bomb_planted")
 
-        split_rounds_into_highlights(rounds, game)
-        logging.info(f"Split {len(rounds)} rounds into {game.highlight_set.count()} highlights.")
+    def get_highlight_value(self, events: list[Event], round: RoundData) -> float:
+        return get_highlight_value(events, round)
 
 
 def split_events_into_rounds(events: list[Event], demo_parser) -> list[RoundData]:
@@ -146,14 +153,15 @@ def extract_round_data(demo_parser: DemoParser) -> list[RoundData]:
     # For each round, calculate how many were alive at the end of the round per team and the total team equipment value.
     for game_round in rounds:
         round_rows = tick_df.loc[tick_df["round"] == game_round]
-        round_number = round_rows["round"].iloc[0]
-        data: RoundData = {"number": round_number, "end_time": round(round_rows["tick"].iloc[0] / 128),
-                           "teams": list(teams)}
+        round_number = int(round_rows["round"].iloc[0])
+        data: RoundData = {"number": round_number, "end_time": int(round(round_rows["tick"].iloc[0] / 128)),
+                           "teams": [int(team) for team in teams]}
 
+        # The values are converted from NumPy types to make it possible to store the round data as JSON.
         for team in teams:
             team_round_rows = round_rows.loc[tick_df["team_num"] == team]
             data[f"team_{team}_alive"] = len(team_round_rows.loc[team_round_rows["health"] != 0])
-            data[f"team_{team}_equipment_value"] = team_round_rows["equipment_value"].sum()
+            data[f"team_{team}_equipment_value"] = int(team_round_rows["equipment_value"].sum())
 
         round_data.append(data)
 
@@ -173,26 +181,6 @@ def clean_rounds(rounds: list[RoundData]) -> None:
                 del round["events"][-1]
 
 
-def split_rounds_into_highlights(rounds: list[RoundData], game: GameVod) -> None:
-    """
-    Group events within each round to create individual highlights and assign a value to the highlight to signify
-    how "good" the highlight is.
-    """
-    for round in rounds:
-        if len(round["events"]) > 0:
-            grouped_events = group_events(round["events"], "bomb_planted")
-
-            for group in grouped_events:
-                value = get_highlight_value(group, round)
-
-                start = group[0]["time"]
-                end = group[-1]["time"]
-                events_str = " - ".join([f"{event['name']} ({event['time']})" for event in group])
-
-                Highlight.objects.create(game_vod=game, start_time_seconds=start, duration_seconds=max(end - start, 1),
-                                         events=events_str, round_number=round["number"], value=value)
-
-
 def get_highlight_value(events: list[Event], round: RoundData) -> int:
     """Return a number that signifies how "good" the highlight is based on the content and context of the events."""
     value = 0
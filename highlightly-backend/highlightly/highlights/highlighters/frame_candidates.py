@@ -0,0 +1,83 @@
+import logging
+import math
+from pathlib import Path
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from highlights.models import FrameCandidate
+from scrapers.models import GameVod
+
+# Frames are scored at this size, which is enough to compare sharpness and activity and keeps scoring cheap.
+SCORING_SIZE = (320, 180)
+
+
+class FrameCandidateCollector:
+    """
+    Keep the best scored frames of the frames decoded while analyzing a VOD, so a match frame for the thumbnail can be
+    picked without opening the VOD again. Frames are scored by their sharpness, the variance of the Laplacian, and their
+    activity, the mean difference from the previous decoded frame. Kept frames are spaced apart, so the candidates are
+    not all from the same moment in the game.
+    """
+
+    def __init__(self) -> None:
+        self.max_candidates = settings.THUMBNAIL_FRAME_CANDIDATES
+        self.min_spacing_seconds = settings.THUMBNAIL_FRAME_CANDIDATE_SPACING
+
+        # The frame second, frame, sharpness, activity, and score of each kept frame.
+        self.candidates: list[tuple[int, np.ndarray, float, float, float]] = []
+        self.previous: tuple[int, np.ndarray] | None = None
+
+    def add(self, frame_second: int, frame: np.ndarray) -> None:
+        """Score the full size frame and keep it if it is one of the best frames so far."""
+        gray = cv2.cvtColor(cv2.resize(frame, SCORING_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        previous, self.previous = self.previous, (frame_second, gray)
+
+        # Frames without a recent previous frame cannot be scored on activity, so they are only used as a reference.
+        if previous is None or not 0 < frame_second - previous[0] <= 5:
+            return
+
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        activity = float(cv2.absdiff(gray, previous[1]).mean())
+        score = math.log1p(sharpness) + math.log1p(activity)
+
+        # A frame close to a kept frame replaces it if it is better, otherwise the worst kept frame is replaced.
+        close = [candidate for candidate in self.candidates
+                 if abs(candidate[0] - frame_second) < self.min_spacing_seconds]
+
+        if len(close) > 0:
+            if all(score > candidate[4] for candidate in close):
+                self.candidates = [candidate for candidate in self.candidates
+                                   if abs(candidate[0] - frame_second) >= self.min_spacing_seconds]
+                self.candidates.append((frame_second, frame, sharpness, activity, score))
+        elif len(self.candidates) < self.max_candidates:
+            self.candidates.append((frame_second, frame, sharpness, activity, score))
+        else:
+            worst_index = min(range(len(self.candidates)), key=lambda index: self.candidates[index][4])
+            if score > self.candidates[worst_index][4]:
+                self.candidates[worst_index] = (frame_second, frame, sharpness, activity, score)
+
+    def save(self, game_vod: GameVod) -> None:
+        """Save the kept frames as JPEGs and replace the previous frame candidates of the game with them."""
+        folder_path = game_vod.match.create_unique_folder_path("frame_candidates")
+        vod_name = Path(game_vod.filename).stem
+        frame_candidates = []
+
+        for frame_second, frame, sharpness, activity, score in self.candidates:
+            filename = f"{vod_name}_{frame_second}.jpg"
+            cv2.imwrite(f"{folder_path}/{filename}", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+            frame_candidates.append(FrameCandidate(game_vod=game_vod, frame_time=frame_second, filename=filename,
+                                                   sharpness=sharpness, activity=activity, score=score))
+
+        filenames = [frame_candidate.filename for frame_candidate in frame_candidates]
+        for previous_candidate in game_vod.framecandidate_set.exclude(filename__in=filenames):
+            Path(f"{folder_path}/{previous_candidate.filename}").unlink(missing_ok=True)
+
+        with transaction.atomic():
+            game_vod.framecandidate_set.all().delete()
+            FrameCandidate.objects.bulk_create(frame_candidates)
+
+        logging.info(f"Saved {len(frame_candidates)} thumbnail frame candidates for {game_vod}.")
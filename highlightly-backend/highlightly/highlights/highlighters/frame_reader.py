@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+from highlights.highlighters.frame_candidates import FrameCandidateCollector
+from util.video_index import VideoIndex
+
+# Placed in the queue by the decoder thread when there are no more frames to read.
+_END_OF_FRAMES = object()
+
+
+class FrameReader:
+    """
+    Decode frames from a VOD in a background thread while the frames are analyzed in the calling thread. Decoding
+    happens in OpenCV which releases the GIL, so decoding the next frames overlaps with the analysis of the current
+    frames. The queue between the two is bounded to limit the memory used by decoded frames that are not analyzed yet.
+    If a frame candidate collector is given, the full frames are also scored as thumbnail frames before being cropped.
+    """
+
+    # The number of frames decoded by all readers in this process, including the frames decoded while skipping forward
+    # and after seeking, which the benchmarks report for each stage.
+    total_frames_decoded = 0
+    total_lock = threading.Lock()
+
+    def __init__(self, vod_filepath: str, frame_seconds: list[int],
+                 crop: tuple[tuple[int, int], tuple[int, int]] | None = None, max_queue_size: int = 64,
+                 frame_candidates: FrameCandidateCollector | None = None) -> None:
+        self.vod_filepath = vod_filepath
+        self.frame_seconds = frame_seconds
+        self.crop = crop
+        self.frame_candidates = frame_candidates
+
+        self.queue: Queue = Queue(maxsize=max_queue_size)
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.error: Exception | None = None
+
+        # Statistics that show if decoding or analysis is the bottleneck. Frames are read for each frame second, while
+        # the decoded frames also include the frames that are decoded to reach them.
+        self.frames_read = 0
+        self.frames_decoded = 0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.decoder_stall_seconds = 0.0
+        self.analysis_stall_seconds = 0.0
+
+    def __enter__(self) -> "FrameReader":
+        self.start()
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.stop()
+
+    def __iter__(self) -> Iterator[tuple[int, np.ndarray | None]]:
+        """Yield the frame second and the (cropped) frame for each frame second. The frame is None if it is missing."""
+        if self.thread is None:
+            self.start()
+
+        while True:
+            item = self.get()
+
+            if item is _END_OF_FRAMES:
+                break
+
+            yield item
+
+        if self.error is not None:
+            raise self.error
+
+    def batches(self, batch_size: int) -> Iterator[list[tuple[int, np.ndarray]]]:
+        """Yield the frames in batches of the given size, skipping missing frames."""
+        batch = []
+
+        for frame_second, frame in self:
+            if frame is not None:
+                batch.append((frame_second, frame))
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.decode_frames, name=f"FrameReader-{self.vod_filepath}", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the decoder thread, even if not all frames were read, and log the statistics."""
+        self.stop_event.set()
+
+        if self.thread is not None:
+            # Empty the queue, so the decoder thread is not blocked on putting a frame into a full queue.
+            while self.thread.is_alive():
+                try:
+                    self.queue.get(timeout=0.1)
+                except Empty:
+                    pass
+
+            self.thread = None
+            logging.info(f"Frame reader statistics for {self.vod_filepath}: {self.get_statistics()}")
+
+    def get(self):
+        start = time.perf_counter()
+        item = self.queue.get()
+        self.analysis_stall_seconds += time.perf_counter() - start
+
+        return item
+
+    def put(self, item) -> bool:
+        """Put the item into the queue. Return False if the reader was stopped while waiting for space in the queue."""
+        start = time.perf_counter()
+
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                self.decoder_stall_seconds += time.perf_counter() - start
+
+                queue_depth = self.queue.qsize()
+                self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+                self.queue_depth_total += queue_depth
+
+                return True
+            except Full:
+                pass
+
+        return False
+
+    def decode_frames(self) -> None:
+        """Decode the frame for each frame second and put the (cropped) frames into the queue."""
+        # Each thread uses its own video capture since a video capture cannot be shared between threads.
+        video_capture = cv2.VideoCapture(self.vod_filepath)
+        current_frame_number = -1
+
+        try:
+            # The index finds the frame at each second using the timestamps. Seeks use the time of the frame instead of
+            # its number, since OpenCV maps frame numbers to timestamps with the average frame rate.
+            video_index = VideoIndex.load(self.vod_filepath)
+
+            for frame_second in self.frame_seconds:
+                frame_number = video_index.frame_number_at(frame_second)
+
+                # Decode forward if there is no keyframe between the current frame and the next frame, since seeking
+                # would decode from the same keyframe or an earlier keyframe.
+                if current_frame_number < frame_number and \
+                        video_index.keyframe_number_before(frame_number) <= current_frame_number:
+                    for _ in range(frame_number - current_frame_number - 1):
+                        video_capture.grab()
+
+                    decoded_count = frame_number - current_frame_number
+                else:
+                    video_capture.set(cv2.CAP_PROP_POS_MSEC, video_index.frame_msec(frame_number))
+
+                    # The seek decodes from the keyframe before the frame up to the frame.
+                    decoded_count = frame_number - video_index.keyframe_number_before(frame_number) + 1
+
+                _res, frame = video_capture.read()
+                current_frame_number = frame_number
+                self.frames_read += 1
+                self.frames_decoded += decoded_count
+
+                with FrameReader.total_lock:
+                    FrameReader.total_frames_decoded += decoded_count
+
+                if frame is not None and self.frame_candidates is not None:
+                    self.frame_candidates.add(frame_second, frame)
+
+                if frame is not None and self.crop is not None:
+                    height, width = self.crop
+                    frame = frame[height[0]:height[1], width[0]:width[1]].copy()
+
+                if not self.put((frame_second, frame)):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            video_capture.release()
+            self.put(_END_OF_FRAMES)
+
+    def get_statistics(self) -> dict:
+        """Return statistics about the decoded frames, the queue depth, and how long each side waited on the other."""
+        return {"frames_read": self.frames_read, "frames_decoded": self.frames_decoded,
+                "max_queue_depth": self.max_queue_depth,
+                "average_queue_depth": round(self.queue_depth_total / max(self.frames_read, 1), 2),
+                "decoder_stall_seconds": round(self.decoder_stall_seconds, 3),
+                "analysis_stall_seconds": round(self.analysis_stall_seconds, 3)}
@@ -1,6 +1,9 @@
 import logging
 
-from highlights.types import Event
+from django.db import transaction
+
+from highlights.models import Highlight, GameRound
+from highlights.types import Event, RoundData
 from scrapers.models import GameVod
 
 
@@ -9,8 +12,16 @@ class Highlighter:
         """Parse through the match to find all significant events that could be included in a highlight."""
         raise NotImplementedError
 
-    def combine_events(self, game: GameVod, events: list[Event]) -> None:
-        """Combine multiple events happening in close succession together to create highlights."""
+    def create_rounds(self, game: GameVod, events: list[Event]) -> list[RoundData]:
+        """Split the events into rounds that include the context needed to value the highlights in the round."""
+        raise NotImplementedError
+
+    def group_round_events(self, round: RoundData) -> list[list[Event]]:
+        """Combine multiple events happening in close succession within the round together to create highlights."""
+        raise NotImplementedError
+
+    def get_highlight_value(self, events: list[Event], round: RoundData) -> float:
+        """Return a number that signifies how "good" the highlight is based on the content and context of the events."""
         raise NotImplementedError
 
     def highlight(self, game: GameVod) -> None:
@@ -20,12 +31,58 @@ class Highlighter:
         events = self.extract_events(game)
         logging.info(f"Found {len(events)} events for {game}.")
 
-        self.combine_events(game, events)
-        logging.info(f"Combined {len(events)} events for {game} into {game.highlight_set.count()} highlights.")
+        self.create_highlights(game, events)
+
+    def create_highlights(self, game: GameVod, events: list[Event]) -> None:
+        """Store the extracted events as rounds, combine them into highlights, and mark the game as highlighted."""
+        rounds = self.create_rounds(game, events)
+        save_rounds(game, rounds)
+        logging.info(f"Split events for {game} into {len(rounds)} rounds.")
+
+        highlight_count = self.score_highlights(game)
+        logging.info(f"Combined {len(events)} events for {game} into {highlight_count} highlights.")
 
         game.highlighted = True
         game.save(update_fields=["highlighted"])
 
+    def score_highlights(self, game: GameVod) -> int:
+        """
+        Create the highlights of the game from the stored rounds, replacing any existing highlights. Since only the
+        stored events are used, this can be used to recreate the highlights after changing how they are grouped and
+        valued. The number of created highlights is returned.
+        """
+        highlights = []
+
+        for game_round in game.gameround_set.order_by("number"):
+            round = game_round.get_round_data()
+
+            if len(round["events"]) > 0:
+                for group in self.group_round_events(round):
+                    start = group[0]["time"]
+                    end = group[-1]["time"]
+                    events_str = " - ".join([f"{event['name']} ({event['time']})" for event in group])
+
+                    highlights.append(Highlight(game_vod=game, start_time_seconds=start, round_number=round["number"],
+                                                value=self.get_highlight_value(group, round), events=events_str,
+                                                duration_seconds=max(end - start, 1)))
+
+        with transaction.atomic():
+            game.highlight_set.all().delete()
+            Highlight.objects.bulk_create(highlights)
+
+        return len(highlights)
+
+
+def save_rounds(game: GameVod, rounds: list[RoundData]) -> None:
+    """Store the events and the context of each round, replacing the previously stored rounds of the game."""
+    game_rounds = [GameRound(game_vod=game, number=round["number"], events=round["events"],
+                             context={key: value for key, value in round.items() if key not in ["number", "events"]})
+                   for round in rounds]
+
+    with transaction.atomic():
+        game.gameround_set.all().delete()
+        GameRound.objects.bulk_create(game_rounds)
+
 
 # TODO: Maybe decrease the time between event groups and then make it possible to combine highlights later if they are both kept.
 # TODO: This would remove more individual events while avoiding issues with cutting small breaks.
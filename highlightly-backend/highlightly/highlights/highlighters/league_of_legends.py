@@ -6,12 +6,13 @@ from datetime import timedelta
 import cv2
 import numpy as np
 
+from highlights.highlighters.frame_candidates import FrameCandidateCollector
+from highlights.highlighters.frame_reader import FrameReader
 from highlights.highlighters.highlighter import Highlighter, group_events
 from highlights.highlighters.util import scale_image, optical_character_recognition
-from highlights.models import Highlight
-from highlights.types import Event
+from highlights.types import Event, RoundData
 from scrapers.models import GameVod
-from videos.editors.editor import get_video_frame_rate, get_video_length
+from util.video_probe import probe
 
 
 class LeagueOfLegendsHighlighter(Highlighter):
@@ -21,17 +22,15 @@ class LeagueOfLegendsHighlighter(Highlighter):
         """Use PaddleOCR and template matching to extract events from the game vod."""
 
         vod_filepath = f"{game_vod.match.create_unique_folder_path('vods')}/{game_vod.filename}"
-        video_capture = cv2.VideoCapture(vod_filepath)
-        frame_rate = get_video_frame_rate(vod_filepath)
-        total_seconds = get_video_length(vod_filepath)
+        total_seconds = probe(vod_filepath)["duration"]
 
         # Use PaddleOCR to find the segment of the VOD that contains the live game itself.
-        timeline = extract_game_timeline(game_vod, video_capture, frame_rate, total_seconds)
+        timeline = extract_game_timeline(game_vod, vod_filepath, total_seconds)
         logging.info(f"Found timeline in {game_vod}: {timeline}")
 
         # Find the frames that should be checked within the live game segment.
         start_second = get_game_start_second(timeline)
-        end_second = get_game_end_second(game_vod, timeline, video_capture, frame_rate)
+        end_second = get_game_end_second(game_vod, timeline, vod_filepath)
 
         logging.info(f"{game_vod} starts at {start_second} and ends at {end_second} in {game_vod.filename}.")
 
@@ -42,26 +41,25 @@ class LeagueOfLegendsHighlighter(Highlighter):
         shutil.rmtree(game_vod.match.create_unique_folder_path("frames"))
         shutil.rmtree(game_vod.match.create_unique_folder_path("last_frames"))
 
-        return get_game_events(game_vod, video_capture, frame_rate, frames_to_check, end_second)
+        frame_candidates = FrameCandidateCollector()
+        events = get_game_events(game_vod, vod_filepath, frames_to_check, end_second, frame_candidates)
+        frame_candidates.save(game_vod)
 
-    def combine_events(self, game: GameVod, events: list[Event]) -> None:
-        """Combine the events based on time and create a highlight for each group of events."""
-        # Group the events within each round based on time.
-        grouped_events = group_events(events, "", 30)
+        return events
 
-        for group in grouped_events:
-            # Create a highlight object for each group of events.
-            value = get_highlight_value(group)
+    def create_rounds(self, game: GameVod, events: list[Event]) -> list[RoundData]:
+        """Keep all events in a single round since there are no rounds in League of Legends."""
+        return [{"number": 1, "events": events}]
 
-            start = group[0]["time"]
-            end = group[-1]["time"]
-            events_str = " - ".join([f"{event['name']} ({event['time']})" for event in group])
+    def group_round_events(self, round: RoundData) -> list[list[Event]]:
+        """Group the events based on time."""
+        return group_events(round["events"], "", 30)
 
-            Highlight.objects.create(game_vod=game, start_time_seconds=start, round_number=1, value=value,
-                                     duration_seconds=max(end - start, 1), events=events_str)
+    def get_highlight_value(self, events: list[Event], round: RoundData) -> float:
+        return get_highlight_value(events)
 
 
-def extract_game_timeline(game_vod: GameVod, video_capture, frame_rate: float, total_seconds: float) -> dict[int, int]:
+def extract_game_timeline(game_vod: GameVod, vod_filepath: str, total_seconds: float) -> dict[int, int]:
     """
     Return the timeline of the game within the full VOD using PaddleOCR. Return it as a dict from the frame second
     to the time in the match at the frame.
@@ -72,8 +70,7 @@ def extract_game_timeline(game_vod: GameVod, video_capture, frame_rate: float, t
 
     # Save a frame for every 20 seconds in the full VOD.
     frame_folder_path = game_vod.match.create_unique_folder_path("frames")
-    for frame_second in frames:
-        save_timer_image(video_capture, frame_rate, frame_second, f"{frame_folder_path}/{frame_second}.png")
+    save_timer_images(vod_filepath, list(frames), frame_folder_path)
 
     # Attempt to find the game time in each image.
     frame_detections = optical_character_recognition(frame_folder_path)
@@ -94,14 +91,12 @@ def extract_game_timeline(game_vod: GameVod, video_capture, frame_rate: float, t
     return timeline
 
 
-def save_timer_image(video_capture, frame_rate: float, frame_second: int, file_path: str) -> None:
-    """Save an image that contains the timer in the given second of the given video capture."""
-    video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_rate * frame_second)
-    _res, frame = video_capture.read()
-
-    if frame is not None:
-        cropped_frame = frame[0:110, 910:1010]
-        cv2.imwrite(file_path, scale_image(cropped_frame, 300))
+def save_timer_images(vod_filepath: str, frame_seconds: list[int], folder_path: str) -> None:
+    """Save an image that contains the timer in each of the given seconds of the VOD to the folder path."""
+    with FrameReader(vod_filepath, frame_seconds, crop=((0, 110), (910, 1010))) as frame_reader:
+        for frame_second, cropped_frame in frame_reader:
+            if cropped_frame is not None:
+                cv2.imwrite(f"{folder_path}/{frame_second}.png", scale_image(cropped_frame, 300))
 
 
 def get_game_start_second(timeline: dict[int, int]) -> int:
@@ -121,15 +116,13 @@ def get_game_start_second(timeline: dict[int, int]) -> int:
     return max(1, int(min(valid_start_times)))
 
 
-def get_game_end_second(game_vod: GameVod, timeline: dict[int, int], video_capture, frame_rate: float) -> int:
+def get_game_end_second(game_vod: GameVod, timeline: dict[int, int], vod_filepath: str) -> int:
     """Using the given timeline, extract frames near the end of the timeline to find the exact end second."""
     # TODO: Find the last element in the timeline that is related to the game.
 
     frames_to_check = range(max(timeline.keys()), max(timeline.keys()) + 21)
     frame_folder_path = game_vod.match.create_unique_folder_path("last_frames")
-
-    for frame_second in frames_to_check:
-        save_timer_image(video_capture, frame_rate, frame_second, f"{frame_folder_path}/{frame_second}.png")
+    save_timer_images(vod_filepath, list(frames_to_check), frame_folder_path)
 
     frame_detections = optical_character_recognition(frame_folder_path)
     logging.info(f"Detected text in timer images: {dict(sorted(frame_detections.items()))}")
@@ -146,38 +139,41 @@ def get_game_end_second(game_vod: GameVod, timeline: dict[int, int], video_captu
 
 
 # TODO: Maybe include the object kills from the graphql match data to ensure they are included.
-def get_game_events(game_vod: GameVod, video_capture, frame_rate: float, frames_to_check: list[int],
-                    end_second: int) -> list[dict]:
+def get_game_events(game_vod: GameVod, vod_filepath: str, frames_to_check: list[int], end_second: int,
+                    frame_candidates: FrameCandidateCollector | None = None) -> list[dict]:
     """Check each frame for events using template matching and return the list of found events."""
     events = []
 
     template_paths = get_kill_feed_templates(game_vod)
     template_images = [cv2.imread(template_path, cv2.IMREAD_GRAYSCALE) for template_path in template_paths]
 
-    for frame_second in frames_to_check:
-        video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_rate * frame_second)
-        _res, frame = video_capture.read()
-
-        # Modify the image to best capture the kill feed.
-        frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Handle slight differences in the placement of the area with the kill feed.
-        height, width = get_kill_feed_placement(game_vod)
-        cropped_frame_gray = frame_gray[height[0]:height[1], width[0]:width[1]]
-
-        # Match on the different icons that can be in the kill feed.
-        mask = np.zeros(cropped_frame_gray.shape[:2], np.uint8)
-        for (template_path, template_image) in zip(template_paths, template_images):
-            w, h = template_image.shape[::-1]
-            result = cv2.matchTemplate(cropped_frame_gray, template_image, cv2.TM_CCOEFF_NORMED)
-
-            loc = np.where(result >= 0.8)
-
-            for pt in zip(*loc[::-1]):
-                # Check if the template match has already been found.
-                if mask[pt[1] + int(round(h / 2)), pt[0] + int(round(w / 2))] != 255:
-                    mask[pt[1]:pt[1] + h, pt[0]:pt[0] + w] = 255
-                    events.append({"name": "event", "time": frame_second})
+    # Handle slight differences in the placement of the area with the kill feed.
+    kill_feed_placement = get_kill_feed_placement(game_vod)
+
+    # The frames are decoded and cropped in the background while template matching is performed on the previous frames.
+    # If given, the full frames are also scored as thumbnail frames while they are decoded.
+    with FrameReader(vod_filepath, frames_to_check, crop=kill_feed_placement,
+                     frame_candidates=frame_candidates) as frame_reader:
+        for frame_second, cropped_frame in frame_reader:
+            if cropped_frame is None:
+                continue
+
+            # Modify the image to best capture the kill feed.
+            cropped_frame_gray = cv2.cvtColor(cropped_frame, cv2.COLOR_BGR2GRAY)
+
+            # Match on the different icons that can be in the kill feed.
+            mask = np.zeros(cropped_frame_gray.shape[:2], np.uint8)
+            for (template_path, template_image) in zip(template_paths, template_images):
+                w, h = template_image.shape[::-1]
+                result = cv2.matchTemplate(cropped_frame_gray, template_image, cv2.TM_CCOEFF_NORMED)
+
+                loc = np.where(result >= 0.8)
+
+                for pt in zip(*loc[::-1]):
+                    # Check if the template match has already been found.
+                    if mask[pt[1] + int(round(h / 2)), pt[0] + int(round(w / 2))] != 255:
+                        mask[pt[1]:pt[1] + h, pt[0]:pt[0] + w] = 255
+                        events.append({"name": "event", "time": frame_second})
 
     # Add an event for the nexus being destroyed.
     events.append({"name": "nexus_destroyed", "time": end_second})
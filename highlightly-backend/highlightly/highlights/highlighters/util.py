@@ -3,6 +3,9 @@ import subprocess
 
 import cv2
 
+# The number of PaddleOCR invocations by this process, which the benchmarks report for each stage.
+ocr_call_count = 0
+
 
 def scale_image(image: any, scale_percent) -> any:
     """Scale the given image while keeping the aspect ratio."""
@@ -12,8 +15,16 @@ def scale_image(image: any, scale_percent) -> any:
     return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
 
 
+def get_ocr_call_count() -> int:
+    """Return the number of PaddleOCR invocations by this process."""
+    return ocr_call_count
+
+
 def optical_character_recognition(path: str) -> dict:
     """Perform optical character recognition on the given images using PaddleOCR."""
+    global ocr_call_count
+    ocr_call_count += 1
+
     cmd = f"paddleocr --image_dir {path} --use_angle_cls false --lang en --use_gpu false --enable_mkldnn true " \
           f"--use_mp true --show_log false --use_dilation true --det_db_score_mode slow"
 
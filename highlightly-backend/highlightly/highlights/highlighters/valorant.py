@@ -6,15 +6,16 @@ from datetime import timedelta
 from difflib import SequenceMatcher
 
 import cv2
-import requests
 from bs4 import BeautifulSoup
 
+from highlights.highlighters.frame_candidates import FrameCandidateCollector
+from highlights.highlighters.frame_reader import FrameReader
 from highlights.highlighters.highlighter import Highlighter, group_events
 from highlights.highlighters.util import scale_image, optical_character_recognition
-from highlights.models import Highlight
-from highlights.types import SecondData, Event
+from highlights.types import SecondData, Event, RoundData
 from scrapers.models import GameVod
-from videos.editors.editor import get_video_length, get_video_frame_rate
+from util import http_client
+from util.video_probe import probe
 
 
 # TODO: Fix problem with the last kill of the game being missed by increasing the frames more in the last round.
@@ -26,19 +27,20 @@ class ValorantHighlighter(Highlighter):
         game.refresh_from_db()
 
         vod_filepath = f"{game.match.create_unique_folder_path('vods')}/{game.filename}"
-        video_capture = cv2.VideoCapture(vod_filepath)
-        frame_rate = get_video_frame_rate(vod_filepath)
 
         logging.info(f"Extracting round timeline from VOD at {game.filename} for {game}.")
-        rounds = extract_round_timeline(game, vod_filepath, frame_rate)
+        rounds = extract_round_timeline(game, vod_filepath)
         add_frames_to_check(rounds, game)
 
         logging.info(f"Finding spike and kill events for {game}.")
         spike_folder_path = game.match.create_unique_folder_path(f"spike")
-        add_spike_events(rounds, video_capture, frame_rate, spike_folder_path)
+        add_spike_events(rounds, vod_filepath, spike_folder_path)
 
+        # The frames checked for kills are scored as thumbnail frames while they are decoded.
         kills_folder_path = game.match.create_unique_folder_path(f"kills")
-        add_kill_events(rounds, video_capture, frame_rate, kills_folder_path)
+        frame_candidates = FrameCandidateCollector()
+        add_kill_events(rounds, vod_filepath, kills_folder_path, frame_candidates)
+        frame_candidates.save(game)
 
         # Remove the folders used to save the frames that were analyzed.
         shutil.rmtree(game.match.create_unique_folder_path("frames"))
@@ -47,36 +49,30 @@ class ValorantHighlighter(Highlighter):
 
         return rounds
 
-    def combine_events(self, game: GameVod, rounds: dict[int, dict]) -> None:
-        """Combine multiple events happening in close succession together to create highlights."""
+    def create_rounds(self, game: GameVod, rounds: dict[int, dict]) -> list[RoundData]:
+        """Sort the events in each round and keep the start and estimated end of the round as the round context."""
+        # Round numbers are converted to strings if the rounds were passed between tasks as JSON.
+        rounds = {int(round_number): round_data for round_number, round_data in rounds.items()}
         clean_rounds(rounds)
 
-        for round_number, round_data in rounds.items():
-            if len(round_data["events"]) > 0:
-                # Group the events within each round based on time.
-                grouped_events = group_events(round_data["events"], "spike_planted")
+        return [{"number": round_number, "events": round_data["events"], "start_time": round_data["start_time"],
+                 "estimated_end_time": round_data["estimated_end_time"]} for round_number, round_data in rounds.items()]
 
-                # Create a highlight object for each group of events.
-                for group in grouped_events:
-                    # For each group of events, get the value of the group.
-                    value = get_highlight_value(group, round_number)
+    def group_round_events(self, round: RoundData) -> list[list[Event]]:
+        return group_events(round["events"], "spike_planted")
 
-                    start = group[0]["time"]
-                    end = group[-1]["time"]
-                    events_str = " - ".join([f"{event['name']} ({event['time']})" for event in group])
+    def get_highlight_value(self, events: list[Event], round: RoundData) -> float:
+        return get_highlight_value(events, round["number"])
 
-                    Highlight.objects.create(game_vod=game, start_time_seconds=start, round_number=round_number,
-                                             value=value, duration_seconds=max(end - start, 1), events=events_str)
 
-
-def extract_round_timeline(game: GameVod, vod_filepath: str, frame_rate: float) -> dict[int, dict]:
+def extract_round_timeline(game: GameVod, vod_filepath: str) -> dict[int, dict]:
     """Parse through the VOD to find each round in the game."""
     folder_path = game.match.create_unique_folder_path("frames")
-    total_seconds = get_video_length(vod_filepath)
+    total_seconds = probe(vod_filepath)["duration"]
     frames = list(range(0, int(total_seconds) + 1, 10))
 
     # Save the frames that should be analyzed to disk.
-    save_video_frames(vod_filepath, frames, folder_path, frame_rate)
+    save_video_frames(vod_filepath, frames, folder_path)
 
     # Perform optical character recognition on the saved frames to find potential text.
     frame_detections = optical_character_recognition(folder_path)
@@ -91,12 +87,15 @@ def extract_round_timeline(game: GameVod, vod_filepath: str, frame_rate: float)
     return rounds
 
 
-def save_video_frames(vod_filepath: str, frame_group: list[int], folder_path: str, frame_rate: float) -> None:
-    """Parse through the VOD for the frames in the given group and save them to the folder path."""
-    video_capture = cv2.VideoCapture(vod_filepath)
-
-    for frame_second in frame_group:
-        save_round_timer_image(video_capture, frame_rate, frame_second, f"{folder_path}/{frame_second}.png")
+def save_video_frames(vod_filepath: str, frame_group: list[int], folder_path: str) -> None:
+    """
+    Parse through the VOD for the frames in the given group and save an image that contains the round number and timer
+    for each frame to the folder path.
+    """
+    with FrameReader(vod_filepath, frame_group, crop=((0, 70), (910, 1010))) as frame_reader:
+        for frame_second, cropped_frame in frame_reader:
+            if cropped_frame is not None:
+                cv2.imwrite(f"{folder_path}/{frame_second}.png", scale_image(cropped_frame, 300))
 
 
 def create_initial_round_timeline(frame_detections: dict[int, list[str]]) -> dict[int, dict[str, int]]:
@@ -337,7 +336,7 @@ def get_round_spike_info(game: GameVod) -> dict:
     """Return a dict with a list of rounds where the spike was defused and a list of rounds where the spike exploded."""
     round_spike_info = {"spike_defused": [], "spike_exploded": []}
 
-    html = requests.get(url=game.match.url).text
+    html = http_client.get(game.match.url).text
     soup = BeautifulSoup(html, "html.parser")
 
     game_map = next(map_div for map_div in soup.findAll("div", class_="map") if game.map in map_div.text)
@@ -359,14 +358,12 @@ def get_round_spike_info(game: GameVod) -> dict:
     return round_spike_info
 
 
-def add_spike_events(rounds: dict[int, dict], video_capture, frame_rate: float, folder_path: str) -> None:
+def add_spike_events(rounds: dict[int, dict], vod_filepath: str, folder_path: str) -> None:
     """Check the seconds for spike events and add each found event to the round."""
     # Extract the round and timer for each frame to check.
-    for _, round_data in rounds.items():
-        frames = round_data["frames_to_check_for_spike_planted"] + round_data["frames_to_check_for_spike_stopped"]
-        for frame_second in frames:
-            file_path = f"{folder_path}/{frame_second}.png"
-            save_round_timer_image(video_capture, frame_rate, frame_second, file_path)
+    frames = [frame_second for _, round_data in rounds.items() for frame_second in
+              round_data["frames_to_check_for_spike_planted"] + round_data["frames_to_check_for_spike_stopped"]]
+    save_video_frames(vod_filepath, frames, folder_path)
 
     # Find the round number and timer in each image.
     frame_detections = optical_character_recognition(folder_path)
@@ -396,19 +393,12 @@ def add_spike_events(rounds: dict[int, dict], video_capture, frame_rate: float,
                 round_data["events"].append({"name": "spike_stopped", "time": frames_to_check_for_stopped[-1] + 1})
 
 
-def add_kill_events(rounds: dict[int, dict], video_capture, frame_rate: float, folder_path: str) -> None:
+def add_kill_events(rounds: dict[int, dict], vod_filepath: str, folder_path: str,
+                    frame_candidates: FrameCandidateCollector | None = None) -> None:
     """Check the seconds for kill events and add each found event to the round."""
     # Extract the kill feed for each frame to check.
-    for _, round_data in rounds.items():
-        for frame_second in round_data["frames_to_check_for_kills"]:
-            file_path = f"{folder_path}/{frame_second}.png"
-
-            video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_rate * frame_second)
-            _res, frame = video_capture.read()
-
-            if frame is not None:
-                cropped_frame = frame[75:350, 1340:1840]
-                cv2.imwrite(file_path, scale_image(cropped_frame, 200))
+    frames = [frame_second for _, round_data in rounds.items() for frame_second in round_data["frames_to_check_for_kills"]]
+    save_kill_feed_images(vod_filepath, frames, folder_path, frame_candidates)
 
     frame_detections = optical_character_recognition(folder_path)
 
@@ -438,14 +428,14 @@ def add_kill_events(rounds: dict[int, dict], video_capture, frame_rate: float, f
         corresponding_round["events"].extend(frame_events)
 
 
-def save_round_timer_image(video_capture, frame_rate: float, frame_second: int, file_path: str) -> None:
-    """Save an image that contains the round number and timer in the given second of the given video capture."""
-    video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_rate * frame_second)
-    _res, frame = video_capture.read()
-
-    if frame is not None:
-        cropped_frame = frame[0:70, 910:1010]
-        cv2.imwrite(file_path, scale_image(cropped_frame, 300))
+def save_kill_feed_images(vod_filepath: str, frame_group: list[int], folder_path: str,
+                          frame_candidates: FrameCandidateCollector | None = None) -> None:
+    """Parse through the VOD for the frames in the given group and save an image of the kill feed for each frame."""
+    crop = ((75, 350), (1340, 1840))
+    with FrameReader(vod_filepath, frame_group, crop=crop, frame_candidates=frame_candidates) as frame_reader:
+        for frame_second, cropped_frame in frame_reader:
+            if cropped_frame is not None:
+                cv2.imwrite(f"{folder_path}/{frame_second}.png", scale_image(cropped_frame, 200))
 
 
 def clean_rounds(rounds: dict[int, dict]) -> None:
@@ -0,0 +1,22 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from highlights.benchmarks.runner import run_benchmarks, write_results
+
+
+class Command(BaseCommand):
+    help = "Benchmark the highlighter stages against synthetic VODs and write the measurements as JSON."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output", default="media/benchmarks/highlighters.json", help="Path of the JSON results.")
+        parser.add_argument("--workdir", default="media/benchmarks", help="Folder for the synthetic VODs and frames.")
+        parser.add_argument("--duration", type=int, default=600, help="Length of each synthetic VOD in seconds.")
+        parser.add_argument("--frame-rate", type=int, default=60, help="Frame rate of the synthetic VODs.")
+        parser.add_argument("--skip-ocr", action="store_true", help="Skip the PaddleOCR stages.")
+
+    def handle(self, *args, **options) -> None:
+        results = run_benchmarks(options["workdir"], options["duration"], options["frame_rate"], options["skip_ocr"])
+        write_results(results, options["output"])
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from highlights.rescoring import rescore_game_vods
+from scrapers.models import GameVod
+
+
+class Command(BaseCommand):
+    help = "Recreate the highlights of a game or all games in a tournament from the stored rounds."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--game-vod", type=int, help="ID of the game to rescore.")
+        group.add_argument("--tournament", type=int, help="ID of the tournament with the games to rescore.")
+
+    def handle(self, *args, **options) -> None:
+        if options["game_vod"] is not None:
+            game_vods = GameVod.objects.filter(id=options["game_vod"])
+        else:
+            game_vods = GameVod.objects.filter(match__tournament_id=options["tournament"])
+
+        result = rescore_game_vods(game_vods)
+        self.stdout.write(f"Rescored {result['game_vods']} games into {result['highlights']} highlights.")
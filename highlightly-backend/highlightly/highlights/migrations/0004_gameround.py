@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 10:12
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0046_organization_alternate_names'),
+        ('highlights', '0003_highlight_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameRound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('events', models.JSONField()),
+                ('context', models.JSONField(default=dict)),
+                ('game_vod', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scrapers.gamevod')),
+            ],
+            options={
+                'unique_together': {('game_vod', 'number')},
+            },
+        ),
+    ]
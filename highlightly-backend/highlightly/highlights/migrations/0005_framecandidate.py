@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 14:05
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0048_alter_gamevod_render_status'),
+        ('highlights', '0004_gameround'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrameCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frame_time', models.FloatField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('filename', models.CharField(max_length=256)),
+                ('sharpness', models.FloatField()),
+                ('activity', models.FloatField()),
+                ('score', models.FloatField()),
+                ('game_vod', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scrapers.gamevod')),
+            ],
+        ),
+    ]
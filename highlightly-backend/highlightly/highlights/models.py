@@ -1,6 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from highlights.types import RoundData
 from scrapers.models import GameVod
 
 
@@ -15,3 +16,40 @@ class Highlight(models.Model):
 
     def __str__(self) -> str:
         return f"Round {self.round_number} ({self.value} - {self.duration_seconds}s): {self.events}"
+
+
+class GameRound(models.Model):
+    """The raw events of a round in a game, stored so the highlights can be recreated without analyzing the VOD again."""
+    class Meta:
+        unique_together = ["game_vod", "number"]
+
+    game_vod = models.ForeignKey(GameVod, on_delete=models.CASCADE)
+
+    number = models.IntegerField(validators=[MinValueValidator(1)])
+    events = models.JSONField()
+
+    # Context used when valuing the highlights of the round, e.g. the winner, alive counts, and equipment values.
+    context = models.JSONField(default=dict)
+
+    def __str__(self) -> str:
+        return f"Round {self.number} of {self.game_vod} ({len(self.events)} events)"
+
+    def get_round_data(self) -> RoundData:
+        """Return the round in the same format as it was in when the highlights were originally created."""
+        return {"number": self.number, "events": self.events, **self.context}
+
+
+class FrameCandidate(models.Model):
+    """A frame scored while the VOD was analyzed, which can be used as the match frame in the thumbnail."""
+    game_vod = models.ForeignKey(GameVod, on_delete=models.CASCADE)
+
+    frame_time = models.FloatField(validators=[MinValueValidator(0)])
+    filename = models.CharField(max_length=256)
+
+    # The variance of the Laplacian of the frame and the mean difference from the previous analyzed frame.
+    sharpness = models.FloatField()
+    activity = models.FloatField()
+    score = models.FloatField()
+
+    def __str__(self) -> str:
+        return f"Frame at {self.frame_time} seconds in {self.game_vod} ({self.score:.2f})"
@@ -0,0 +1,29 @@
+import logging
+import time
+
+from django.db.models import QuerySet
+
+from highlights.tasks import get_highlighter
+from scrapers.models import GameVod
+
+
+def rescore_game_vods(game_vods: QuerySet[GameVod]) -> dict[str, int]:
+    """
+    Recreate the highlights of the given games from their stored rounds without analyzing the VODs again. Games that
+    do not have any stored rounds are skipped. Return the number of rescored games and created highlights.
+    """
+    start = time.perf_counter()
+    result = {"game_vods": 0, "highlights": 0}
+
+    for game_vod in game_vods.select_related("match__team_1"):
+        if not game_vod.gameround_set.exists():
+            logging.info(f"{game_vod} does not have any stored rounds and cannot be rescored.")
+            continue
+
+        result["highlights"] += get_highlighter(game_vod).score_highlights(game_vod)
+        result["game_vods"] += 1
+
+    logging.info(f"Rescored {result['game_vods']} games into {result['highlights']} highlights in "
+                 f"{round(time.perf_counter() - start, 3)} seconds.")
+
+    return result
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from scrapers.models import GameVod, Tournament
+
+
+class RescoreSerializer(serializers.Serializer):
+    game_vod = serializers.PrimaryKeyRelatedField(queryset=GameVod.objects.all(), required=False)
+    tournament = serializers.PrimaryKeyRelatedField(queryset=Tournament.objects.all(), required=False)
+
+    def validate(self, data: dict) -> dict:
+        if ("game_vod" in data) == ("tournament" in data):
+            raise serializers.ValidationError("Either a game VOD or a tournament should be given.")
+
+        return data
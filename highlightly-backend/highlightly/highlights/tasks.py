@@ -0,0 +1,38 @@
+import logging
+
+from highlightly.celery import app
+from highlights.highlighters.counter_strike import CounterStrikeHighlighter
+from highlights.highlighters.highlighter import Highlighter
+from highlights.highlighters.league_of_legends import LeagueOfLegendsHighlighter
+from highlights.highlighters.valorant import ValorantHighlighter
+from highlights.types import Event
+from scrapers.models import Game, GameVod
+
+
+@app.task
+def extract_game_events(game_vod_id: int) -> list[Event] | dict[int, dict]:
+    """Parse through the demo or VOD of the game to find all events that could be included in a highlight."""
+    game_vod = GameVod.objects.get(id=game_vod_id)
+    logging.info(f"Creating highlights for {game_vod}.")
+
+    events = get_highlighter(game_vod).extract_events(game_vod)
+    logging.info(f"Found {len(events)} events for {game_vod}.")
+
+    return events
+
+
+@app.task
+def create_game_highlights(events: list[Event] | dict[int, dict], game_vod_id: int) -> None:
+    """Combine the extracted events into highlights and persist them for the game."""
+    game_vod = GameVod.objects.get(id=game_vod_id)
+    get_highlighter(game_vod).create_highlights(game_vod, events)
+
+
+def get_highlighter(game_vod: GameVod) -> Highlighter:
+    """Return the highlighter that should be used to highlight the given game."""
+    if game_vod.match.team_1.game == Game.COUNTER_STRIKE:
+        return CounterStrikeHighlighter()
+    elif game_vod.match.team_1.game == Game.VALORANT:
+        return ValorantHighlighter()
+    else:
+        return LeagueOfLegendsHighlighter()
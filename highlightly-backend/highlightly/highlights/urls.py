@@ -0,0 +1,7 @@
+from django.urls import path
+
+from highlights import views
+
+urlpatterns = [
+    path('highlights/rescore/', views.RescoreHighlightsView.as_view(), name="rescore_highlights"),
+]
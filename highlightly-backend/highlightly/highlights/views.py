@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from highlights import serializers
+from highlights.rescoring import rescore_game_vods
+from scrapers.models import GameVod
+
+
+class RescoreHighlightsView(APIView):
+    serializer_class = serializers.RescoreSerializer
+
+    def post(self, request: Request) -> Response:
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if "game_vod" in serializer.validated_data:
+            game_vods = GameVod.objects.filter(id=serializer.validated_data["game_vod"].id)
+        else:
+            game_vods = GameVod.objects.filter(match__tournament=serializer.validated_data["tournament"])
+
+        return Response(rescore_game_vods(game_vods), status=status.HTTP_200_OK)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from scrapers.models import Tournament, Team, Match, GameVod, GOTVDemo, Player, Organization
+from scrapers.models import Tournament, Team, Match, GameVod, GOTVDemo, Player, Organization, PlayerGameStatistics
 
 admin.site.register(Tournament)
 admin.site.register(Organization)
@@ -9,3 +9,4 @@ admin.site.register(Player)
 admin.site.register(Match)
 admin.site.register(GameVod)
 admin.site.register(GOTVDemo)
+admin.site.register(PlayerGameStatistics)
@@ -0,0 +1,35 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from scrapers.models import GameVod, PlayerGameStatistics
+from scrapers.statistics import save_player_game_statistics
+from scrapers.tasks import get_scraper
+
+
+class Command(BaseCommand):
+    help = "Import the statistics CSV files of games scraped before the statistics were saved as player statistics."
+
+    def handle(self, *args, **options) -> None:
+        imported_game_vods = PlayerGameStatistics.objects.values("game_vod")
+        game_vods = GameVod.objects.exclude(id__in=imported_game_vods).exclude(team_1_statistics_filename__isnull=True)
+
+        imported_count = 0
+        for game_vod in game_vods.select_related("match"):
+            scraper = get_scraper(game_vod.match.team_1.game)
+            statistics_folder_path = game_vod.match.create_unique_folder_path("statistics")
+
+            try:
+                for team, filename in [(game_vod.match.team_1, game_vod.team_1_statistics_filename),
+                                       (game_vod.match.team_2, game_vod.team_2_statistics_filename)]:
+                    # The first row of each file is the header row.
+                    with open(f"{statistics_folder_path}/{filename}") as f:
+                        rows = list(csv.reader(f))[1:]
+
+                    save_player_game_statistics(game_vod, team, [scraper.convert_statistics_row(row) for row in rows])
+
+                imported_count += 1
+            except (OSError, IndexError) as e:
+                self.stderr.write(f"Could not import the statistics of {game_vod}: {e}")
+
+        self.stdout.write(f"Imported the statistics of {imported_count} games.")
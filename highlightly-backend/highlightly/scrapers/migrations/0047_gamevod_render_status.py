@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0046_organization_alternate_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamevod',
+            name='render_status',
+            field=models.CharField(choices=[('NOT_RENDERED', 'Not rendered'), ('PREVIEW', 'Preview'), ('RENDERING', 'Rendering'), ('RENDERED', 'Rendered')], default='NOT_RENDERED', max_length=16),
+        ),
+    ]
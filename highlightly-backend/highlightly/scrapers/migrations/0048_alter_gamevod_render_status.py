@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0047_gamevod_render_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamevod',
+            name='render_status',
+            field=models.CharField(choices=[('NOT_RENDERED', 'Not rendered'), ('PREVIEW', 'Preview'), ('RENDERING', 'Rendering'), ('ASSEMBLING', 'Assembling'), ('RENDERED', 'Rendered')], default='NOT_RENDERED', max_length=16),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 18:10
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0048_alter_gamevod_render_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerGameStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('name', models.CharField(max_length=128)),
+                ('in_game_name', models.CharField(max_length=64)),
+                ('kills', models.IntegerField(blank=True, null=True)),
+                ('deaths', models.IntegerField(blank=True, null=True)),
+                ('assists', models.IntegerField(blank=True, null=True)),
+                ('plus_minus', models.IntegerField(blank=True, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('average_damage_per_round', models.FloatField(blank=True, null=True)),
+                ('average_combat_score', models.IntegerField(blank=True, null=True)),
+                ('kast_percentage', models.FloatField(blank=True, null=True)),
+                ('headshot_percentage', models.FloatField(blank=True, null=True)),
+                ('creep_score', models.IntegerField(blank=True, null=True)),
+                ('creep_score_per_minute', models.FloatField(blank=True, null=True)),
+                ('kda_ratio', models.FloatField(blank=True, null=True)),
+                ('game_vod', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scrapers.gamevod')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scrapers.team')),
+            ],
+            options={
+                'unique_together': {('game_vod', 'team', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0049_playergamestatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamevod',
+            name='preview_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
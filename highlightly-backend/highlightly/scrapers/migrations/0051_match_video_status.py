@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0050_gamevod_preview_datetime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='video_status',
+            field=models.CharField(choices=[('READY', 'Ready to combine'), ('COMBINING', 'Combining'), ('COMBINED', 'Combined')], default='READY', max_length=16),
+        ),
+    ]
@@ -102,6 +102,11 @@ class Match(models.Model):
         BEST_OF_3 = "BEST_OF_3", "Bo3"
         BEST_OF_5 = "BEST_OF_5", "Bo5"
 
+    class VideoStatus(models.TextChoices):
+        READY = "READY", "Ready to combine"
+        COMBINING = "COMBINING", "Combining"
+        COMBINED = "COMBINED", "Combined"
+
     team_1 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="team_1_matches")
     team_2 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="team_2_matches")
 
@@ -117,6 +122,7 @@ class Match(models.Model):
 
     create_video = models.BooleanField()
     finished = models.BooleanField(default=False)
+    video_status = models.CharField(max_length=16, choices=VideoStatus.choices, default=VideoStatus.READY)
 
     stream_url = models.CharField(max_length=64, blank=True, null=True)
 
@@ -143,6 +149,13 @@ class GameVod(models.Model):
         YOUTUBE = "YOUTUBE", "YouTube"
         TWITCH = "TWITCH", "Twitch"
 
+    class RenderStatus(models.TextChoices):
+        NOT_RENDERED = "NOT_RENDERED", "Not rendered"
+        PREVIEW = "PREVIEW", "Preview"
+        RENDERING = "RENDERING", "Rendering"
+        ASSEMBLING = "ASSEMBLING", "Assembling"
+        RENDERED = "RENDERED", "Rendered"
+
     match = models.ForeignKey(Match, on_delete=models.CASCADE)
 
     game_count = models.IntegerField(validators=[MinValueValidator(1)])
@@ -164,6 +177,8 @@ class GameVod(models.Model):
     start_datetime = models.DateTimeField(blank=True, null=True)
     finished = models.BooleanField(default=False)
     highlighted = models.BooleanField(default=False)
+    render_status = models.CharField(max_length=16, choices=RenderStatus.choices, default=RenderStatus.NOT_RENDERED)
+    preview_datetime = models.DateTimeField(blank=True, null=True)
 
     # Used to control the process to download the livestream of the VOD.
     process_id = models.IntegerField(blank=True, null=True)
@@ -172,6 +187,41 @@ class GameVod(models.Model):
         return f"Map {self.game_count} VOD of {self.match}"
 
 
+class PlayerGameStatistics(models.Model):
+    """
+    The statistics of a player in a single game, parsed into typed columns once when the statistics are scraped. The
+    statistics that are not available for the game are null.
+    """
+    class Meta:
+        unique_together = ["game_vod", "team", "number"]
+
+    game_vod = models.ForeignKey(GameVod, on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+
+    # The position of the player in the statistics table of the team.
+    number = models.IntegerField(validators=[MinValueValidator(1)])
+    name = models.CharField(max_length=128)
+    in_game_name = models.CharField(max_length=64)
+
+    kills = models.IntegerField(blank=True, null=True)
+    deaths = models.IntegerField(blank=True, null=True)
+    assists = models.IntegerField(blank=True, null=True)
+    plus_minus = models.IntegerField(blank=True, null=True)
+
+    rating = models.FloatField(blank=True, null=True)
+    average_damage_per_round = models.FloatField(blank=True, null=True)
+    average_combat_score = models.IntegerField(blank=True, null=True)
+    kast_percentage = models.FloatField(blank=True, null=True)
+    headshot_percentage = models.FloatField(blank=True, null=True)
+
+    creep_score = models.IntegerField(blank=True, null=True)
+    creep_score_per_minute = models.FloatField(blank=True, null=True)
+    kda_ratio = models.FloatField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"Statistics of {self.in_game_name} in {self.game_vod}"
+
+
 class GOTVDemo(models.Model):
     game_vod = models.OneToOneField(GameVod, on_delete=models.CASCADE)
     filename = models.CharField(max_length=256)
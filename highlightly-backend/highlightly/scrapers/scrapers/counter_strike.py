@@ -1,4 +1,3 @@
-import csv
 import logging
 import os
 import re
@@ -7,19 +6,21 @@ import urllib.parse
 from datetime import datetime, timedelta
 
 import pytz
+from django.conf import settings
 from django.utils import timezone
 from math import ceil
 from pathlib import Path
 
 import patoolib
-import requests
 from bs4 import BeautifulSoup, Tag
 from cairosvg import svg2png
 from demoparser import DemoParser
 
-from scrapers.models import Match, Team, Game, GameVod, GOTVDemo, Player, Organization
+from scrapers.models import Match, Team, Game, GameVod, GOTVDemo, Player
 from scrapers.scrapers.scraper import Scraper
+from scrapers.statistics import parse_int, parse_float
 from scrapers.types import CounterStrikeMatchData, TeamData
+from util import http_client
 from util.file_util import download_file_from_url
 
 
@@ -59,7 +60,7 @@ class CounterStrikeScraper(Scraper):
         return upcoming_matches
 
     @staticmethod
-    def extract_team_data(match_team_data: dict, organization: Organization) -> TeamData:
+    def extract_team_data(match_team_data: dict, download_logo: bool) -> TeamData:
         """Parse through the match team data to extract the team data that can be used to create a team object."""
         team_name = match_team_data["name"]
         team_url = f"https://www.hltv.org/team/{match_team_data['id']}/{team_name.replace(' ', '-').lower()}"
@@ -67,7 +68,7 @@ class CounterStrikeScraper(Scraper):
         logging.info(f"Extracting team data for '{team_name}' from url '{team_url}'.")
 
         # Extract the nationality and world ranking of the team.
-        html = requests.get(url=team_url).text
+        html = http_client.get(team_url).text
         soup = BeautifulSoup(html, "html.parser")
 
         nationality_div = soup.find("div", class_="team-country text-ellipsis")
@@ -78,16 +79,14 @@ class CounterStrikeScraper(Scraper):
         ranking = int(ranking) if ranking is not None and ranking.isdigit() else None
 
         # Retrieve the team logo if necessary.
-        if organization.logo_filename is None:
-            organization.logo_filename = get_team_logo_filename(soup, team_name)
-            organization.save()
+        logo_filename = get_team_logo_filename(soup, team_name) if download_logo else None
 
-        return {"url": team_url, "nationality": nationality, "ranking": ranking}
+        return {"url": team_url, "nationality": nationality, "ranking": ranking, "logo_filename": logo_filename}
 
     # TODO: Use https://www.hltv.org/results?content=demo&content=vod to check instead of checking the match page.
     @staticmethod
     def is_match_finished(scheduled_match: Match) -> BeautifulSoup | None:
-        html = requests.get(url="https://www.hltv.org/results").text
+        html = http_client.get("https://www.hltv.org/results").text
         soup = BeautifulSoup(html, "html.parser")
 
         # Check if the match url can be found on the results page.
@@ -112,7 +111,6 @@ class CounterStrikeScraper(Scraper):
 
     def download_match_files(self, match: Match, html: BeautifulSoup) -> None:
         demos_folder_path = match.create_unique_folder_path("demos")
-        vods_folder_path = match.create_unique_folder_path("vods")
 
         # Retrieve the tournament logo and tournament context of the match.
         extract_match_page_tournament_data(match, html)
@@ -127,24 +125,13 @@ class CounterStrikeScraper(Scraper):
         Path(f"{demos_folder_path}/demos.rar").unlink(missing_ok=True)
         logging.info(f"Deleted {demos_folder_path}/demos.rar after unzipping.")
 
-        # For each demo, download the vod for the corresponding game from Twitch.
+        # For each demo, create an object for the corresponding game. The VOD is downloaded by the game pipeline.
         vod_urls = html.findAll("img", class_="stream-flag flag")
         results = html.findAll("div", class_="mapholder")
 
         for game_count, demo_file in enumerate(os.listdir(demos_folder_path)):
             vod_url = vod_urls[game_count].parent.parent["data-stream-embed"]
-            logging.info(f"Downloading VOD for game {game_count + 1} of {match} from {vod_url}.")
-            (video_id, start_time, end_time) = parse_twitch_vod_url(vod_url, f"{demos_folder_path}/{demo_file}")
-
-            # Add 15 seconds to the start and end of the video to account for small timing errors.
-            vod_start = start_time - timedelta(seconds=15)
-            vod_end = end_time + timedelta(seconds=15)
-
             vod_filename = f"game_{game_count + 1}.mkv"
-            vod_filepath = f"{vods_folder_path}/{vod_filename}"
-
-            download_cmd = f"twitch-dl download -q source -s {vod_start} -e {vod_end} -o {vod_filepath} {video_id}"
-            subprocess.run(download_cmd, shell=True)
 
             map = results[game_count].find("div", class_="mapname").text
             round_count = [int(score.text) for score in results[game_count].findAll("div", class_="results-team-score")]
@@ -167,6 +154,22 @@ class CounterStrikeScraper(Scraper):
             game_vod.finished = True
             game_vod.save(update_fields=["finished"])
 
+    @staticmethod
+    def download_game_vod(game: GameVod) -> None:
+        """Download the part of the Twitch VOD that covers the game, using the GOTV demo to find the game length."""
+        logging.info(f"Downloading VOD for {game} from {game.url}.")
+
+        demo_filepath = f"{game.match.create_unique_folder_path('demos')}/{game.gotvdemo.filename}"
+        (video_id, start_time, end_time) = parse_twitch_vod_url(game.url, demo_filepath)
+
+        # Add 15 seconds to the start and end of the video to account for small timing errors.
+        vod_start = start_time - timedelta(seconds=15)
+        vod_end = end_time + timedelta(seconds=15)
+
+        vod_filepath = f"{game.match.create_unique_folder_path('vods')}/{game.filename}"
+        download_cmd = f"twitch-dl download -q source -s {vod_start} -e {vod_end} -o {vod_filepath} {video_id}"
+        subprocess.run(download_cmd, shell=True)
+
     @staticmethod
     def get_statistics_table_groups(html: BeautifulSoup) -> list[BeautifulSoup]:
         """Return a statistics table group for each game in the match and for the total statistics."""
@@ -185,24 +188,25 @@ class CounterStrikeScraper(Scraper):
         return f"https://www.hltv.org{mvp_row.find('a')['href']}"
 
     @staticmethod
-    def save_html_table_to_csv(html_table: Tag, filepath: str, _team_name: str) -> None:
-        """Convert the given HTML table to CSV and save the CSV data to a file."""
-        headers = [th.text.strip() for th in html_table.select("tr.header-row td")]
+    def get_statistics_rows(html_table: Tag) -> list[list[str]]:
+        """Return the text in the cells of each player row in the given HTML table."""
+        return [[td.text.strip().split("\n")[0] for td in row.findAll("td")] for row in html_table.select("tr + tr")]
 
-        with open(filepath, "w") as f:
-            writer = csv.writer(f)
-            writer.writerow(headers)
+    @staticmethod
+    def convert_statistics_row(row: list[str]) -> dict:
+        """Return the typed statistics of the player in the given row of a statistics table."""
+        kills, _, deaths = row[1].partition("-")
 
-            rows = [[td.text.strip().split("\n")[0] for td in row.findAll("td")] for row in
-                    html_table.select("tr + tr")]
-            writer.writerows(rows)
+        return {"name": row[0], "kills": parse_int(kills), "deaths": parse_int(deaths), "plus_minus": parse_int(row[2]),
+                "average_damage_per_round": parse_float(row[3]), "kast_percentage": parse_float(row[4]),
+                "rating": parse_float(row[5])}
 
     @staticmethod
     def extract_player_data(url: str) -> Player:
         """Retrieve information about the player from the given URL and create a player object."""
         logging.info(f"Player in {url} does not already exist. Creating new player.")
 
-        html = requests.get(url=url).text
+        html = http_client.get(url).text
         soup = BeautifulSoup(html, "html.parser")
 
         nationality = soup.find("img", class_="flag", itemprop="nationality")["title"]
@@ -227,11 +231,12 @@ def get_protected_page_html(protected_url: str, test=None) -> BeautifulSoup:
         with open(f"../data/test/{test}", "r") as f:
             html = f.read()
     else:
-        base_url = " https://api.scrapingant.com"
+        base_url = "https://api.scrapingant.com"
         safe_protected_url = urllib.parse.quote_plus(protected_url)
         url = f"{base_url}/v2/general?url={safe_protected_url}&x-api-key={os.environ['SCRAPING_API_KEY']}"
 
-        html = requests.get(url=url).text
+        # The scraping API loads the page in a browser before responding, which can take longer than the read timeout.
+        html = http_client.get(url, timeout=(settings.HTTP_CONNECT_TIMEOUT, 120)).text
 
     return BeautifulSoup(html, "html.parser")
 
@@ -283,7 +288,7 @@ def extract_match_page_tournament_data(match: Match, html: BeautifulSoup) -> Non
         tournament_logo_img = html.find("img", class_="matchSidebarEventLogo", src=True)
 
         if ".svg?" in tournament_logo_img["src"]:
-            svg = requests.get(tournament_logo_img["src"]).text
+            svg = http_client.get(tournament_logo_img["src"]).text
             svg2png(bytestring=svg, write_to=f"media/tournaments/{logo_filename}")
         else:
             tournament_logo_url = tournament_logo_img["srcset"].removesuffix(" 2x")
@@ -309,7 +314,7 @@ def get_team_logo_filename(team_soup: BeautifulSoup, team_name: str) -> str | No
     if ".svg" in logo_img["src"]:
         try:
             src = f"https://www.hltv.org{logo_img['src']}" if "placeholder.svg" in logo_img["src"] else logo_img["src"]
-            svg = requests.get(src).text
+            svg = http_client.get(src).text
             svg2png(bytestring=svg, write_to=f"media/teams/{logo_filename}")
         except Exception as e:
             print(f"Error when trying to convert SVG to PNG: {e}")
@@ -1,21 +1,21 @@
-import csv
 import json
 import logging
 import os
 import subprocess
-import urllib.request
 from datetime import datetime, timedelta
 from json import JSONDecodeError
 from pathlib import Path
 
 import pytz
-import requests
 from django.utils import timezone
 from django_celery_beat.models import PeriodicTask
 
-from scrapers.models import Match, Game, Organization, GameVod, Tournament, Player
-from scrapers.scrapers.scraper import Scraper, finish_vod_stream_download
+from scrapers.models import Match, Game, GameVod, Tournament, Player
+from scrapers.scrapers.scraper import Scraper, stop_vod_stream_download
+from scrapers.statistics import save_player_game_statistics, parse_int, parse_float
 from scrapers.types import TeamData
+from util import http_client
+from util.file_util import download_file_from_url
 
 
 class LeagueOfLegendsScraper(Scraper):
@@ -33,7 +33,7 @@ class LeagueOfLegendsScraper(Scraper):
             data["variables"]["year"] = timezone.localtime(timezone.now()).year
             data["variables"]["month"] = timezone.localtime(timezone.now()).month
 
-            response = requests.post("https://esports.op.gg/matches/graphql", json=data)
+            response = http_client.post("https://esports.op.gg/matches/graphql", json=data)
             content = json.loads(response.content)
 
             # For each match in the response, extract data related to the match.
@@ -71,19 +71,25 @@ class LeagueOfLegendsScraper(Scraper):
         return upcoming_matches
 
     @staticmethod
-    def extract_team_data(match_team_data: dict, organization: Organization) -> TeamData:
+    def extract_team_data(match_team_data: dict, download_logo: bool) -> TeamData:
         """Parse through the match team data to extract the team data that can be used to create a team object."""
         team_url = f"https://esports.op.gg/teams/{match_team_data['id']}"
 
-        if organization.logo_filename is None:
+        logo_filename = None
+        if download_logo:
             logo_filename = f"{match_team_data['name'].replace(' ', '_')}.png"
             Path("media/teams").mkdir(parents=True, exist_ok=True)
-            urllib.request.urlretrieve(match_team_data["imageUrlDarkMode"], f"media/teams/{logo_filename}")
+            download_file_from_url(match_team_data["imageUrlDarkMode"], f"media/teams/{logo_filename}")
 
-            organization.logo_filename = logo_filename
-            organization.save()
+        return {"url": team_url, "nationality": match_team_data["nationality"], "ranking": None,
+                "logo_filename": logo_filename}
 
-        return {"url": team_url, "nationality": match_team_data["nationality"], "ranking": None}
+    @staticmethod
+    def convert_statistics_row(row: list) -> dict:
+        """Return the typed statistics of the player in the given row of a statistics table."""
+        return {"name": str(row[0]), "kills": parse_int(str(row[1])), "deaths": parse_int(str(row[2])),
+                "assists": parse_int(str(row[3])), "creep_score": parse_int(str(row[4])),
+                "creep_score_per_minute": parse_float(str(row[5])), "kda_ratio": parse_float(str(row[6]))}
 
     @staticmethod
     def check_match_status(match: Match) -> None:
@@ -143,7 +149,7 @@ def save_tournament_logo(match_data: dict) -> str:
     # Only download the tournament logo if it does not already exist.
     if not Tournament.objects.filter(name=match_data["tournament_name"], logo_filename=logo_filename).exists():
         image_url = match_data["tournament"]["serie"]["league"]["imageUrl"]
-        urllib.request.urlretrieve(image_url, f"media/tournaments/{logo_filename}")
+        download_file_from_url(image_url, f"media/tournaments/{logo_filename}")
 
     return logo_filename
 
@@ -156,7 +162,7 @@ def get_match_data(match: Match) -> dict:
 
     url = f"https://neptune.1337pro.com/series/grouped/all-and-live?start_after={start_timestamp}&start_before={end_timestamp}"
     headers = {"Accept": "application/vnd.neptune+json; version=1"}
-    html = requests.get(url=url, headers=headers).text
+    html = http_client.get(url, headers=headers).text
 
     matches: dict = json.loads(html)
     league_of_legends_matches = [m for m in matches["items"] if
@@ -221,7 +227,7 @@ def handle_game_started(match: Match, finished_game_count: int) -> None:
 
 def handle_game_finished(finished_game: GameVod, game_data: dict, match: Match, match_finished: bool) -> None:
     """Stop the download of the livestream, add post game data to game vod object, and extract game statistics."""
-    finish_vod_stream_download(finished_game)
+    stop_vod_stream_download(finished_game)
 
     try:
         add_post_game_data(game_data, finished_game)
@@ -250,7 +256,7 @@ def get_post_game_data(match_data: dict, game_count: int) -> dict:
 
         url = f"https://neptune.1337pro.com/matches/{game_id}/summary?seriesId={match_data['id']}"
         headers = {"Accept": "application/vnd.neptune+json; version=1"}
-        html = requests.get(url=url, headers=headers).text
+        html = http_client.get(url, headers=headers).text
 
         return json.loads(html) if len(html) > 0 else {}
     except IndexError:
@@ -276,22 +282,10 @@ def extract_game_statistics(game_data: dict, game_vod: GameVod) -> None:
     """Extract and save statistics for the game. Also extract the MVP and the players photo."""
     team_rows, mvp = get_game_team_statistics(game_data, game_vod)
 
-    statistics_folder_path = game_vod.match.create_unique_folder_path("statistics")
-    headers = ["name", "kills", "deaths", "assists", "cs", "cs_minute", "ratio"]
-
-    # For each team, save a CSV file with the player data for the game.
+    # Save the typed player data of each team for the game.
     for team, team_data in [(game_vod.match.team_1, team_rows[0]), (game_vod.match.team_2, team_rows[1])]:
-        team_name = team.organization.name.lower().replace(' ', '_')
-        filename = f"map_{game_vod.game_count}_{team_name}.csv"
-
-        with open(f"{statistics_folder_path}/{filename}", "w") as f:
-            writer = csv.writer(f)
-            writer.writerow(headers)
-            writer.writerows(team_data)
-
-        field_to_update = "team_1_statistics_filename" if game_vod.match.team_1 == team else "team_2_statistics_filename"
-        setattr(game_vod, field_to_update, filename)
-        game_vod.save()
+        rows = [LeagueOfLegendsScraper.convert_statistics_row(row) for row in team_data]
+        save_player_game_statistics(game_vod, team, rows)
 
     # Extract the MVP and save the player profile picture if possible.
     game_mvp = Player.objects.filter(tag=mvp["tag"], name=mvp["name"]).first()
@@ -300,7 +294,7 @@ def extract_game_statistics(game_data: dict, game_vod: GameVod) -> None:
         logging.info(f"Player with tag '{mvp['tag']}' does not already exist. Creating new player.")
 
         if mvp["profile_picture_url"] is not None:
-            r = requests.get(mvp["profile_picture_url"])
+            r = http_client.get(mvp["profile_picture_url"])
             profile_picture_filename = f"{mvp['team'].organization.name.replace(' ', '-').lower()}-{mvp['tag'].replace(' ', '-').lower()}.png"
             with open(f"media/players/{profile_picture_filename}", 'wb') as outfile:
                 outfile.write(r.content)
@@ -323,7 +317,7 @@ def get_game_team_statistics(game_data: dict, game_vod: GameVod) -> tuple[list[l
 
     url = f"https://neptune.1337pro.com/rosters?ids={team_1['roster']['id']},{team_2['roster']['id']}"
     headers = {"Accept": "application/vnd.neptune+json; version=1"}
-    html = requests.get(url=url, headers=headers).text
+    html = http_client.get(url, headers=headers).text
     rosters = json.loads(html)
 
     team_1_roster = next(roster for roster in rosters if roster["id"] == team_1['roster']['id'])
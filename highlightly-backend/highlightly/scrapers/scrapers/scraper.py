@@ -2,15 +2,18 @@ import logging
 import os
 import signal
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime, timedelta
 from time import sleep
 
-import requests
 from bs4 import BeautifulSoup, Tag
+from django.conf import settings
 from serpapi import GoogleSearch
 
 from scrapers.models import Match, Tournament, Team, Game, Organization, Player, GameVod
+from scrapers.statistics import save_player_game_statistics
 from scrapers.types import TournamentData, TeamData
+from util import http_client
 
 
 class Scraper:
@@ -32,23 +35,20 @@ class Scraper:
         return len(equal_matches) > 0
 
     @staticmethod
-    def create_tournament(match: dict) -> Tournament:
+    def create_tournament(match: dict, tournament_data: tuple[str, TournamentData] | None = None) -> Tournament:
         """
         Based on the information in the given match, create a Tournament object and return it. If an object for the
-        tournament already exists, the existing object is returned.
+        tournament already exists, the existing object is returned. The URL and data of the tournament are fetched if
+        they are not given.
         """
         tournament = Tournament.objects.filter(game=match["game"], name=match["tournament_name"]).first()
         if tournament is None:
             logging.info(f"{match['tournament_name']} does not already exist. Creating new tournament.")
 
-            tournament_url = get_liquipedia_tournament_url(match["tournament_name"], match["game"])
-            html = requests.get(url=tournament_url).text
-            soup = BeautifulSoup(html, "html.parser")
-
-            # Extract the tournament data from the HTML.
-            data = extract_tournament_data(soup)
-            logging.info(f"Extracted data from {tournament_url} to create tournament for {match['tournament_name']}.")
+            if tournament_data is None:
+                tournament_data = fetch_tournament_data(match["tournament_name"], match["game"])
 
+            tournament_url, data = tournament_data
             tournament = Tournament.objects.create(game=match["game"], name=match["tournament_name"],
                                                    url=tournament_url, start_date=data["start_date"],
                                                    end_date=data["end_date"], prize_pool_us_dollars=data["prize_pool"],
@@ -60,29 +60,37 @@ class Scraper:
         return tournament
 
     @staticmethod
-    def extract_team_data(match_team_data: dict, organization: Organization) -> TeamData:
-        """Parse through the match team data to extract the team data that can be used to create a team object."""
+    def extract_team_data(match_team_data: dict, download_logo: bool) -> TeamData:
+        """
+        Parse through the match team data to extract the team data that can be used to create a team object. If
+        download_logo, the logo of the team is also downloaded. Only the network and the filesystem are used, so team
+        data can be extracted concurrently.
+        """
         raise NotImplementedError
 
-    def create_team(self, match_team_data: dict, game: Game) -> Team:
+    def create_team(self, match_team_data: dict, game: Game, team_data: TeamData | None = None) -> Team:
         """
         Based on the information in the given match, create a Team object and return it. If an object for the team
-        already exists, the existing object is returned.
+        already exists, the existing object is returned. The team data is extracted if it is not given.
         """
         team_name: str = match_team_data["name"]
-        teams = Team.objects.filter(game=game)
-        team = next((t for t in teams if team_name in t.organization.get_names()), None)
+        team = find_team(team_name, game)
 
         if team is None:
             logging.info(f"{team_name} does not already exist. Creating new team.")
+            organization = find_organization(team_name)
 
-            orgs = Organization.objects.all()
-            organization = next((o for o in orgs if team_name in o.get_names()), None)
+            if team_data is None:
+                team_data = self.extract_team_data(match_team_data, organization is None or
+                                                   organization.logo_filename is None)
 
             if organization is None:
                 organization = Organization.objects.create(name=team_name)
 
-            team_data = self.extract_team_data(match_team_data, organization)
+            if organization.logo_filename is None and team_data["logo_filename"] is not None:
+                organization.logo_filename = team_data["logo_filename"]
+                organization.save()
+
             logging.info(f"Extracted data from {team_data['url']} to create team for {team_name}.")
 
             team = Team.objects.create(organization=organization, game=game, nationality=team_data["nationality"],
@@ -119,13 +127,44 @@ class Scraper:
         new_matches = [match for match in matches if not self.scheduled_match_already_exists(match)]
         logging.info(f"Found {len(matches)} upcoming matches and {len(new_matches)} new upcoming matches.")
 
-        # For each remaining match in the list, create a Match object.
-        for match in new_matches:
-            tournament = self.create_tournament(match)
-            team_1 = self.create_team(match["team_1"], match["game"])
-            team_2 = self.create_team(match["team_2"], match["game"])
-
-            self.create_scheduled_match(match, tournament, team_1, team_2)
+        # Fetch the data of the new tournaments and teams concurrently. Each tournament and team is only fetched once,
+        # even if it is in multiple new matches, and the number of concurrent requests to each host is limited.
+        tournament_futures: dict[tuple[str, str], Future] = {}
+        team_futures: dict[tuple[str, str], Future] = {}
+
+        with ThreadPoolExecutor(max_workers=settings.SCRAPER_ENRICHMENT_WORKERS) as executor:
+            for match in new_matches:
+                tournament_key = (match["game"], match["tournament_name"])
+                if tournament_key not in tournament_futures and \
+                        not Tournament.objects.filter(game=match["game"], name=match["tournament_name"]).exists():
+                    tournament_futures[tournament_key] = executor.submit(fetch_tournament_data,
+                                                                         match["tournament_name"], match["game"])
+
+                for match_team_data in [match["team_1"], match["team_2"]]:
+                    team_key = (match["game"], match_team_data["name"])
+                    if team_key not in team_futures and find_team(match_team_data["name"], match["game"]) is None:
+                        organization = find_organization(match_team_data["name"])
+                        download_logo = organization is None or organization.logo_filename is None
+                        team_futures[team_key] = executor.submit(self.extract_team_data, match_team_data,
+                                                                 download_logo)
+
+            # The database writes are applied in the order of the matches, as soon as the data of each match is fetched.
+            for match in new_matches:
+                try:
+                    tournament_future = tournament_futures.get((match["game"], match["tournament_name"]))
+                    tournament_data = tournament_future.result() if tournament_future else None
+                    tournament = self.create_tournament(match, tournament_data)
+
+                    teams = []
+                    for match_team_data in [match["team_1"], match["team_2"]]:
+                        team_future = team_futures.get((match["game"], match_team_data["name"]))
+                        teams.append(self.create_team(match_team_data, match["game"],
+                                                      team_future.result() if team_future else None))
+
+                    self.create_scheduled_match(match, tournament, teams[0], teams[1])
+                except Exception:
+                    logging.exception(f"Could not create the scheduled match at {match['url']}. It is tried again in "
+                                      f"the next scrape.")
 
     @staticmethod
     def is_match_finished(scheduled_match: Match) -> BeautifulSoup | None:
@@ -156,8 +195,13 @@ class Scraper:
         raise NotImplementedError
 
     @staticmethod
-    def save_html_table_to_csv(html_table: Tag, filepath: str, team_name: str) -> None:
-        """Convert the given HTML table to CSV and save the CSV data to a file."""
+    def get_statistics_rows(html_table: Tag) -> list[list[str]]:
+        """Return the text in the cells of each player row in the given HTML table."""
+        raise NotImplementedError
+
+    @staticmethod
+    def convert_statistics_row(row: list[str]) -> dict:
+        """Return the typed statistics of the player in the given row of a statistics table."""
         raise NotImplementedError
 
     @staticmethod
@@ -170,21 +214,14 @@ class Scraper:
         Extract and save per-game statistics for the game. Also determine the MVP based on the statistics
         and extract the players photo and advanced statistics if possible.
         """
-        statistics_folder_path = game.match.create_unique_folder_path("statistics")
         table_group = self.get_statistics_table_groups(html)[game.game_count]
 
-        # Convert the HTML tables into CSV and save the filename on the game object.
+        # Parse the HTML tables into typed statistics for each player, so they are not parsed again when used.
         html_tables = self.get_statistics_tables(table_group)
 
         for (html_table, team) in zip(html_tables, [game.match.team_1, game.match.team_2]):
-            team_name = team.organization.name.lower().replace(' ', '_')
-            filename = f"map_{game.game_count}_{team_name}.csv"
-
-            self.save_html_table_to_csv(html_table, f"{statistics_folder_path}/{filename}", str(team.organization))
-
-            field_to_update = "team_1_statistics_filename" if game.match.team_1 == team else "team_2_statistics_filename"
-            setattr(game, field_to_update, filename)
-            game.save()
+            rows = [self.convert_statistics_row(row) for row in self.get_statistics_rows(html_table)]
+            save_player_game_statistics(game, team, rows)
 
         # Find the MVP of the game and, if necessary, extract information about the player.
         player_url = self.get_mvp_url(table_group)
@@ -203,6 +240,14 @@ class Scraper:
         """Check the current match status and start the highlighting process if a game is finished."""
         raise NotImplementedError
 
+    @staticmethod
+    def download_game_vod(game: GameVod) -> None:
+        """
+        Make the VOD of the finished game ready for further processing. By default, the VOD is recorded from the
+        livestream while the game is played, and the recording has been stopped when the game was found finished.
+        """
+        finish_vod_stream_download(game)
+
     def scrape_finished_match(self, match: Match) -> None:
         """
         Check if the scheduled match is finished. If so, scrape all data required from the match page to create
@@ -216,6 +261,31 @@ class Scraper:
             self.download_match_files(match, html)
 
 
+def fetch_tournament_data(tournament_name: str, game: Game) -> tuple[str, TournamentData]:
+    """Find the liquipedia wiki page of the tournament and return the URL and the tournament data extracted from it."""
+    tournament_url = get_liquipedia_tournament_url(tournament_name, game)
+    html = http_client.get(tournament_url).text
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Extract the tournament data from the HTML.
+    data = extract_tournament_data(soup)
+    logging.info(f"Extracted data from {tournament_url} to create tournament for {tournament_name}.")
+
+    return tournament_url, data
+
+
+def find_team(team_name: str, game: Game) -> Team | None:
+    """Return the team in the game with the given name or alternate name, if it exists."""
+    teams = Team.objects.filter(game=game).select_related("organization")
+    return next((team for team in teams if team_name in team.organization.get_names()), None)
+
+
+def find_organization(team_name: str) -> Organization | None:
+    """Return the organization with the given name or alternate name, if it exists."""
+    return next((organization for organization in Organization.objects.all()
+                 if team_name in organization.get_names()), None)
+
+
 def get_liquipedia_tournament_url(tournament_name: str, game: Game) -> str | None:
     """
     Attempt to retrieve the url for the tournaments liquipedia wiki page. Since the liquipedia wiki search is faulty,
@@ -298,8 +368,15 @@ def convert_format_to_minimum_time(match_format: Match.Format) -> int:
         return (3 * 30) + 10
 
 
-def finish_vod_stream_download(game: GameVod):
-    """Stop the download of the stream related to the game and fix any potential issues with the file metadata."""
+def stop_vod_stream_download(game: GameVod) -> None:
+    """
+    Stop the download of the stream related to the game. This has to run in the worker that started the download,
+    since the process ID is only valid there, so it is done when checking the match status finds the game finished.
+    """
+    if game.process_id is None:
+        logging.info(f"The stream download for {game} is already stopped.")
+        return
+
     try:
         # Stop the download of the livestream related to the game.
         os.killpg(os.getpgid(game.process_id), signal.SIGTERM)
@@ -309,7 +386,12 @@ def finish_vod_stream_download(game: GameVod):
     # Sleep to ensure the VOD file is ready for further processing after the stream download is stopped.
     sleep(10)
 
-    # Fix any potential issues with the VOD file metadata.
+    game.process_id = None
+    game.save(update_fields=["process_id"])
+
+
+def finish_vod_stream_download(game: GameVod) -> None:
+    """Fix any potential issues with the file metadata of the VOD recorded from the stream related to the game."""
     vod_filepath = f"{game.match.create_unique_folder_path('vods')}/{game.filename}"
     temp_vod_filepath = vod_filepath.replace(".mkv", "_temp.mkv")
 
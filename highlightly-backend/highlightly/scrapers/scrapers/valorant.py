@@ -1,19 +1,19 @@
-import csv
 import logging
 import os
 import subprocess
-import urllib.request
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import requests
 from bs4 import BeautifulSoup, Tag
 from django.utils import timezone
 from django_celery_beat.models import PeriodicTask
 
-from scrapers.models import Match, Game, Organization, GameVod, Player, Team
-from scrapers.scrapers.scraper import Scraper, finish_vod_stream_download
+from scrapers.models import Match, Game, GameVod, Player, Team
+from scrapers.scrapers.scraper import Scraper, stop_vod_stream_download
+from scrapers.statistics import parse_int, parse_float
 from scrapers.types import TeamData
+from util import http_client
+from util.file_util import download_file_from_url
 
 
 class ValorantScraper(Scraper):
@@ -26,7 +26,7 @@ class ValorantScraper(Scraper):
     def list_upcoming_matches(self) -> list[dict]:
         """Scrape vlr.gg for upcoming Valorant matches."""
         upcoming_matches = []
-        html = requests.get(url="https://www.vlr.gg/matches").text
+        html = http_client.get("https://www.vlr.gg/matches").text
         soup = BeautifulSoup(html, "html.parser")
 
         # Find all match rows.
@@ -50,18 +50,18 @@ class ValorantScraper(Scraper):
         return upcoming_matches
 
     @staticmethod
-    def extract_team_data(match_team_data: dict, organization: Organization) -> TeamData:
+    def extract_team_data(match_team_data: dict, download_logo: bool) -> TeamData:
         """Parse through the match team data to extract the team data that can be used to create a team object."""
         team_name = match_team_data["name"]
 
         # Find the URL of the team page.
-        html = requests.get(url=match_team_data["match_url"]).text
+        html = http_client.get(match_team_data["match_url"]).text
         match_soup = BeautifulSoup(html, "html.parser")
         team_anchor = next(tag for tag in match_soup.findAll("a", class_="match-header-link") if team_name in tag.text)
         team_url = f"https://www.vlr.gg{team_anchor['href']}"
 
         # Find the nationality and ranking of the team from the team page.
-        html = requests.get(url=team_url).text
+        html = http_client.get(team_url).text
         team_soup = BeautifulSoup(html, "html.parser")
 
         nationality = team_soup.find("div", class_="team-header-country").text.strip()
@@ -71,21 +71,19 @@ class ValorantScraper(Scraper):
         team_logo_img = team_soup.find("div", class_="team-header-logo").find("img")
         team_logo_url = f"https:{team_logo_img['src']}"
 
-        if organization.logo_filename is None:
+        logo_filename = None
+        if download_logo:
             logo_filename = f"{team_name.replace(' ', '_')}.png"
             Path("media/teams").mkdir(parents=True, exist_ok=True)
-            urllib.request.urlretrieve(team_logo_url, f"media/teams/{logo_filename}")
+            download_file_from_url(team_logo_url, f"media/teams/{logo_filename}")
 
-            organization.logo_filename = logo_filename
-            organization.save()
-
-        return {"url": team_url, "nationality": nationality, "ranking": ranking}
+        return {"url": team_url, "nationality": nationality, "ranking": ranking, "logo_filename": logo_filename}
 
     def check_match_status(self, match: Match):
         """Check the current match status and start the highlighting process if a game is finished."""
         logging.info(f"Checking the status of {match}.")
 
-        html = requests.get(url=match.url).text
+        html = http_client.get(match.url).text
         soup = BeautifulSoup(html, "html.parser")
 
         # If it is the last game of the match, mark the match as finished and delete the related periodic task.
@@ -131,7 +129,7 @@ class ValorantScraper(Scraper):
             if not finished_game.finished:
                 logging.info(f"Game {finished_game_count} for {match} is finished. Starting highlighting process.")
 
-                finish_vod_stream_download(finished_game)
+                stop_vod_stream_download(finished_game)
                 self.add_post_game_data(finished_game, soup)
 
                 logging.info(f"Extracting game statistics for {finished_game}.")
@@ -180,32 +178,32 @@ class ValorantScraper(Scraper):
         return f"https://www.vlr.gg{mvp_row.find('a')['href']}"
 
     @staticmethod
-    def save_html_table_to_csv(html_table: Tag, filepath: str, team_name: str) -> None:
-        """Convert the given HTML table to CSV and save the CSV data to a file."""
-        headers = [th.text.strip() for th in html_table.select("thead th")]
-        headers[0] = team_name
-        del headers[1]
-
-        with open(filepath, "w") as f:
-            writer = csv.writer(f)
-            writer.writerow(headers)
+    def get_statistics_rows(html_table: Tag) -> list[list[str]]:
+        """Return the text in the cells of each player row in the given HTML table, without the agent column."""
+        rows = [[td.text.strip().split("\n")[0]
+                 if td.text.strip().split("\n")[0] != "/" else td.text.strip().split("\n")[2]
+                 for td in row.findAll("td")] for row in html_table.select("tbody tr")]
 
-            rows = [[td.text.strip().split("\n")[0]
-                     if td.text.strip().split("\n")[0] != "/" else td.text.strip().split("\n")[2]
-                     for td in row.findAll("td")] for row in html_table.select("tbody tr")]
+        for row in rows:
+            row[0] = row[0].strip()
+            del row[1]
 
-            for row in rows:
-                row[0] = row[0].strip()
-                del row[1]
+        return rows
 
-            writer.writerows(rows)
+    @staticmethod
+    def convert_statistics_row(row: list[str]) -> dict:
+        """Return the typed statistics of the player in the given row of a statistics table."""
+        return {"name": row[0], "rating": parse_float(row[1]), "average_combat_score": parse_int(row[2]),
+                "kills": parse_int(row[3]), "deaths": parse_int(row[4]), "assists": parse_int(row[5]),
+                "plus_minus": parse_int(row[6]), "kast_percentage": parse_float(row[7]),
+                "average_damage_per_round": parse_float(row[8]), "headshot_percentage": parse_float(row[9])}
 
     @staticmethod
     def extract_player_data(url: str) -> Player:
         """Retrieve information about the player from the given URL and create a player object."""
         logging.info(f"Player in {url} does not already exist. Creating new player.")
 
-        html = requests.get(url=url).text
+        html = http_client.get(url).text
         soup = BeautifulSoup(html, "html.parser")
 
         nationality = soup.find("i", class_="flag").parent.text.strip()
@@ -219,7 +217,7 @@ class ValorantScraper(Scraper):
         profile_picture_url = soup.find("div", class_="wf-avatar mod-player").find("img")["src"]
         profile_picture_filename = f"{team.organization.name.replace(' ', '-').lower()}-{tag.replace(' ', '-').lower()}.png"
         full_url = f"https://www.vlr.gg{profile_picture_url}" if "base/ph/sil.png" in profile_picture_url else f"https:{profile_picture_url}"
-        urllib.request.urlretrieve(full_url, f"media/players/{profile_picture_filename}")
+        download_file_from_url(full_url, f"media/players/{profile_picture_filename}")
 
         return Player.objects.create(nationality=nationality, tag=tag, name=name, url=url, team=team,
                                      profile_picture_filename=profile_picture_filename)
@@ -249,7 +247,7 @@ def extract_match_page_tournament_data(match: Match, html: BeautifulSoup) -> Non
     # Only download the tournament logo if it does not already exist.
     if match.tournament.logo_filename is None:
         tournament_logo_img = html.find("a", class_="match-header-event", href=True).find("img")
-        urllib.request.urlretrieve(f"https:{tournament_logo_img['src']}", f"media/tournaments/{logo_filename}")
+        download_file_from_url(f"https:{tournament_logo_img['src']}", f"media/tournaments/{logo_filename}")
 
         match.tournament.logo_filename = logo_filename
         match.tournament.save()
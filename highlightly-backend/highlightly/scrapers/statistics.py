@@ -0,0 +1,58 @@
+import logging
+import re
+
+from django.db import transaction
+from django.db.models import QuerySet, Count, Sum, Avg, Min
+
+from scrapers.models import Match, GameVod, Team, Game, PlayerGameStatistics
+
+
+def save_player_game_statistics(game_vod: GameVod, team: Team, rows: list[dict]) -> None:
+    """
+    Save the typed statistics of each player of the team in the game, replacing previously saved statistics. Each row
+    is a dict from the fields of the player game statistics to the values in the statistics table of the team.
+    """
+    statistics = [PlayerGameStatistics(game_vod=game_vod, team=team, number=number,
+                                       in_game_name=get_in_game_name(row["name"], team.game), **row)
+                  for number, row in enumerate(rows, start=1)]
+
+    with transaction.atomic():
+        PlayerGameStatistics.objects.filter(game_vod=game_vod, team=team).delete()
+        PlayerGameStatistics.objects.bulk_create(statistics)
+
+    logging.info(f"Saved statistics for {len(statistics)} players of {team} in {game_vod}.")
+
+
+def get_match_player_statistics(match: Match) -> QuerySet:
+    """
+    Return the statistics of each player summed or averaged over all games in the match with a single query. The
+    players are ordered by team and by their position in the statistics tables.
+    """
+    return PlayerGameStatistics.objects.filter(game_vod__match=match).values("team", "in_game_name").annotate(
+        game_count=Count("id"), total_kills=Sum("kills"), total_deaths=Sum("deaths"), total_assists=Sum("assists"),
+        total_plus_minus=Sum("plus_minus"), average_rating=Avg("rating"), average_kda_ratio=Avg("kda_ratio"),
+        average_damage_per_round=Avg("average_damage_per_round"), first_number=Min("number")
+    ).order_by("team", "first_number")
+
+
+def get_in_game_name(name: str, game: Game) -> str:
+    """Return the in-game name of the player, which is in quotes in the full name for Counter-Strike and LoL."""
+    if game == Game.COUNTER_STRIKE or game == Game.LEAGUE_OF_LEGENDS:
+        in_game_name = re.search("'(.*?)'", name)
+        return in_game_name.group(1) if in_game_name is not None else name
+
+    return name
+
+
+def parse_int(value: str) -> int | None:
+    """Return the integer in the cell of a statistics table, or None if the statistic is missing."""
+    number = parse_float(value)
+    return round(number) if number is not None else None
+
+
+def parse_float(value: str) -> float | None:
+    """Return the number in the cell of a statistics table, ignoring signs and percentages, or None if it is missing."""
+    try:
+        return float(value.strip().replace("%", "").replace("+", "").replace("–", "-").replace("−", "-"))
+    except ValueError:
+        return None
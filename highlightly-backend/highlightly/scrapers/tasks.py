@@ -1,26 +1,35 @@
 from highlightly.celery import app
-from scrapers.models import Match, Game
+from scrapers.models import Match, Game, GameVod
 from scrapers.scrapers.counter_strike import CounterStrikeScraper
 from scrapers.scrapers.league_of_legends import LeagueOfLegendsScraper
+from scrapers.scrapers.scraper import Scraper
 from scrapers.scrapers.valorant import ValorantScraper
+from util.http_client import log_http_statistics
+from videos.tasks import warm_up_video_thumbnails
 
 
 @app.task
 def scrape_counter_strike_matches() -> None:
     scraper = CounterStrikeScraper()
     scraper.scrape_upcoming_matches()
+    warm_up_video_thumbnails.delay()
+    log_http_statistics()
 
 
 @app.task
 def scrape_valorant_matches() -> None:
     scraper = ValorantScraper()
     scraper.scrape_upcoming_matches()
+    warm_up_video_thumbnails.delay()
+    log_http_statistics()
 
 
 @app.task
 def scrape_league_of_legends_matches() -> None:
     scraper = LeagueOfLegendsScraper()
     scraper.scrape_upcoming_matches()
+    warm_up_video_thumbnails.delay()
+    log_http_statistics()
 
 
 @app.task
@@ -35,3 +44,22 @@ def check_match_status(match_id: int) -> None:
         elif match.team_1.game == Game.LEAGUE_OF_LEGENDS:
             scraper = LeagueOfLegendsScraper()
             scraper.check_match_status(match)
+
+
+@app.task
+def download_game_vod(game_vod_id: int) -> None:
+    """Download the VOD of the finished game, so it is ready to be analyzed."""
+    game_vod = GameVod.objects.get(id=game_vod_id)
+
+    scraper = get_scraper(game_vod.match.team_1.game)
+    scraper.download_game_vod(game_vod)
+
+
+def get_scraper(game: Game) -> Scraper:
+    """Return the scraper that should be used for matches of the given game."""
+    if game == Game.COUNTER_STRIKE:
+        return CounterStrikeScraper()
+    elif game == Game.LEAGUE_OF_LEGENDS:
+        return LeagueOfLegendsScraper()
+    else:
+        return ValorantScraper()
@@ -29,3 +29,6 @@ class TeamData(TypedDict):
     url: str
     nationality: str | None
     ranking: int | None
+
+    # The filename of the downloaded logo, if the logo of the organization was downloaded.
+    logo_filename: str | None
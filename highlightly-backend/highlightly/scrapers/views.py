@@ -12,14 +12,15 @@ from rest_framework.serializers import ModelSerializer
 
 from scrapers import serializers
 from scrapers import tasks
-from scrapers.models import Match, Game, Organization
-from scrapers.scrapers.counter_strike import CounterStrikeScraper
-from scrapers.scrapers.league_of_legends import LeagueOfLegendsScraper
-from scrapers.scrapers.valorant import ValorantScraper
+from scrapers.models import Match, Game, Organization, GameVod
 from scrapers.serializers import MatchSerializer
-from scrapers.tasks import check_match_status
-from util.file_util import save_base64_image
-from videos.metadata.post_match import finish_video_thumbnail
+from scrapers.tasks import check_match_status, get_scraper
+from util.file_util import save_base64_image, get_base64
+from videos.metadata.post_match import finish_video_thumbnail, get_next_match_frame_time
+from videos.metadata.thumbnail_cache import invalidate_thumbnail_parts, get_team_logo_part_name
+from videos.metadata.util import get_thumbnail_variant_filepath
+from videos.tasks import get_final_render_pipeline, mark_organization_video_metadata_outdated, \
+    create_match_thumbnail_variants
 
 T = TypeVar("T", bound=ModelSerializer)
 
@@ -62,13 +63,7 @@ class MatchViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, mixins.Lis
     def scrape_finished_match(self, request: Request, pk: int) -> Response:
         match: Match = get_object_or_404(Match, id=pk)
 
-        if match.team_1.game == Game.COUNTER_STRIKE:
-            scraper = CounterStrikeScraper()
-        elif match.team_1.game == Game.LEAGUE_OF_LEGENDS:
-            scraper = LeagueOfLegendsScraper()
-        else:
-            scraper = ValorantScraper()
-
+        scraper = get_scraper(match.team_1.game)
         scraper.scrape_finished_match(match)
         match.refresh_from_db()
 
@@ -81,15 +76,56 @@ class MatchViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, mixins.Lis
 
     @action(detail=True, methods=["POST"])
     def refresh_match_frame(self, request: Request, pk: int) -> Response:
+        """
+        Replace the match frame in the thumbnail with the frame at the given time, or with the next frame candidate if
+        no time is given. The variants with the following frame candidates are then rendered in the background.
+        """
         match: Match = get_object_or_404(Match, id=pk)
 
         if match.gamevod_set.count() > 0:
-            finish_video_thumbnail(match, match.videometadata, request.data.get("match_frame_time", None))
+            video_metadata = match.videometadata
+            match_frame_time = request.data.get("match_frame_time", None)
+
+            if match_frame_time is None:
+                match_frame_time = get_next_match_frame_time(match, video_metadata.thumbnail_match_frame_time)
+
+            match_frame_time = float(match_frame_time) if match_frame_time is not None else None
+            finish_video_thumbnail(match, video_metadata, match_frame_time)
+            create_match_thumbnail_variants.delay(match.id)
         else:
             raise ValidationError("Match does not have any VODs.", code=status.HTTP_403_FORBIDDEN)
 
         return Response(MatchSerializer(match).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["GET"])
+    def frame_candidates(self, request: Request, pk: int) -> Response:
+        """Return the frame candidates of the first game in the match and the rendered thumbnail variant of each."""
+        match: Match = get_object_or_404(Match, id=pk)
+        game_vod: GameVod | None = match.gamevod_set.first()
+
+        if game_vod is None or not hasattr(match, "videometadata"):
+            raise ValidationError("Match does not have any VODs.", code=status.HTTP_403_FORBIDDEN)
+
+        frame_candidates = []
+        for frame_candidate in game_vod.framecandidate_set.order_by("-score"):
+            variant_filepath = get_thumbnail_variant_filepath(match, match.videometadata, frame_candidate.frame_time)
+            thumbnail = get_base64(variant_filepath) if Path(variant_filepath).exists() else None
+
+            frame_candidates.append({"frame_time": frame_candidate.frame_time, "score": frame_candidate.score,
+                                     "thumbnail": thumbnail})
+
+        return Response(frame_candidates, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["POST"])
+    def approve_highlight_video(self, request: Request, pk: int) -> Response:
+        """Start the final render of each game in the match with a preview that is waiting for approval."""
+        match: Match = get_object_or_404(Match, id=pk)
+
+        for game_vod in match.gamevod_set.filter(render_status=GameVod.RenderStatus.PREVIEW):
+            get_final_render_pipeline(game_vod).delay()
+
+        return Response(MatchSerializer(match).data, status=status.HTTP_201_CREATED)
+
 
 class OrganizationViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, mixins.ListModelMixin,
                           viewsets.GenericViewSet):
@@ -109,6 +145,10 @@ class OrganizationViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, mix
 
         # If a new logo is provided, replace the old image in local storage.
         if "logo_base64" in serializer.validated_data and serializer.validated_data["logo_base64"]:
+            # The cached thumbnail parts with the old logo are no longer used.
+            if instance.logo_filename:
+                invalidate_thumbnail_parts(get_team_logo_part_name(instance.logo_filename))
+
             if instance.logo_filename != "default.png":
                 Path(f"media/teams/{instance.logo_filename}").unlink(missing_ok=True)
 
@@ -119,6 +159,11 @@ class OrganizationViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, mix
             serializer.validated_data["logo_filename"] = new_filename
 
         self.perform_update(serializer)
+
+        # A new logo can have the same filename as the old logo, so the thumbnails are always marked as outdated.
+        if "logo_base64" in serializer.validated_data and serializer.validated_data["logo_base64"]:
+            mark_organization_video_metadata_outdated(instance, False, True)
+
         return Response(serializer.data)
 
     @action(detail=True, methods=["POST"])
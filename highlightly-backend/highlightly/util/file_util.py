@@ -1,8 +1,7 @@
 import base64
 import logging
-import shutil
 
-import requests
+from util import http_client
 
 
 def save_base64_image(filepath: str, base64_img: str) -> str:
@@ -27,7 +26,5 @@ def get_base64(filepath: str) -> str:
 
 def download_file_from_url(url: str, filepath: str) -> None:
     """Download the file in the given url to the given filepath."""
-    with requests.get(url, stream=True) as response:
-        with open(filepath, "wb") as file:
-            shutil.copyfileobj(response.raw, file)
-            logging.info(f"Downloaded file from {url} to {filepath}.")
+    http_client.download_file(url, filepath)
+    logging.info(f"Downloaded file from {url} to {filepath}.")
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+
+# The body of a cached response is stored decoded, so the headers describing the encoding of the sent body are dropped.
+DROPPED_HEADERS = ["Content-Encoding", "Content-Length", "Transfer-Encoding"]
+
+
+def get_cache_ttl(url: str) -> int | None:
+    """Return the seconds a response from the URL is fresh for, or None if responses from the URL are not cached."""
+    return next((ttl for pattern, ttl in settings.HTTP_CACHE_TTLS if re.match(pattern, url)), None)
+
+
+def get_cache_key(url: str, params: dict | None, headers: dict | None) -> str:
+    """Return the key of the cache entry of the request, which depends on the URL, query parameters, and headers."""
+    request_data = [url, sorted((params or {}).items()), sorted((headers or {}).items())]
+    return hashlib.sha256(json.dumps(request_data, default=str).encode()).hexdigest()
+
+
+def load_entry(key: str) -> tuple[dict, bytes] | None:
+    """Return the metadata and body of the cache entry with the key, or None if it is not cached."""
+    metadata_path = Path(f"{settings.HTTP_CACHE_FOLDER}/{key}.json")
+
+    try:
+        metadata = json.loads(metadata_path.read_text())
+        body = Path(f"{settings.HTTP_CACHE_FOLDER}/{key}.body").read_bytes()
+    except (OSError, ValueError):
+        return None
+
+    # The entry is touched, so the least recently used entries are evicted first. Unlike Path.touch, os.utime does not
+    # recreate the metadata if the entry was evicted in the meantime.
+    try:
+        os.utime(metadata_path)
+    except OSError:
+        pass
+
+    return metadata, body
+
+
+def save_entry(key: str, response: requests.Response) -> None:
+    """Save the response as the cache entry with the key and evict the oldest entries if the cache is too large."""
+    headers = {name: value for name, value in response.headers.items() if name not in DROPPED_HEADERS}
+    metadata = {"status_code": response.status_code, "headers": headers, "encoding": response.encoding,
+                "fetched_at": time.time()}
+
+    Path(settings.HTTP_CACHE_FOLDER).mkdir(parents=True, exist_ok=True)
+
+    # The body is written before the metadata, so an entry with metadata is always complete.
+    write_atomically(f"{settings.HTTP_CACHE_FOLDER}/{key}.body", response.content)
+    write_atomically(f"{settings.HTTP_CACHE_FOLDER}/{key}.json", json.dumps(metadata).encode())
+
+    evict_entries()
+
+
+def refresh_entry(key: str, metadata: dict) -> None:
+    """Mark the cache entry with the key as fresh again after it was revalidated."""
+    metadata["fetched_at"] = time.time()
+    write_atomically(f"{settings.HTTP_CACHE_FOLDER}/{key}.json", json.dumps(metadata).encode())
+
+
+def is_fresh(metadata: dict, ttl: int) -> bool:
+    """Return True if the cache entry was fetched or revalidated within the TTL."""
+    return time.time() - metadata["fetched_at"] < ttl
+
+
+def get_validation_headers(metadata: dict) -> dict:
+    """Return the headers that make the request conditional on the cached response having changed."""
+    headers = CaseInsensitiveDict(metadata["headers"])
+    validation_headers = {}
+
+    if "ETag" in headers:
+        validation_headers["If-None-Match"] = headers["ETag"]
+    if "Last-Modified" in headers:
+        validation_headers["If-Modified-Since"] = headers["Last-Modified"]
+
+    return validation_headers
+
+
+def create_response(url: str, metadata: dict, body: bytes) -> requests.Response:
+    """Return a response with the status code, headers, and body of the cache entry."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = metadata["status_code"]
+    response.headers = CaseInsensitiveDict(metadata["headers"])
+    response.encoding = metadata["encoding"]
+    response._content = body
+
+    return response
+
+
+def evict_entries() -> None:
+    """Delete the least recently used cache entries until the total size of the cache is below the maximum size."""
+    entries = []
+    total_size = 0
+
+    for metadata_file in os.scandir(settings.HTTP_CACHE_FOLDER):
+        if metadata_file.name.endswith(".json"):
+            body_path = f"{metadata_file.path[:-len('.json')]}.body"
+
+            # The entry can be evicted or replaced by another thread or process while the cache is scanned.
+            try:
+                metadata_stat = metadata_file.stat()
+                size = metadata_stat.st_size + os.path.getsize(body_path)
+            except OSError:
+                continue
+
+            entries.append((metadata_stat.st_mtime, metadata_file.path, body_path, size))
+            total_size += size
+
+    max_size = settings.HTTP_CACHE_MAX_SIZE_MB * 1024 * 1024
+    if total_size <= max_size:
+        return
+
+    evicted_count = 0
+    for _, metadata_path, body_path, size in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        Path(metadata_path).unlink(missing_ok=True)
+        Path(body_path).unlink(missing_ok=True)
+
+        total_size -= size
+        evicted_count += 1
+
+    logging.info(f"Evicted {evicted_count} entries from the HTTP cache.")
+
+
+def write_atomically(filepath: str, data: bytes) -> None:
+    """Write the data to a partial file first, so other processes never read a partially written file."""
+    partial_filepath = f"{filepath}.{os.getpid()}.partial"
+    Path(partial_filepath).write_bytes(data)
+    os.replace(partial_filepath, filepath)
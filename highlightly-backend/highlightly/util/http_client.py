@@ -0,0 +1,194 @@
+import bisect
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from util import http_cache
+
+# The upper bounds in seconds of the buckets in the latency histogram of each host.
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")]
+
+# A session is kept for each host, so requests to the same host reuse the kept-alive connections in its pool.
+sessions: dict[str, requests.Session] = {}
+host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+host_statistics: dict[str, dict] = {}
+lock = threading.Lock()
+
+# Requests for the same cache entry wait for each other, so concurrent misses only send one request. The cache keys are
+# spread over a fixed number of locks, so the number of locks does not grow with the number of URLs.
+CACHE_LOCK_COUNT = 64
+cache_locks = [threading.Lock() for _ in range(CACHE_LOCK_COUNT)]
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    Send a GET request through the session of the host. The keyword arguments are passed on to requests. If responses
+    from the URL are cached, a fresh cached response is returned instead, and a stale cached response is revalidated.
+    """
+    ttl = http_cache.get_cache_ttl(url)
+    if ttl is None or kwargs.get("stream", False):
+        return request("GET", url, **kwargs)
+
+    key = http_cache.get_cache_key(url, kwargs.get("params"), kwargs.get("headers"))
+    with get_cache_lock(key):
+        return get_cached(url, key, ttl, **kwargs)
+
+
+def get_cached(url: str, key: str, ttl: int, **kwargs) -> requests.Response:
+    """
+    Return the cached response if it is fresh. Otherwise, send the request, conditional on the cached response having
+    changed if it has an ETag or Last-Modified header, and cache the new response if it succeeded.
+    """
+    host = urlparse(url).netloc
+    entry = http_cache.load_entry(key)
+
+    if entry is not None:
+        metadata, body = entry
+        if http_cache.is_fresh(metadata, ttl):
+            record_cache_result(host, "cache_hit_count")
+            return http_cache.create_response(url, metadata, body)
+
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), **http_cache.get_validation_headers(metadata)}
+
+    response = request("GET", url, **kwargs)
+
+    if entry is not None and response.status_code == 304:
+        http_cache.refresh_entry(key, metadata)
+        record_cache_result(host, "revalidated_count")
+        return http_cache.create_response(url, metadata, body)
+
+    if response.status_code == 200:
+        http_cache.save_entry(key, response)
+
+    return response
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request through the session of the host. The keyword arguments are passed on to requests."""
+    return request("POST", url, **kwargs)
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send the request through the session of the host with the default timeouts, retrying connection errors and
+    temporary server errors with exponential backoff. The number of concurrent requests to the host is limited, and
+    the request count and latency of the host are recorded.
+    """
+    host = urlparse(url).netloc
+    kwargs.setdefault("timeout", (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT))
+
+    with get_host_semaphore(host):
+        start = time.perf_counter()
+        try:
+            response = get_session(host).request(method, url, **kwargs)
+        except requests.RequestException:
+            record_request(host, time.perf_counter() - start, False)
+            raise
+
+    record_request(host, time.perf_counter() - start, response.ok)
+    return response
+
+
+def download_file(url: str, filepath: str) -> None:
+    """Download the file in the given url to the given filepath, decompressing it if it was sent compressed."""
+    with get(url, stream=True) as response:
+        with open(filepath, "wb") as file:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                file.write(chunk)
+
+
+def get_session(host: str) -> requests.Session:
+    """Return the session of the host, creating it with a connection pool and the retry policy if it does not exist."""
+    with lock:
+        if host not in sessions:
+            retry = Retry(total=settings.HTTP_RETRIES, backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+                          status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "POST"],
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.HTTP_POOL_SIZE, max_retries=retry)
+
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+
+            sessions[host] = session
+
+        return sessions[host]
+
+
+def get_host_semaphore(host: str) -> threading.BoundedSemaphore:
+    """Return the semaphore limiting the number of concurrent requests to the host, creating it if it does not exist."""
+    with lock:
+        if host not in host_semaphores:
+            limit = settings.HTTP_HOST_CONCURRENCY_LIMITS.get(host, settings.HTTP_HOST_CONCURRENCY)
+            host_semaphores[host] = threading.BoundedSemaphore(limit)
+
+        return host_semaphores[host]
+
+
+def get_cache_lock(key: str) -> threading.Lock:
+    """Return the lock of the cache entry with the key, which is shared with the other keys in the same stripe."""
+    return cache_locks[int(key[:8], 16) % CACHE_LOCK_COUNT]
+
+
+def get_host_statistics(host: str) -> dict:
+    """Return the statistics of the host, creating them if they do not exist. The lock must be held by the caller."""
+    return host_statistics.setdefault(host, {"request_count": 0, "error_count": 0, "total_seconds": 0.0,
+                                             "latency_histogram": [0] * len(LATENCY_BUCKETS), "cache_hit_count": 0,
+                                             "revalidated_count": 0})
+
+
+def record_request(host: str, seconds: float, succeeded: bool) -> None:
+    """Add the request to the request count, error count, and latency histogram of the host."""
+    with lock:
+        statistics = get_host_statistics(host)
+
+        statistics["request_count"] += 1
+        statistics["error_count"] += 0 if succeeded else 1
+        statistics["total_seconds"] += seconds
+        statistics["latency_histogram"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+def record_cache_result(host: str, count_name: str) -> None:
+    """Add a response served from the cache, either directly or after it was revalidated, to the counts of the host."""
+    with lock:
+        get_host_statistics(host)[count_name] += 1
+
+
+def get_http_statistics() -> dict[str, dict]:
+    """
+    Return the request count, error count, average latency, and latency histogram of each host that requests were sent
+    to by this process, and the number of responses served from the cache. The request count includes the requests
+    that revalidated a cached response. The histogram maps the upper bound of each bucket to the number of requests.
+    """
+    with lock:
+        return {host: {"request_count": statistics["request_count"], "error_count": statistics["error_count"],
+                       "average_seconds": round(statistics["total_seconds"] / max(statistics["request_count"], 1), 3),
+                       "latency_histogram": dict(zip(map(str, LATENCY_BUCKETS), statistics["latency_histogram"])),
+                       "cache_hit_count": statistics["cache_hit_count"],
+                       "revalidated_count": statistics["revalidated_count"]}
+                for host, statistics in host_statistics.items()}
+
+
+def log_http_statistics() -> None:
+    """
+    Log the HTTP statistics of each host and the number of cached and live fetches over all hosts. The statistics are
+    reset afterwards, so each log covers the requests since the previous log, which is the scrape run that just ended.
+    """
+    statistics_by_host = get_http_statistics()
+    for host, statistics in statistics_by_host.items():
+        logging.info(f"HTTP statistics for {host}: {statistics}")
+
+    cached_count = sum(statistics["cache_hit_count"] + statistics["revalidated_count"]
+                       for statistics in statistics_by_host.values())
+    live_count = sum(statistics["request_count"] for statistics in statistics_by_host.values())
+    logging.info(f"Served {cached_count} HTTP responses from the cache and sent {live_count} live requests.")
+
+    with lock:
+        host_statistics.clear()
@@ -0,0 +1,103 @@
+import logging
+import os
+import subprocess
+
+import numpy as np
+
+
+class VideoIndex:
+    """
+    The presentation time and keyframe flag of each frame in the first video stream of a video, in presentation order.
+    The index is created with a single ffprobe pass over the packets of the video and saved in a NumPy sidecar next to
+    the video, so the video is only probed once. Times are in seconds from the first frame, which matches the seconds
+    used by "ffmpeg -ss". OpenCV converts frame numbers to timestamps with the average frame rate, so its frame numbers
+    only match the frame numbers of the index for constant frame rate videos. Seeks in OpenCV therefore use the time of
+    the frame in milliseconds from the index instead of the frame number.
+    """
+
+    def __init__(self, frame_times: np.ndarray, keyframes: np.ndarray, duration: float) -> None:
+        self.frame_times = frame_times
+        self.keyframe_times = frame_times[keyframes]
+        self.keyframe_frame_numbers = np.flatnonzero(keyframes)
+        self.duration = duration
+
+    @classmethod
+    def load(cls, filepath: str) -> "VideoIndex":
+        """Load the index of the video from the sidecar, creating the sidecar first if it is missing or outdated."""
+        index_filepath = get_index_filepath(filepath)
+        stat = os.stat(filepath)
+
+        if os.path.exists(index_filepath):
+            with np.load(index_filepath) as index:
+                if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime:
+                    return cls(index["frame_times"], index["keyframes"], float(index["duration"]))
+
+        frame_times, keyframes, duration = probe_packets(filepath)
+        np.savez_compressed(index_filepath, frame_times=frame_times, keyframes=keyframes, duration=duration,
+                            size=stat.st_size, mtime=stat.st_mtime)
+        logging.info(f"Created index with {len(frame_times)} frames and {len(frame_times[keyframes])} keyframes "
+                     f"for {filepath}.")
+
+        return cls(frame_times, keyframes, duration)
+
+    def frame_number_at(self, second: float) -> int:
+        """Return the number of the frame that is shown at the given second."""
+        return max(int(np.searchsorted(self.frame_times, second, side="right")) - 1, 0)
+
+    def frame_msec(self, frame_number: int) -> float:
+        """Return the time of the frame in milliseconds, which is used to seek to the frame with CAP_PROP_POS_MSEC."""
+        return float(self.frame_times[frame_number]) * 1000
+
+    def keyframe_before(self, second: float) -> float | None:
+        """Return the time of the last keyframe at or before the given second."""
+        index = np.searchsorted(self.keyframe_times, second, side="right")
+        return float(self.keyframe_times[index - 1]) if index > 0 else None
+
+    def keyframe_after(self, second: float) -> float | None:
+        """Return the time of the first keyframe at or after the given second."""
+        index = np.searchsorted(self.keyframe_times, second, side="left")
+        return float(self.keyframe_times[index]) if index < len(self.keyframe_times) else None
+
+    def keyframe_number_before(self, frame_number: int) -> int:
+        """Return the number of the last keyframe at or before the given frame, which is where decoding starts."""
+        index = np.searchsorted(self.keyframe_frame_numbers, frame_number, side="right")
+        return int(self.keyframe_frame_numbers[index - 1]) if index > 0 else 0
+
+
+def get_index_filepath(filepath: str) -> str:
+    """Return the path of the sidecar with the index of the video."""
+    return f"{filepath}.index.npz"
+
+
+def probe_packets(filepath: str) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Use ffprope to read the presentation time, duration and flags of each video packet without decoding the video.
+    Return the frame times from the first frame in presentation order, which frames are keyframes, and the duration.
+    """
+    cmd = f"ffprobe -v error -select_streams v:0 -show_entries packet=pts_time,duration_time,flags -of csv=p=0 {filepath}"
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, shell=True, check=True)
+
+    pts_times, durations, keyframes = [], [], []
+    for line in result.stdout.decode().splitlines():
+        pts_time, duration_time, flags = line.split(",")[:3]
+
+        # Packets without a presentation time are not shown, so they do not have a frame number.
+        if pts_time == "N/A":
+            continue
+
+        pts_times.append(float(pts_time))
+        durations.append(float(duration_time) if duration_time != "N/A" else 0.0)
+        keyframes.append("K" in flags)
+
+    # The packets are in decoding order, which differs from the presentation order if there are B-frames.
+    pts_times = np.array(pts_times, dtype=np.float64)
+    order = np.argsort(pts_times, kind="stable")
+    pts_times, durations, keyframes = pts_times[order], np.array(durations)[order], np.array(keyframes, dtype=bool)[order]
+
+    if len(pts_times) == 0:
+        return pts_times, keyframes, 0.0
+
+    frame_times = pts_times - pts_times[0]
+    duration = float(frame_times[-1] + durations[-1])
+
+    return frame_times, keyframes, duration
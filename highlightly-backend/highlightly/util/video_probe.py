@@ -0,0 +1,75 @@
+import functools
+import json
+import logging
+import os
+import subprocess
+from fractions import Fraction
+from typing import TypedDict
+
+
+class AudioStream(TypedDict):
+    codec: str
+    sample_rate: int
+    channels: int
+
+
+class VideoProbe(TypedDict):
+    duration: float
+    frame_rate: Fraction
+    width: int
+    height: int
+    video_codec: str
+    pix_fmt: str
+    audio_streams: list[AudioStream]
+
+
+def probe(filepath: str) -> VideoProbe:
+    """
+    Return the duration, frame rate, resolution and codecs of the video. The video is only probed with ffprobe once
+    for each version of the file. The result is cached in-process and in a JSON sidecar next to the video, and both
+    are keyed by the size and modification time of the file, so a changed file is probed again.
+    """
+    stat = os.stat(filepath)
+    return probe_file(os.path.abspath(filepath), stat.st_size, stat.st_mtime)
+
+
+@functools.lru_cache(maxsize=256)
+def probe_file(filepath: str, size: int, mtime: float) -> VideoProbe:
+    """Return the probe result for the given version of the file, using the sidecar if it matches the version."""
+    sidecar_filepath = f"{filepath}.probe.json"
+
+    try:
+        with open(sidecar_filepath) as f:
+            sidecar = json.load(f)
+
+        if sidecar["size"] == size and sidecar["mtime"] == mtime:
+            return parse_ffprobe_output(sidecar["ffprobe"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", filepath]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    ffprobe_output = json.loads(result.stdout)
+
+    try:
+        with open(sidecar_filepath, "w") as f:
+            json.dump({"size": size, "mtime": mtime, "ffprobe": ffprobe_output}, f)
+    except OSError as e:
+        logging.warning(f"Could not save the probe result of {filepath}: {e}")
+
+    return parse_ffprobe_output(ffprobe_output)
+
+
+def parse_ffprobe_output(ffprobe_output: dict) -> VideoProbe:
+    """Convert the JSON output of ffprobe to the probe result of the first video stream and all audio streams."""
+    streams = ffprobe_output["streams"]
+    video = next(stream for stream in streams if stream["codec_type"] == "video")
+
+    audio_streams = [AudioStream(codec=stream["codec_name"], sample_rate=int(stream["sample_rate"]),
+                                 channels=int(stream["channels"]))
+                     for stream in streams if stream["codec_type"] == "audio"]
+
+    # The frame rate is a fraction like "30000/1001", which is kept exact instead of being rounded to a float.
+    return VideoProbe(duration=float(ffprobe_output["format"]["duration"]), frame_rate=Fraction(video["r_frame_rate"]),
+                      width=int(video["width"]), height=int(video["height"]), video_codec=video["codec_name"],
+                      pix_fmt=video["pix_fmt"], audio_streams=audio_streams)
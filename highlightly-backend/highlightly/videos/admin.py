@@ -1,5 +1,7 @@
 from django.contrib import admin
 
-from videos.models import VideoMetadata
+from videos.models import VideoMetadata, EditDecisionList, RenderPart
 
 admin.site.register(VideoMetadata)
+admin.site.register(EditDecisionList)
+admin.site.register(RenderPart)
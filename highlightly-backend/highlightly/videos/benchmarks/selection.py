@@ -0,0 +1,95 @@
+import random
+import time
+from types import SimpleNamespace
+
+from videos.editors.selection import select_highlights_greedily, EXTRA_CLIP_SECONDS
+
+
+def run_selection_benchmark(sizes: list[int], round_count: int = 30, repeats: int = 5,
+                            max_scan_size: int = 5000) -> list[dict]:
+    """
+    Select highlights from synthetic highlights of each size and return the best time of the indexed selection and, for
+    sizes up to the max scan size, of the previous selection that scanned all highlights for each selected highlight.
+    """
+    results = []
+
+    for size in sizes:
+        highlights = create_synthetic_highlights(size, round_count)
+        rounds_to_include = [1, round_count // 2 + 1, round_count]
+
+        # Select around half of the highlights, so the selection does not stop after a few highlights.
+        wanted_video_length_seconds = sum(h.duration_seconds + EXTRA_CLIP_SECONDS for h in highlights) / 2
+
+        result = {"highlights": size, "indexed_seconds": time_selection(
+            lambda: select_highlights_greedily(highlights, rounds_to_include, wanted_video_length_seconds), repeats
+        )}
+
+        if size <= max_scan_size:
+            result["scan_seconds"] = time_selection(
+                lambda: select_highlights_with_scans(highlights, rounds_to_include, wanted_video_length_seconds), repeats
+            )
+
+        results.append(result)
+
+    return results
+
+
+def create_synthetic_highlights(size: int, round_count: int) -> list[SimpleNamespace]:
+    """Return highlights spread over the rounds, sorted like in the editor with the best highlight first."""
+    highlights = []
+
+    for i in range(size):
+        round_number = i % round_count + 1
+        start_time_seconds = round_number * 100 + random.randint(0, 90)
+
+        highlights.append(SimpleNamespace(id=i, round_number=round_number, start_time_seconds=start_time_seconds,
+                                          duration_seconds=random.randint(1, 30), value=random.randint(1, 200)))
+
+    return sorted(highlights, key=lambda h: h.value / max(h.duration_seconds, 30), reverse=True)
+
+
+def time_selection(select, repeats: int) -> float:
+    """Return the best time in seconds of running the selection the given number of times."""
+    times = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        select()
+        times.append(time.perf_counter() - start)
+
+    return round(min(times), 6)
+
+
+def select_highlights_with_scans(highlights: list, rounds_to_include: list[int],
+                                 wanted_video_length_seconds: float) -> list:
+    """The previous selection, which scans the selected highlights and the highlights of the round for each highlight."""
+    selected_highlights = []
+    current_video_length_seconds = 0
+
+    def add_highlight_to_selected(highlight) -> int:
+        added_duration = 0
+
+        if highlight is not None and highlight not in selected_highlights:
+            selected_highlights.append(highlight)
+            added_duration += highlight.duration_seconds + EXTRA_CLIP_SECONDS
+
+            round_highlights = [h for h in highlights if h.round_number == highlight.round_number]
+            round_last_highlight = sorted(round_highlights, key=lambda h: h.start_time_seconds, reverse=True)[0]
+
+            if highlight.id != round_last_highlight.id and round_last_highlight not in selected_highlights:
+                selected_highlights.append(round_last_highlight)
+                added_duration += round_last_highlight.duration_seconds + EXTRA_CLIP_SECONDS
+
+        return added_duration
+
+    for round_number in rounds_to_include:
+        best_highlight = next((h for h in highlights if h.round_number == round_number), None)
+        current_video_length_seconds += add_highlight_to_selected(best_highlight)
+
+    for highlight in highlights:
+        current_video_length_seconds += add_highlight_to_selected(highlight)
+
+        if current_video_length_seconds >= wanted_video_length_seconds:
+            break
+
+    return selected_highlights
@@ -0,0 +1,82 @@
+import os
+import time
+from typing import Callable
+
+from PIL import Image
+
+from videos.metadata.statistics_card import render_html_card, draw_statistics_card, close_browser, \
+    get_memory_usage_mb
+
+GAME_NAMES = ["counter-strike", "valorant", "league-of-legends"]
+
+
+def run_statistics_card_benchmark(workdir: str, cards: int = 20) -> dict:
+    """
+    Render the given number of statistics cards for each game with a new browser for each card, with the warm browser,
+    and with PIL. Return the latency of each card and the memory used by the process and the browser for each renderer.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    image_filepath = os.path.abspath(f"{workdir}/placeholder.png")
+    Image.new("RGBA", (400, 400), "#5ebe24").save(image_filepath)
+
+    def render_cold(game_name: str, filepath: str) -> None:
+        close_browser()
+        render_html_card(create_card_html(game_name, image_filepath), "videos/html/post-match-statistics.css", filepath)
+
+    def render_warm(game_name: str, filepath: str) -> None:
+        render_html_card(create_card_html(game_name, image_filepath), "videos/html/post-match-statistics.css", filepath)
+
+    def render_pil(game_name: str, filepath: str) -> None:
+        draw_statistics_card(game_name, create_card_data(game_name, image_filepath), filepath)
+
+    results = {}
+    for renderer, render in [("browser_cold", render_cold), ("browser_warm", render_warm), ("pil", render_pil)]:
+        results[renderer] = measure_renderer(render, workdir, cards)
+
+    close_browser()
+    return results
+
+
+def measure_renderer(render: Callable[[str, str], None], workdir: str, cards: int) -> dict:
+    """Render the cards, cycling through the games, and return the latency percentiles and the memory usage."""
+    latencies = []
+
+    for count in range(cards):
+        game_name = GAME_NAMES[count % len(GAME_NAMES)]
+
+        start = time.perf_counter()
+        render(game_name, f"{workdir}/{game_name}_{count}.png")
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {"cards": cards, "mean_ms": round(sum(latencies) / cards * 1000, 1),
+            "p50_ms": round(latencies[cards // 2] * 1000, 1),
+            "p95_ms": round(latencies[min(int(cards * 0.95), cards - 1)] * 1000, 1),
+            "memory_mb": get_memory_usage_mb()}
+
+
+def create_card_data(game_name: str, image_filepath: str) -> dict:
+    """Return the data of a statistics card with made up statistics for five players on each team."""
+    card_data = {"match_info": "Game 2 - Ascent", "mvp_title": "Game 2 MVP", "game": game_name,
+                 "mvp_profile_picture": image_filepath, "mvp_name": "Player 1", "mvp_team_logo": image_filepath}
+
+    for team_number in [1, 2]:
+        card_data |= {f"team_{team_number}_name": f"Team {team_number}", f"team_{team_number}_score": 13 + team_number,
+                      f"team_{team_number}_result": "winner" if team_number == 2 else "loser",
+                      f"team_{team_number}_logo": image_filepath}
+
+        for player in range(1, 6):
+            prefix = f"team_{team_number}_player_{player}_"
+            card_data |= {f"{prefix}{column}": player * 3 for column in
+                          ["kd", "adr", "kast", "rating", "r", "acs", "k", "d", "hs_percent", "kills", "deaths",
+                           "assists", "cs", "cs_minute", "ratio"]}
+            card_data |= {f"{prefix}name": f"Player {player}", f"{prefix}plus_minus": f"+{player}",
+                          f"{prefix}sign": "plus"}
+
+    return card_data
+
+
+def create_card_html(game_name: str, image_filepath: str) -> str:
+    """Return the HTML of a statistics card with made up statistics."""
+    with open(f"videos/html/post-match-statistics-{game_name}.html") as html_file:
+        return html_file.read().format(**create_card_data(game_name, image_filepath))
@@ -0,0 +1,68 @@
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from videos.storage import get_render_storage
+
+
+def get_cached_clip_filepath(vod_filepath: str, extension: str, *parameters) -> str:
+    """
+    Return the filepath of the clip cut from the VOD with the given parameters in the clip cache. The filepath is a
+    hash of the identity of the VOD and the parameters, so a clip is only cut again if the VOD or the parameters change.
+    """
+    stat = os.stat(vod_filepath)
+    identity = f"{os.path.abspath(vod_filepath)}:{stat.st_size}:{stat.st_mtime}:{':'.join(map(str, parameters))}"
+    digest = hashlib.sha256(identity.encode()).hexdigest()[:24]
+
+    # The cache is in the render storage, so clips cut by a render worker on one node can be used on the other nodes.
+    cache_folder_path = get_render_storage().get_path(settings.CLIP_CACHE_FOLDER)
+    Path(cache_folder_path).mkdir(parents=True, exist_ok=True)
+
+    return f"{cache_folder_path}/{digest}.{extension}"
+
+
+def is_clip_cached(clip_filepath: str) -> bool:
+    """Return True if the clip is in the cache and mark it as recently used."""
+    if not os.path.exists(clip_filepath):
+        return False
+
+    # Only the access time is changed, since the modification time is part of the key of the probe sidecar.
+    os.utime(clip_filepath, (time.time(), os.stat(clip_filepath).st_mtime))
+    return True
+
+
+def evict_clips(clip_filepaths_in_use: list[str]) -> None:
+    """
+    Remove the least recently used clips from the cache until the cache is within the maximum size. The clips used by
+    the current render are never removed.
+    """
+    in_use = {os.path.abspath(clip_filepath) for clip_filepath in clip_filepaths_in_use}
+
+    clips = []
+    for entry in os.scandir(get_render_storage().get_path(settings.CLIP_CACHE_FOLDER)):
+        if entry.is_file() and not entry.name.endswith(".probe.json") and ".partial." not in entry.name:
+            clips.append((entry.stat().st_atime, entry.stat().st_size, entry.path))
+
+    cache_size = sum(size for _, size, _ in clips)
+    evicted_count = 0
+
+    for _, size, clip_filepath in sorted(clips):
+        if cache_size <= settings.CLIP_CACHE_MAX_BYTES:
+            break
+
+        if os.path.abspath(clip_filepath) in in_use:
+            continue
+
+        os.remove(clip_filepath)
+        if os.path.exists(f"{clip_filepath}.probe.json"):
+            os.remove(f"{clip_filepath}.probe.json")
+
+        cache_size -= size
+        evicted_count += 1
+
+    if evicted_count > 0:
+        logging.info(f"Evicted {evicted_count} clips from the clip cache, which is now {cache_size / 1e9:.1f} GB.")
@@ -1,13 +1,34 @@
+import hashlib
 import logging
+import os
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import timedelta
+from fractions import Fraction
 from pathlib import Path
 
+from django.conf import settings
+from django.db.models import QuerySet
+
 from highlights.models import Highlight
-from scrapers.models import GameVod
+from scrapers.models import GameVod, Match
+from util.video_index import VideoIndex
+from util.video_probe import probe, VideoProbe
+from videos.editors.clip_cache import get_cached_clip_filepath, is_clip_cached, evict_clips
+from videos.editors.selection import select_highlights_greedily
 from videos.metadata.post_match import create_game_statistics_image, add_post_match_video_metadata
-from videos.models import VideoMetadata
+from videos.models import VideoMetadata, EditDecisionList, RenderPart
+from videos.storage import get_render_storage
+
+# The number of seconds at the end of the highlight video that show the post game statistics.
+STATISTICS_DURATION = 10
+
+# The height of the preview highlight videos. The width is scaled to keep the aspect ratio.
+PREVIEW_HEIGHT = 360
+
+# Copying a part of the VOD shorter than this is not worth the extra part in the smart render.
+MIN_COPY_SECONDS = 2
 
 
 class Editor:
@@ -24,13 +45,11 @@ class Editor:
 
     def select_highlights(self, game_vod: GameVod) -> list[Highlight]:
         """Based on the wanted video length, select the best highlights from the possible highlights."""
-        selected_highlights = []
         unsorted_highlights = game_vod.highlight_set.all()
         # TODO: Maybe weigh longer clips higher to avoid many smalls cuts.
         # TODO: Maybe scale the highlight when setting the value based on how far away the length is from an ideal length.
         highlights = sorted(unsorted_highlights, key=lambda h: h.value / max(h.duration_seconds, 30), reverse=True)
 
-        current_video_length_seconds = 0
         round_count = game_vod.team_1_round_count + game_vod.team_2_round_count
         wanted_video_length_seconds = timedelta(minutes=round_count * 0.45).total_seconds()
 
@@ -43,68 +62,90 @@ class Editor:
         if round_count > self.final_round:
             rounds_to_include.append(self.final_round)
 
-        for round in rounds_to_include:
-            best_highlight = next((highlight for highlight in highlights if highlight.round_number == round), None)
-            current_video_length_seconds += add_highlight_to_selected(selected_highlights, best_highlight, highlights)
-
-        # Keep adding highlights until out of highlights or the wanted video length is reached.
-        for highlight in highlights:
-            current_video_length_seconds += add_highlight_to_selected(selected_highlights, highlight, highlights)
-
-            if current_video_length_seconds >= wanted_video_length_seconds:
-                break
+        selection = select_highlights_greedily(highlights, rounds_to_include, wanted_video_length_seconds)
 
-        logging.info(f"Selected {len(selected_highlights)} highlights for {current_video_length_seconds / 60} "
+        logging.info(f"Selected {len(selection.highlights)} highlights for {selection.duration_seconds / 60} "
                      f"minute highlight video of {game_vod}.")
 
-        return sorted(selected_highlights, key=lambda h: h.start_time_seconds)
+        return sorted(selection.highlights, key=lambda h: h.start_time_seconds)
 
     def create_highlight_video(self, highlights: list[Highlight], game_vod: GameVod, target_filename: str, offset: int,
                                folder_path: str) -> None:
         """Use the highlights and the offset to edit the full VOD into a highlight video."""
-        logging.info(f"Using {len(highlights)} highlights to cut {game_vod} into highlight video.")
+        logging.info(f"Using {len(highlights)} highlights to cut {game_vod} into highlight video "
+                     f"with the {settings.VIDEO_RENDER_MODE} render mode.")
 
         vod_filepath = f"{folder_path}/vods/{game_vod.filename}"
-        Path(f"{folder_path}/clips").mkdir(parents=True, exist_ok=True)
+        segments, bumper_filepath, bumper_tail_filepath = self.get_final_segments(highlights, game_vod, offset,
+                                                                                  folder_path)
+
+        # The video is rendered to a temporary file in the same folder and renamed when done, so the match video is
+        # never combined from a partially written game video.
+        target_filepath = f"{folder_path}/highlights/{target_filename}"
+        temporary_filepath = get_temporary_filepath(target_filepath)
+
+        if settings.VIDEO_RENDER_MODE in ["smart", "distributed"]:
+            render_with_smart_render(vod_filepath, segments, bumper_filepath, bumper_tail_filepath, folder_path,
+                                     temporary_filepath)
+        elif settings.VIDEO_RENDER_MODE == "filtergraph":
+            render_with_filtergraph(vod_filepath, segments, bumper_filepath, temporary_filepath)
+        else:
+            render_with_clips(vod_filepath, segments, bumper_filepath, folder_path, temporary_filepath,
+                              game_vod.game_count)
+
+        os.replace(temporary_filepath, target_filepath)
+        logging.info(f"Combined {len(highlights)} highlights into a single highlight video for {game_vod}.")
 
-        # For each highlight, cut the clip out and save the highlight clip to a temporary location.
-        exact_durations = []
-        for count, highlight in enumerate(highlights):
-            is_last = count + 1 == len(highlights)
+        self.save_edit_decision_list(game_vod, segments, offset)
 
-            # Add time at the start and end of each highlight and add more time to the end of the last highlight.
-            duration = highlight.duration_seconds + (self.extra_duration + 12 if is_last else self.extra_duration)
-            start = (highlight.start_time_seconds + offset) - self.extra_start_time
+    def get_final_segments(self, highlights: list[Highlight], game_vod: GameVod, offset: int,
+                           folder_path: str) -> tuple[list[tuple[int, int]], str, str]:
+        """
+        Return the segments of the VOD that should be included in the highlight video and the filepaths of the post
+        game statistics bumper and of the bumper without its first second.
+        """
+        vod_filepath = f"{folder_path}/vods/{game_vod.filename}"
+        segments = self.get_highlight_segments(highlights, offset)
 
-            clip_filepath = f"{folder_path}/clips/temp_clip_{count + 1}.mkv" if is_last else f"{folder_path}/clips/clip_{count + 1}.mkv"
-            cmd = f"ffmpeg -ss {start} -i {vod_filepath} -to {duration} -c copy {clip_filepath}"
-            subprocess.run(cmd, shell=True)
+        # The last 10 seconds of the last highlight are replaced with the post game statistics bumper.
+        create_game_statistics_image(game_vod, folder_path, f"game_{game_vod.game_count}.png")
+        bumper_filepath, bumper_tail_filepath = get_statistics_bumper(f"{folder_path}/game_{game_vod.game_count}.png",
+                                                                      probe(vod_filepath), f"{folder_path}/bumpers")
 
-            exact_duration = get_video_length(clip_filepath)
+        last_start, last_duration = segments[-1]
+        segments[-1] = (last_start, last_duration - STATISTICS_DURATION)
 
-            # If it is the last highlight, replace the last 10 seconds of the video with the post game statistics.
-            if is_last:
-                create_game_statistics_image(game_vod, folder_path, f"game_{game_vod.game_count}.png")
+        return segments, bumper_filepath, bumper_tail_filepath
 
-                # Create a 10-second video with the post game statistics image using the same frame rate as the clip.
-                frame_rate = get_video_frame_rate(clip_filepath)
-                statistics_filepath = f"{folder_path}/clips/statistics.mkv"
-                cmd = f"ffmpeg -loop 1 -i {folder_path}/game_{game_vod.game_count}.png -filter:v fps={frame_rate} -t 10 {statistics_filepath}"
-                subprocess.run(cmd, shell=True)
+    def save_edit_decision_list(self, game_vod: GameVod, segments: list[tuple[int, int]], offset: int) -> None:
+        """Save the segments the highlight video is rendered from and log how many changed since the last render."""
+        previous = EditDecisionList.objects.filter(game_vod=game_vod).first()
 
-                # Combine the statistics video and the clip into the complete final highlight clip.
-                cmd = f"ffmpeg -i {clip_filepath} -i {statistics_filepath} -filter_complex " \
-                      f"'xfade=transition=fade:offset={exact_duration - 11}:duration=1' -preset superfast -crf 27 " \
-                      f"-c:a copy {clip_filepath.replace('temp_', '')}"
-                subprocess.run(cmd, shell=True)
+        if previous is not None:
+            previous_segments = {tuple(segment) for segment in previous.segments}
+            changed_count = len([segment for segment in segments if tuple(segment) not in previous_segments])
+            logging.info(f"{changed_count} of {len(segments)} segments of {game_vod} changed since the last render.")
 
-            logging.info(f"Created {duration} second highlight clip for round {highlight.round_number} of {game_vod}.")
-            exact_durations.append(exact_duration)
+        EditDecisionList.objects.update_or_create(game_vod=game_vod, defaults={
+            "game_start_offset": offset, "extra_start_time": self.extra_start_time,
+            "extra_duration": self.extra_duration, "segments": segments, "render_mode": settings.VIDEO_RENDER_MODE,
+            "transition_duration": 1
+        })
 
-        combine_clips_with_crossfade(folder_path, target_filename, exact_durations, game_vod.game_count)
-        logging.info(f"Combined {len(highlights)} highlights into a single highlight video for {game_vod}.")
+    def get_highlight_segments(self, highlights: list[Highlight], offset: int) -> list[tuple[int, int]]:
+        """Return the start and duration of the part of the VOD that should be included for each highlight."""
+        segments = []
 
-        shutil.rmtree(f"{folder_path}/clips")
+        for count, highlight in enumerate(highlights):
+            is_last = count + 1 == len(highlights)
+
+            # Add time at the start and end of each highlight and add more time to the end of the last highlight.
+            duration = highlight.duration_seconds + (self.extra_duration + 12 if is_last else self.extra_duration)
+            start = (highlight.start_time_seconds + offset) - self.extra_start_time
+
+            segments.append((start, duration))
+
+        return segments
 
     @staticmethod
     def upload_highlight_video(filepath: str, video_metadata: VideoMetadata) -> None:
@@ -115,62 +156,519 @@ class Editor:
         # TODO: Maybe also look into if it will be necessary to request for more quota for uploading (currently only 6 videos a day).
         pass
 
-    def edit_and_upload_video(self, game: GameVod):
-        """Using the highlights edit the full VODs into a highlight video and upload it to YouTube."""
-        folder_path = game.match.create_unique_folder_path()
+    def edit_game_video(self, game: GameVod) -> None:
+        """Using the highlights of the game, edit the full VOD of the game into a highlight video."""
+        folder_path = get_match_folder_path(game.match)
         Path(f"{folder_path}/highlights").mkdir(parents=True, exist_ok=True)
         logging.info(f"Creating a highlight video for {game} at {folder_path}/highlights.")
 
-        with open(f"{folder_path}/highlights/highlights.txt", "a+") as highlights_txt:
-            logging.info(f"Creating a highlight video for {game}.")
-            offset = self.find_game_starting_point(game)
-            game.game_start_offset = offset
-            game.save()
+        offset = self.get_game_start_offset(game)
+        highlights = self.select_highlights(game)
+        self.create_highlight_video(highlights, game, get_highlight_video_filename(game), offset, folder_path)
+
+    def plan_game_video_parts(self, game: GameVod) -> list[RenderPart] | None:
+        """
+        Split the highlight video of the game into the parts of the smart render and save them as render parts that
+        any render worker can render. Return None if the VOD cannot be smart rendered and should be rendered in full.
+        """
+        folder_path = get_match_folder_path(game.match)
+        vod_filepath = f"{folder_path}/vods/{game.filename}"
 
-            highlights = self.select_highlights(game)
-            highlight_video_filename = game.filename.replace(".mkv", "_highlights.mkv")
-            self.create_highlight_video(highlights, game, highlight_video_filename, offset, folder_path)
+        if probe(vod_filepath)["video_codec"] != "h264":
+            return None
 
-            highlights_txt.write(f"file '{highlight_video_filename}'\n")
+        offset = self.get_game_start_offset(game)
+        segments, bumper_filepath, _ = self.get_final_segments(self.select_highlights(game), game, offset, folder_path)
+        parts = split_segments_at_keyframes(segments, VideoIndex.load(vod_filepath))
 
-        # Combine the highlight video for each game VOD into a single full highlight video.
-        if game.match.finished:
-            cmd = f"ffmpeg -f concat -i {folder_path}/highlights/highlights.txt -codec copy {folder_path}/highlights.mkv"
-            subprocess.run(cmd, shell=True)
+        render_parts = []
+        for count, (part_type, intervals) in enumerate(parts):
+            # Only the last part fades into the first second of the post game statistics bumper.
+            part_bumper_filepath = bumper_filepath if count + 1 == len(parts) else None
+            part_filepath = get_cached_clip_filepath(vod_filepath, "ts", part_type, intervals, part_bumper_filepath)
 
-            cmd = f"ffmpeg -i {folder_path}/highlights.mkv -codec copy -movflags +faststart {folder_path}/highlights.mp4"
-            subprocess.run(cmd, shell=True)
+            render_parts.append(RenderPart(game_vod=game, number=count + 1, type=part_type.upper(), intervals=intervals,
+                                           filepath=part_filepath, bumper_filepath=part_bumper_filepath))
 
-            logging.info(f"Combined {game.match.gamevod_set.count()} highlight videos into a single full "
-                         f"highlight video for {game.match}.")
+        RenderPart.objects.filter(game_vod=game).delete()
+        render_parts = RenderPart.objects.bulk_create(render_parts)
 
-            shutil.rmtree(f"{folder_path}/highlights")
+        self.save_edit_decision_list(game, segments, offset)
+        logging.info(f"Split the highlight video of {game} into {len(render_parts)} parts.")
 
+        return render_parts
+
+    @staticmethod
+    def assemble_game_video(game: GameVod) -> None:
+        """Concatenate the rendered parts of the highlight video of the game and the post game statistics bumper."""
+        folder_path = get_match_folder_path(game.match)
+        Path(f"{folder_path}/highlights").mkdir(parents=True, exist_ok=True)
+
+        render_parts = list(game.renderpart_set.order_by("number"))
+        _, bumper_tail_filepath = get_statistics_bumper(f"{folder_path}/game_{game.game_count}.png",
+                                                        probe(f"{folder_path}/vods/{game.filename}"),
+                                                        f"{folder_path}/bumpers")
+
+        part_filepaths = [render_part.filepath for render_part in render_parts]
+        evict_clips(part_filepaths)
+
+        target_filepath = f"{folder_path}/highlights/{get_highlight_video_filename(game)}"
+        temporary_filepath = get_temporary_filepath(target_filepath)
+
+        concat_video_parts(part_filepaths + [bumper_tail_filepath], f"{folder_path}/parts", temporary_filepath)
+        os.replace(temporary_filepath, target_filepath)
+
+        logging.info(f"Assembled {len(render_parts)} parts into a single highlight video for {game}.")
+
+    def edit_game_preview_video(self, game: GameVod) -> None:
+        """
+        Edit the full VOD of the game into a low resolution preview of the highlight video that can be checked before
+        the final render. The preview has no crossfades or post game statistics, so it only takes a few seconds.
+        """
+        folder_path = get_match_folder_path(game.match)
+        Path(f"{folder_path}/previews").mkdir(parents=True, exist_ok=True)
+        logging.info(f"Creating a preview highlight video for {game} at {folder_path}/previews.")
+
+        offset = self.get_game_start_offset(game)
+        segments = self.get_highlight_segments(self.select_highlights(game), offset)
+
+        vod_filepath = f"{folder_path}/vods/{game.filename}"
+        render_preview(vod_filepath, segments, f"{folder_path}/previews/{get_preview_video_filename(game)}")
+
+    def get_game_start_offset(self, game: GameVod) -> int:
+        """Return how many seconds there are in the VOD before the game starts, reusing the offset if already found."""
+        if game.game_start_offset is None:
+            game.game_start_offset = self.find_game_starting_point(game)
+            game.save(update_fields=["game_start_offset"])
+
+        return game.game_start_offset
+
+    @staticmethod
+    def create_match_video(match: Match) -> bool:
+        """
+        Combine the highlight video for each game of the match into a single full highlight video. Return False if the
+        match is not finished or if a highlight video is still missing for one of the games.
+        """
+        folder_path = get_match_folder_path(match)
+        games = match.gamevod_set.order_by("game_count")
+
+        if not match.finished:
+            return False
+
+        if any(not os.path.exists(f"{folder_path}/highlights/{get_highlight_video_filename(game)}") for game in games):
+            logging.info(f"Not all highlight videos for {match} are ready to be combined yet.")
+            return False
+
+        # The games of the match finish on different render workers, so only the first to see every game video done
+        # combines them. The match is ready to be combined again when the final render of one of its games starts.
+        combining = Match.objects.filter(id=match.id, video_status=Match.VideoStatus.READY).update(
+            video_status=Match.VideoStatus.COMBINING
+        )
+
+        if not combining:
+            logging.info(f"The highlight videos for {match} are already being combined.")
+            return False
+
+        try:
+            combine_game_videos(match, games, folder_path)
+        except Exception:
+            Match.objects.filter(id=match.id).update(video_status=Match.VideoStatus.READY)
+            raise
+
+        Match.objects.filter(id=match.id, video_status=Match.VideoStatus.COMBINING).update(
+            video_status=Match.VideoStatus.COMBINED
+        )
+
+        # The game videos are kept until the match video is uploaded, so a re-rendered game can be combined again.
+        return True
+
+    def edit_and_upload_video(self, game: GameVod, preview: bool = False):
+        """
+        Using the highlights edit the full VODs into a highlight video and upload it to YouTube. If preview, only the
+        preview of the game is rendered, and the final render and upload is done when the preview is approved.
+        """
+        if preview:
+            self.edit_game_preview_video(game)
+            return
+
+        Match.objects.filter(id=game.match.id).update(video_status=Match.VideoStatus.READY)
+        self.edit_game_video(game)
+
+        if self.create_match_video(game.match):
             add_post_match_video_metadata(game.match)
-            self.upload_highlight_video(f"{folder_path}/highlights.mkv", game.match.videometadata)
+
+            self.upload_highlight_video(get_match_video_filepath(game.match), game.match.videometadata)
+            remove_game_highlight_videos(game.match)
+
+
+def combine_game_videos(match: Match, games: QuerySet[GameVod], folder_path: str) -> None:
+    """Concatenate the highlight videos of the games, in the order they were played, into the match video."""
+    # The games are always combined in the order they were played, regardless of the order they were rendered in.
+    with open(f"{folder_path}/highlights/highlights.txt", "w") as highlights_txt:
+        highlights_txt.writelines([f"file '{get_highlight_video_filename(game)}'\n" for game in games])
+
+    # Concatenate straight into a faststart MP4, so the game videos are only read and written once.
+    match_video_filepath = get_match_video_filepath(match)
+    temporary_filepath = get_temporary_filepath(match_video_filepath)
+
+    cmd = f"ffmpeg -nostdin -y -f concat -i {folder_path}/highlights/highlights.txt -codec copy " \
+          f"-movflags +faststart {temporary_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+
+    os.replace(temporary_filepath, match_video_filepath)
+
+    logging.info(f"Combined {games.count()} highlight videos into a single full highlight video for {match}.")
 
 
-def add_highlight_to_selected(selected_highlights: list[Highlight], highlight: Highlight | None,
-                              highlights: list[Highlight]) -> int:
-    """Add the given highlight to the selected highlights and return the number of seconds added."""
-    added_duration = 0
+def remove_game_highlight_videos(match: Match) -> None:
+    """Remove the highlight videos of the games after the combined match video is uploaded."""
+    shutil.rmtree(f"{get_match_folder_path(match)}/highlights", ignore_errors=True)
 
-    if highlight is not None and highlight not in selected_highlights:
-        selected_highlights.append(highlight)
-        added_duration += highlight.duration_seconds + 7  # Adding 7 seconds to account for the full clip length.
 
-        round_highlights = [h for h in highlights if h.round_number == highlight.round_number]
-        round_last_highlight = sorted(round_highlights, key=lambda h: h.start_time_seconds, reverse=True)[0]
+def get_highlight_video_filename(game: GameVod) -> str:
+    """Return the filename of the highlight video for the single game."""
+    return game.filename.replace(".mkv", "_highlights.mkv")
 
-        # If a highlight from a round is included, also include the last highlight to show how the round ends.
-        if highlight.id != round_last_highlight.id and round_last_highlight not in selected_highlights:
-            selected_highlights.append(round_last_highlight)
-            added_duration += round_last_highlight.duration_seconds + 7  # Adding 7 seconds to account for the full clip length.
 
-    return added_duration
+def get_match_video_filepath(match: Match) -> str:
+    """Return the filepath of the full highlight video of the match."""
+    return f"{get_match_folder_path(match)}/highlights.mp4"
 
 
-def combine_clips_with_crossfade(folder_path: str, target_filename: str, clip_durations: list[float], game_count: int):
+def get_match_folder_path(match: Match) -> str:
+    """Return the folder of the files related to the match in the render storage, which the render workers share."""
+    return get_render_storage().get_path(match.create_unique_folder_path())
+
+
+def get_temporary_filepath(filepath: str) -> str:
+    """
+    Return the filepath that the file should be written to before it is complete. It is in the same folder as the file,
+    so it can be renamed to the file without copying, and it keeps the extension, so ffmpeg can find the format.
+    """
+    root, extension = os.path.splitext(filepath)
+    return f"{root}.partial{extension}"
+
+
+def get_preview_video_filename(game: GameVod) -> str:
+    """Return the filename of the preview of the highlight video for the single game."""
+    return game.filename.replace(".mkv", "_preview.mp4")
+
+
+def render_with_clips(vod_filepath: str, segments: list[tuple[int, int]], bumper_filepath: str, folder_path: str,
+                      target_filepath: str, game_count: int) -> None:
+    """
+    Cut each segment into a separate clip and combine the clips and the post game statistics bumper. The clips are kept
+    in the clip cache, so only the segments that changed since the last render of the VOD are cut again.
+    """
+    clips = [(start, duration, get_cached_clip_filepath(vod_filepath, "mkv", "clip", start, duration))
+             for start, duration in segments]
+    clips_to_extract = [clip for clip in clips if not is_clip_cached(clip[2])]
+
+    extract_clips(vod_filepath, clips_to_extract)
+    logging.info(f"Cut {len(clips_to_extract)} highlight clips from {vod_filepath} and reused "
+                 f"{len(clips) - len(clips_to_extract)} clips from the clip cache.")
+
+    # The bumper is combined as the last clip, so the last highlight clip does not have to be re-encoded to add it.
+    clip_filepaths = [clip_filepath for _, _, clip_filepath in clips]
+    clip_durations = [probe(clip_filepath)["duration"] for clip_filepath in clip_filepaths]
+    combine_clips_with_crossfade(folder_path, target_filepath, clip_filepaths + [bumper_filepath],
+                                 clip_durations + [STATISTICS_DURATION], game_count)
+
+    evict_clips(clip_filepaths)
+
+
+def render_preview(vod_filepath: str, segments: list[tuple[float, float]], target_filepath: str) -> None:
+    """
+    Render a low resolution preview of the highlight video in a single fast ffmpeg invocation. The segments are
+    concatenated directly, without crossfades or the post game statistics, since the preview is only used to check
+    which parts of the VOD are included.
+    """
+    inputs = get_segment_inputs(vod_filepath, segments)
+
+    filters = []
+    for i, (_start, duration) in enumerate(segments):
+        filters.append(f"[{i}:v]trim=duration={duration},setpts=PTS-STARTPTS,scale=-2:{PREVIEW_HEIGHT}[v{i}]")
+        filters.append(f"[{i}:a]atrim=duration={duration},asetpts=PTS-STARTPTS[a{i}]")
+
+    concat_inputs = "".join([f"[v{i}][a{i}]" for i in range(len(segments))])
+    filters.append(f"{concat_inputs}concat=n={len(segments)}:v=1:a=1[video][audio]")
+
+    cmd = f"ffmpeg -nostdin -y {inputs} -filter_complex '{'; '.join(filters)}' -map '[video]' -map '[audio]' " \
+          f"-c:v libx264 -preset ultrafast -crf 32 -c:a aac -b:a 96k -movflags +faststart {target_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+
+
+def render_with_filtergraph(vod_filepath: str, segments: list[tuple[float, float]], bumper_filepath: str,
+                            target_filepath: str) -> None:
+    """
+    Render the highlight video in a single ffmpeg invocation. Each segment is read straight from the VOD and trimmed
+    to its exact duration, and the segments and the post game statistics bumper are combined with crossfades. This
+    decodes each segment once and encodes the video once, without intermediate clips.
+    """
+    vod_probe = probe(vod_filepath)
+
+    inputs = f"{get_segment_inputs(vod_filepath, segments)} -i {bumper_filepath}"
+    filters, audio_label = create_crossfade_filters(segments, vod_probe["frame_rate"], "yuv420p", True)
+
+    # The codecs are set explicitly, since the MKV defaults would give Vorbis audio that cannot be concatenated into the
+    # MP4 of the match with the H.264 and AAC game videos of the other render modes.
+    cmd = f"ffmpeg -y {inputs} -filter_complex '{'; '.join(filters)}' -map '[video]' -map '[{audio_label}]' " \
+          f"-shortest -c:v libx264 -preset superfast -crf 27 -pix_fmt yuv420p -c:a aac -b:a 128k {target_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+
+
+def render_with_smart_render(vod_filepath: str, segments: list[tuple[float, float]], bumper_filepath: str,
+                             bumper_tail_filepath: str, folder_path: str, target_filepath: str) -> None:
+    """
+    Render the highlight video by only re-encoding the parts of the video that need new pixels. The interior of each
+    segment is copied from the VOD between keyframes, while the parts around each crossfade, including the first second
+    of the post game statistics bumper, are re-encoded with the same codec parameters as the VOD. The parts are written
+    as MPEG-TS, so they can be joined with the rest of the bumper with the concat demuxer without re-encoding. VODs that
+    are not H.264 are rendered with the filtergraph.
+    """
+    vod_probe = probe(vod_filepath)
+
+    if vod_probe["video_codec"] != "h264":
+        logging.info(f"{vod_filepath} is {vod_probe['video_codec']}, not h264. Rendering with the filtergraph instead.")
+        render_with_filtergraph(vod_filepath, segments, bumper_filepath, target_filepath)
+        return
+
+    parts = split_segments_at_keyframes(segments, VideoIndex.load(vod_filepath))
+    logging.info(f"Smart rendering {len(segments)} segments as {len([p for p in parts if p[0] == 'copy'])} copied "
+                 f"and {len([p for p in parts if p[0] == 'encode'])} re-encoded parts.")
+
+    part_filepaths = []
+    cached_count = 0
+    for count, (part_type, intervals) in enumerate(parts):
+        # Only the last part fades into the first second of the post game statistics bumper.
+        part_bumper_filepath = bumper_filepath if count + 1 == len(parts) else None
+
+        # The parts are kept in the clip cache, so only the parts of the segments that changed are cut or encoded again.
+        part_filepath = get_cached_clip_filepath(vod_filepath, "ts", part_type, intervals, part_bumper_filepath)
+        part_filepaths.append(part_filepath)
+
+        if is_clip_cached(part_filepath):
+            cached_count += 1
+        else:
+            render_video_part(vod_filepath, part_type, intervals, part_bumper_filepath, part_filepath)
+
+    logging.info(f"Reused {cached_count} of {len(parts)} parts from the clip cache.")
+    evict_clips(part_filepaths)
+
+    concat_video_parts(part_filepaths + [bumper_tail_filepath], f"{folder_path}/parts", target_filepath)
+
+
+def render_video_part(vod_filepath: str, part_type: str, intervals: list[tuple[float, float]],
+                      bumper_filepath: str | None, part_filepath: str) -> None:
+    """
+    Render a part of the smart render to the filepath. A copied part is a single interval copied from the VOD, while an
+    encoded part joins its intervals with crossfades and, if there is a bumper, fades into its first second.
+    """
+    vod_probe = probe(vod_filepath)
+    audio_stream = vod_probe["audio_streams"][0]
+    temporary_filepath = get_temporary_filepath(part_filepath)
+
+    if part_type == "copy":
+        start, end = intervals[0]
+        cmd = f"ffmpeg -nostdin -y -ss {start} -i {vod_filepath} -t {end - start} -map 0:v:0 -map 0:a:0 -c copy " \
+              f"-bsf:v h264_mp4toannexb -avoid_negative_ts make_zero -f mpegts {temporary_filepath}"
+    else:
+        segments_to_encode = [(start, end - start) for start, end in intervals]
+        inputs = get_segment_inputs(vod_filepath, segments_to_encode)
+
+        if bumper_filepath is not None:
+            inputs += f" -t 1 -i {bumper_filepath}"
+
+        filters, audio_label = create_crossfade_filters(segments_to_encode, vod_probe["frame_rate"],
+                                                        vod_probe["pix_fmt"], bumper_filepath is not None)
+
+        # The parameters of the re-encoded parts should match the VOD, so the decoder can switch between them.
+        cmd = f"ffmpeg -nostdin -y {inputs} -filter_complex '{'; '.join(filters)}' -map '[video]' " \
+              f"-map '[{audio_label}]' -shortest -c:v libx264 -preset superfast -crf 27 " \
+              f"-pix_fmt {vod_probe['pix_fmt']} -c:a aac -ar {audio_stream['sample_rate']} " \
+              f"-ac {audio_stream['channels']} -f mpegts {temporary_filepath}"
+
+    subprocess.run(cmd, shell=True, check=True)
+    os.replace(temporary_filepath, part_filepath)
+
+
+def concat_video_parts(part_filepaths: list[str], parts_folder_path: str, target_filepath: str) -> None:
+    """Join the MPEG-TS parts in the given order with the concat demuxer, without re-encoding."""
+    Path(parts_folder_path).mkdir(parents=True, exist_ok=True)
+
+    with open(f"{parts_folder_path}/parts.txt", "w") as parts_txt:
+        parts_txt.writelines([f"file '{os.path.abspath(part_filepath)}'\n" for part_filepath in part_filepaths])
+
+    cmd = f"ffmpeg -nostdin -y -f concat -safe 0 -i {parts_folder_path}/parts.txt -c copy -bsf:a aac_adtstoasc " \
+          f"{target_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+
+    shutil.rmtree(parts_folder_path)
+
+
+def split_segments_at_keyframes(segments: list[tuple[float, float]],
+                                video_index: VideoIndex) -> list[tuple[str, list[tuple[float, float]]]]:
+    """
+    Split the segments into parts that can be copied and parts that must be re-encoded. A part is a list of
+    (start, end) intervals in the VOD. Copied parts are a single interval between two keyframes inside a segment.
+    Re-encoded parts are the intervals around each crossfade, joined with a crossfade, and the end of the last segment
+    that fades into the post game statistics. Segments without keyframes far enough inside them are fully re-encoded.
+    """
+    parts = []
+    intervals_to_encode = []
+
+    for count, (start, duration) in enumerate(segments):
+        end = start + duration
+
+        # Leave room for the crossfade into and out of the segment. The last segment fades into the statistics bumper.
+        copy_start = video_index.keyframe_after(start if count == 0 else start + 1)
+        copy_end = video_index.keyframe_before(end - 1)
+
+        if copy_start is None or copy_end is None or copy_end - copy_start < MIN_COPY_SECONDS:
+            intervals_to_encode.append((start, end))
+            continue
+
+        if copy_start > start:
+            intervals_to_encode.append((start, copy_start))
+
+        if len(intervals_to_encode) > 0:
+            parts.append(("encode", intervals_to_encode))
+
+        parts.append(("copy", [(copy_start, copy_end)]))
+        intervals_to_encode = [(copy_end, end)]
+
+    parts.append(("encode", intervals_to_encode))
+
+    return parts
+
+
+def get_statistics_bumper(statistics_image_filepath: str, vod_probe: VideoProbe, folder_path: str) -> tuple[str, str]:
+    """
+    Return the filepath of the post game statistics bumper and of the bumper without its first second. The bumper is
+    encoded once with the frame rate, resolution and pixel format of the VOD and a silent audio track, so it can be
+    joined with the highlights. It is cached by the content of the image and the stream parameters, so re-renders of
+    the game reuse it.
+    """
+    audio_stream = vod_probe["audio_streams"][0]
+    stream_parameters = f"{vod_probe['width']}x{vod_probe['height']}:{vod_probe['frame_rate']}:{vod_probe['pix_fmt']}:" \
+                        f"{audio_stream['sample_rate']}:{audio_stream['channels']}"
+
+    with open(statistics_image_filepath, "rb") as image_file:
+        digest = hashlib.sha256(image_file.read() + stream_parameters.encode()).hexdigest()[:16]
+
+    bumper_filepath = f"{folder_path}/statistics_{digest}.mkv"
+    bumper_tail_filepath = f"{folder_path}/statistics_{digest}_tail.ts"
+
+    if os.path.exists(bumper_filepath) and os.path.exists(bumper_tail_filepath):
+        logging.info(f"Reusing post game statistics bumper at {bumper_filepath}.")
+        return bumper_filepath, bumper_tail_filepath
+
+    Path(folder_path).mkdir(parents=True, exist_ok=True)
+
+    # A keyframe is forced after the first second, so the tail can be cut from the bumper without re-encoding.
+    temporary_filepath = get_temporary_filepath(bumper_filepath)
+    cmd = f"ffmpeg -nostdin -y -loop 1 -framerate {vod_probe['frame_rate']} -t {STATISTICS_DURATION} " \
+          f"-i {statistics_image_filepath} -f lavfi -t {STATISTICS_DURATION} " \
+          f"-i anullsrc=sample_rate={audio_stream['sample_rate']}:channel_layout=stereo " \
+          f"-vf scale={vod_probe['width']}:{vod_probe['height']},setsar=1,format={vod_probe['pix_fmt']} " \
+          f"-c:v libx264 -preset superfast -crf 27 -force_key_frames 0,1 -c:a aac -ar {audio_stream['sample_rate']} " \
+          f"-ac {audio_stream['channels']} {temporary_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+    os.replace(temporary_filepath, bumper_filepath)
+
+    temporary_filepath = get_temporary_filepath(bumper_tail_filepath)
+    cmd = f"ffmpeg -nostdin -y -ss 1 -i {bumper_filepath} -c copy -bsf:v h264_mp4toannexb " \
+          f"-avoid_negative_ts make_zero -f mpegts {temporary_filepath}"
+    subprocess.run(cmd, shell=True, check=True)
+    os.replace(temporary_filepath, bumper_tail_filepath)
+
+    logging.info(f"Created post game statistics bumper at {bumper_filepath}.")
+
+    return bumper_filepath, bumper_tail_filepath
+
+
+def get_segment_inputs(vod_filepath: str, segments: list[tuple[float, float]]) -> str:
+    """Return the ffmpeg inputs for the segments of the VOD."""
+    # Seeking on the input only decodes from the keyframe before the segment instead of from the start of the VOD.
+    return " ".join([f"-ss {start} -t {duration} -i {vod_filepath}" for start, duration in segments])
+
+
+def create_crossfade_filters(segments: list[tuple[float, float]], frame_rate: Fraction, pix_fmt: str,
+                             with_statistics: bool) -> tuple[list[str], str]:
+    """
+    Return the filters that trim each segment input to its exact duration and combine the segments with a 1-second
+    crossfade. If with statistics, the last segment fades into the post game statistics bumper, which is the input
+    after the segments. The video is output as [video] and the returned label is the output of the audio.
+    """
+    filters = []
+
+    # Normalize the inputs since xfade requires the same frame rate, size, pixel format and timebase.
+    for i, (_start, duration) in enumerate(segments):
+        filters.append(f"[{i}:v]trim=duration={duration},setpts=PTS-STARTPTS,fps={frame_rate},format={pix_fmt},"
+                       f"settb=AVTB[v{i}]")
+        filters.append(f"[{i}:a]atrim=duration={duration},asetpts=PTS-STARTPTS[a{i}]")
+
+    # Add a 1-second video crossfade and audio crossfade between each segment.
+    fade_offset = 0
+    video_label, audio_label = "v0", "a0"
+    for i in range(1, len(segments)):
+        fade_offset += segments[i - 1][1] - 1
+
+        filters.append(f"[{video_label}][v{i}]xfade=transition=fade:duration=1:offset={fade_offset}[vfade{i}]")
+        filters.append(f"[{audio_label}][a{i}]acrossfade=d=0.96[afade{i}]")
+        video_label, audio_label = f"vfade{i}", f"afade{i}"
+
+    if with_statistics:
+        filters.append(f"[{len(segments)}:v]setpts=PTS-STARTPTS,fps={frame_rate},format={pix_fmt},settb=AVTB[statistics]")
+        filters.append(f"[{len(segments)}:a]asetpts=PTS-STARTPTS[statistics_audio]")
+
+        # Fade from the last second of the last segment into the post game statistics bumper.
+        fade_offset += segments[-1][1] - 1
+        filters.append(f"[{video_label}][statistics]xfade=transition=fade:duration=1:offset={fade_offset},"
+                       f"format={pix_fmt}[video]")
+        filters.append(f"[{audio_label}][statistics_audio]acrossfade=d=1[audio]")
+        audio_label = "audio"
+    else:
+        filters.append(f"[{video_label}]null[video]")
+
+    return filters, audio_label
+
+
+def extract_clips(vod_filepath: str, clips: list[tuple[int, int, str]]) -> None:
+    """
+    Cut each (start, duration, clip filepath) clip out of the VOD. The clips are cut in parallel since most of the time
+    is spent on starting ffmpeg and seeking in the VOD. Each clip is written to a temporary file that is renamed when
+    done, so a clip that could not be cut is never left at the filepath. If a clip cannot be cut, the error is raised.
+    """
+    def extract_clip(start: int, duration: int, clip_filepath: str) -> None:
+        temporary_filepath = get_temporary_filepath(clip_filepath)
+
+        try:
+            cmd = f"ffmpeg -nostdin -y -ss {start} -i {vod_filepath} -to {duration} -c copy {temporary_filepath}"
+            subprocess.run(cmd, shell=True, check=True)
+            os.replace(temporary_filepath, clip_filepath)
+        finally:
+            if os.path.exists(temporary_filepath):
+                os.remove(temporary_filepath)
+
+    with ThreadPoolExecutor(max_workers=settings.CLIP_EXTRACTION_WORKERS) as executor:
+        futures = [executor.submit(extract_clip, *clip) for clip in clips]
+
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            logging.exception(f"Failed to cut the highlight clips out of {vod_filepath}.")
+
+            # Wait for the clips that are already being cut to finish so their temporary files are removed.
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            raise
+
+
+def combine_clips_with_crossfade(folder_path: str, target_filepath: str, clip_filepaths: list[str],
+                                 clip_durations: list[float], game_count: int):
     """Combine the given clips, adding a crossfade effect between each clip for cleaner transitions."""
     Path(f"{folder_path}/highlights/game_{game_count}").mkdir(parents=True, exist_ok=True)
 
@@ -192,9 +690,10 @@ def combine_clips_with_crossfade(folder_path: str, target_filename: str, clip_du
         a_filter_end = "" if i + 1 == len(file_ids) - 1 else f"[afade{i + 1}]"
         audio_filters.append(f"{a_filter_start}[{i + 1}:a]acrossfade=d=0.96{a_filter_end}")
 
-    clips_part = " ".join([f'-i {folder_path}/clips/clip_{i + 1}.mkv' for i in file_ids])
+    clips_part = " ".join([f'-i {clip_filepath}' for clip_filepath in clip_filepaths])
 
     # Combine the clips into a video file with a 1-second video crossfade between each clip.
+    target_filename = os.path.basename(target_filepath)
     video_filename = target_filename.replace('.mkv', f'_video.mkv')
     video_cmd = f"ffmpeg {clips_part} -filter_complex '{'; '.join(video_filters)}' " \
                 f"-preset superfast -crf 27 -an {folder_path}/highlights/game_{game_count}/{video_filename}"
@@ -208,22 +707,5 @@ def combine_clips_with_crossfade(folder_path: str, target_filename: str, clip_du
 
     # Combine the created video and audio files into a single complete highlight video.
     combine_cmd = f"ffmpeg -i {folder_path}/highlights/game_{game_count}/{video_filename} -i " \
-                  f"{folder_path}/highlights/game_{game_count}/{audio_filename} -c copy -movflags +faststart " \
-                  f"{folder_path}/highlights/{target_filename}"
+                  f"{folder_path}/highlights/game_{game_count}/{audio_filename} -c copy {target_filepath}"
     subprocess.run(combine_cmd, shell=True)
-
-
-def get_video_length(filepath: str) -> float:
-    """Use ffprope to get the video length in seconds."""
-    cmd = f"ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 {filepath}"
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
-
-    return float(result.stdout)
-
-
-def get_video_frame_rate(filepath: str) -> float:
-    """Use ffprope to get the video frame rate in frames per second."""
-    cmd = f"ffprobe -v 0 -of csv=p=0 -select_streams v:0 -show_entries stream=r_frame_rate {filepath}"
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
-
-    return eval(result.stdout.strip().splitlines()[0])
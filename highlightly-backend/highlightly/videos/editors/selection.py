@@ -0,0 +1,65 @@
+from highlights.models import Highlight
+
+# Added to the duration of each selected highlight to account for the full clip length.
+EXTRA_CLIP_SECONDS = 7
+
+
+class HighlightSelection:
+    """
+    The highlights selected for a highlight video. The best and last highlight of each round are indexed once when the
+    selection is created, and the selected highlights are tracked by id, so selecting a highlight takes constant time
+    instead of scanning and sorting all highlights of the round.
+    """
+
+    def __init__(self, highlights: list[Highlight]) -> None:
+        self.highlights: list[Highlight] = []
+        self.selected_ids: set[int] = set()
+        self.duration_seconds = 0
+
+        # The highlights are sorted with the best highlight first, so the first highlight seen in a round is the best.
+        self.best_round_highlights: dict[int, Highlight] = {}
+        self.last_round_highlights: dict[int, Highlight] = {}
+
+        for highlight in highlights:
+            self.best_round_highlights.setdefault(highlight.round_number, highlight)
+
+            last_highlight = self.last_round_highlights.get(highlight.round_number)
+            if last_highlight is None or highlight.start_time_seconds > last_highlight.start_time_seconds:
+                self.last_round_highlights[highlight.round_number] = highlight
+
+    def add(self, highlight: Highlight | None) -> None:
+        """Add the highlight to the selection, together with the last highlight of the round if not already selected."""
+        if highlight is None or highlight.id in self.selected_ids:
+            return
+
+        self.select(highlight)
+
+        # If a highlight from a round is included, also include the last highlight to show how the round ends.
+        round_last_highlight = self.last_round_highlights[highlight.round_number]
+        if round_last_highlight.id not in self.selected_ids:
+            self.select(round_last_highlight)
+
+    def select(self, highlight: Highlight) -> None:
+        self.highlights.append(highlight)
+        self.selected_ids.add(highlight.id)
+        self.duration_seconds += highlight.duration_seconds + EXTRA_CLIP_SECONDS
+
+
+def select_highlights_greedily(highlights: list[Highlight], rounds_to_include: list[int],
+                               wanted_video_length_seconds: float) -> HighlightSelection:
+    """
+    Select the best highlight of each round that should always be included, and then keep adding the highlights in the
+    given order, best first, until out of highlights or the wanted video length is reached.
+    """
+    selection = HighlightSelection(highlights)
+
+    for round_number in rounds_to_include:
+        selection.add(selection.best_round_highlights.get(round_number))
+
+    for highlight in highlights:
+        selection.add(highlight)
+
+        if selection.duration_seconds >= wanted_video_length_seconds:
+            break
+
+    return selection
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from videos.benchmarks.selection import run_selection_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the highlight selection of the editor with synthetic highlights of increasing size."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000, 100000],
+                            help="Number of synthetic highlights in each run.")
+        parser.add_argument("--rounds", type=int, default=30, help="Number of rounds the highlights are spread over.")
+        parser.add_argument("--repeats", type=int, default=5, help="Number of times each selection is timed.")
+
+    def handle(self, *args, **options) -> None:
+        results = run_selection_benchmark(options["sizes"], options["rounds"], options["repeats"])
+        self.stdout.write(json.dumps(results, indent=2))
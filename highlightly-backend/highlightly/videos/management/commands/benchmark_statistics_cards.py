@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from videos.benchmarks.statistics_cards import run_statistics_card_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the latency and memory usage of rendering post game statistics cards with each renderer."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--workdir", default="media/benchmarks/statistics_cards", help="Folder for the cards.")
+        parser.add_argument("--cards", type=int, default=20, help="Number of cards rendered with each renderer.")
+
+    def handle(self, *args, **options) -> None:
+        results = run_statistics_card_benchmark(options["workdir"], options["cards"])
+        self.stdout.write(json.dumps(results, indent=2))
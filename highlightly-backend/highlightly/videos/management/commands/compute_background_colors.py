@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from scrapers.models import Organization
+from videos.metadata.pre_match import create_logo_background_color
+
+
+class Command(BaseCommand):
+    help = "Compute the thumbnail background color of every organization that does not have a background color yet."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--all", action="store_true", help="Also recompute existing background colors.")
+
+    def handle(self, *args, **options) -> None:
+        organizations = Organization.objects.exclude(logo_filename__isnull=True)
+        if not options["all"]:
+            organizations = organizations.filter(background_color__isnull=True)
+
+        updated_organizations = []
+        for organization in organizations:
+            logo_filepath = f"media/teams/{organization.logo_filename}"
+
+            try:
+                organization.background_color = create_logo_background_color(logo_filepath)
+                updated_organizations.append(organization)
+            except OSError as e:
+                self.stderr.write(f"Could not compute the background color of {organization}: {e}")
+
+        Organization.objects.bulk_update(updated_organizations, ["background_color"], batch_size=500)
+        self.stdout.write(f"Computed the background color of {len(updated_organizations)} organizations.")
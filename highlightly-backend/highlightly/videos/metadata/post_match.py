@@ -1,16 +1,22 @@
 import logging
 import os
 import random
-import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
-import pandas as pd
 import twitch
+from django.conf import settings
 from PIL import Image
-from html2image import Html2Image
 
-from scrapers.models import Match, GameVod, Team, Game
-from videos.metadata.util import create_match_frame_part
+from highlights.models import FrameCandidate
+from scrapers.models import Match, GameVod, Team, Game, PlayerGameStatistics
+from scrapers.statistics import get_match_player_statistics
+from util.video_index import VideoIndex
+from videos.metadata.statistics_card import render_html_card, draw_statistics_card, get_memory_usage_mb
+from videos.metadata.pre_match import get_video_thumbnail_filepath
+from videos.metadata.util import create_match_frame_part, get_thumbnail_variant_filepath
 from videos.models import VideoMetadata
 
 
@@ -21,19 +27,30 @@ def add_post_match_video_metadata(match: Match):
     and a frame from the match for the thumbnail.
     """
     logging.info(f"Creating post-match video metadata for {match}.")
-
     video_metadata = VideoMetadata.objects.get(match=match)
+
+    add_post_match_text(match, video_metadata)
+
+    # Add a frame from the match and the tournament logo to the thumbnail.
+    finish_video_thumbnail(match, video_metadata, None)
+
+    video_metadata.save(update_fields=["description", "tags"])
+
+
+def add_post_match_text(match: Match, video_metadata: VideoMetadata) -> None:
+    """
+    Add the tournament context, the players, and the credit for the VOD to the description and tags of the video
+    metadata without saving it.
+    """
     new_tags = video_metadata.tags
     new_description = video_metadata.description
 
-    # Extract the statistics for each time into a dataframe.
-    statistics_folder_path = match.create_unique_folder_path("statistics")
+    # Find the in-game names of the players that played in any of the games in the match.
     game_1: GameVod = match.gamevod_set.first()
-    team_1_statistics = pd.read_csv(f"{statistics_folder_path}/{game_1.team_1_statistics_filename}")
-    team_2_statistics = pd.read_csv(f"{statistics_folder_path}/{game_1.team_2_statistics_filename}")
+    player_statistics = list(get_match_player_statistics(match))
 
-    team_1_in_game_names = get_team_in_game_names(team_1_statistics, match.team_1.game)
-    team_2_in_game_names = get_team_in_game_names(team_2_statistics, match.team_2.game)
+    team_1_in_game_names = [player["in_game_name"] for player in player_statistics if player["team"] == match.team_1_id]
+    team_2_in_game_names = [player["in_game_name"] for player in player_statistics if player["team"] == match.team_2_id]
 
     # Add the tournament context to the description and tags.
     new_description = new_description.replace("TOURNAMENT_CONTEXT", match.tournament_context)
@@ -58,25 +75,8 @@ def add_post_match_video_metadata(match: Match):
 
     new_description = new_description.replace("CREDIT_URL", url)
 
-    # Add a frame from the match and the tournament logo to the thumbnail.
-    finish_video_thumbnail(match, video_metadata, None)
-
     video_metadata.description = new_description
     video_metadata.tags = new_tags
-    video_metadata.save()
-
-
-def get_team_in_game_names(team_statistics: pd.DataFrame, game: Game) -> list[str]:
-    """Given a dataframe with the team statistics, extract the in-game names for all the players."""
-    player_names: pd.Series = team_statistics.iloc[:, 0]
-
-    if game == Game.COUNTER_STRIKE or game == Game.LEAGUE_OF_LEGENDS:
-        extract_in_game_name = lambda match: re.search("'(.*?)'", match.group()).group().strip("'")
-        in_game_names: pd.Series = player_names.str.replace("[\s\S]+", extract_in_game_name, regex=True)
-    else:
-        in_game_names = player_names
-
-    return in_game_names.tolist()
 
 
 def get_match_vod_channel_name(match: Match) -> str:
@@ -91,48 +91,174 @@ def get_match_vod_channel_name(match: Match) -> str:
 
 # TODO: Generate some eye catching text based on the context of the match and put it in the top of the match frame.
 def finish_video_thumbnail(match: Match, video_metadata: VideoMetadata, match_frame_time: float | None) -> None:
-    """Replace the previous video thumbnail with a new file that has a match frame and the tournament logo added."""
-    thumbnail_folder = match.create_unique_folder_path()
-    thumbnail = Image.open(f"{thumbnail_folder}/{video_metadata.thumbnail_filename}")
+    """
+    Replace the previous video thumbnail with a new file that has a match frame and the tournament logo added. If no
+    match frame time is given, the best frame candidate of the first game in the match is used.
+    """
+    if match_frame_time is None:
+        match_frame_time = select_match_frame_time(match)
+
+    # Use the variant of the thumbnail with the match frame if it has already been rendered.
+    thumbnail_filepath = get_video_thumbnail_filepath(video_metadata)
+    variant_filepath = get_thumbnail_variant_filepath(match, video_metadata, match_frame_time)
+
+    if os.path.exists(variant_filepath):
+        shutil.copyfile(variant_filepath, thumbnail_filepath)
+    else:
+        render_video_thumbnail(match, thumbnail_filepath, match_frame_time, thumbnail_filepath)
 
-    # Retrieve a frame right before a kill in the first game in the match.
-    frame_filepath = f"{thumbnail_folder}/{video_metadata.thumbnail_filename.replace('.png', '_frame.png')}"
-    match_frame_time: float = save_match_frame(match, frame_filepath, match_frame_time)
     video_metadata.thumbnail_match_frame_time = match_frame_time
-    video_metadata.save()
+    video_metadata.save(update_fields=["thumbnail_match_frame_time"])
+    logging.info(f"Added match frame and tournament logo to thumbnail at {video_metadata.thumbnail_filename}.")
+
+
+def render_video_thumbnail(match: Match, thumbnail_filepath: str, match_frame_time: float, filepath: str) -> None:
+    """Add the match frame at the given time and the tournament logo to the thumbnail and save it to the filepath."""
+    tournament_logo_filepath = f"media/tournaments/{match.tournament.logo_filename}"
+    compose_video_thumbnail(thumbnail_filepath, get_match_frame_source(match, match_frame_time), match.team_1.game,
+                            tournament_logo_filepath, filepath)
+
+
+def compose_video_thumbnail(thumbnail_filepath: str, match_frame_source: tuple[str, float | None], game: Game,
+                            tournament_logo_filepath: str, filepath: str) -> None:
+    """
+    Add the match frame from the source and the tournament logo to the thumbnail and save it to the filepath. Only
+    files are used, without database queries, so thumbnails can be composed in worker threads.
+    """
+    thumbnail = Image.open(thumbnail_filepath)
+
+    # Each render extracts frames that are not frame candidates to its own file, so renders can run in parallel.
+    frame_filepath = filepath.replace(".png", "_frame.png")
+    match_frame_filepath = save_match_frame(match_frame_source, frame_filepath)
 
     # Add the frame from the match to the right 3/5 of the thumbnail.
-    match_frame_part = create_match_frame_part(frame_filepath, 360 + 160, match.team_1.game)
+    match_frame_part = create_match_frame_part(match_frame_filepath, 360 + 160, game)
     thumbnail.paste(match_frame_part, (360 + 160, 0))
-    os.remove(frame_filepath)
+
+    if os.path.exists(frame_filepath):
+        os.remove(frame_filepath)
 
     # Add the tournament logo in the top right of the thumbnail.
-    tournament_logo = Image.open(f"media/tournaments/{match.tournament.logo_filename}").convert("RGBA")
+    tournament_logo = Image.open(tournament_logo_filepath).convert("RGBA")
     tournament_logo.thumbnail((150, 150), Image.ANTIALIAS)
     thumbnail.paste(tournament_logo, (1250 - tournament_logo.width, 30), tournament_logo)
 
-    thumbnail.save(f"{thumbnail_folder}/{video_metadata.thumbnail_filename}")
-    logging.info(f"Added match frame and tournament logo to thumbnail at {video_metadata.thumbnail_filename}.")
+    thumbnail.save(filepath)
+
+
+def select_match_frame_time(match: Match) -> float:
+    """
+    Return the time of the best frame candidate in the first game in the match. If the highlighter of the game does not
+    score frames, a random time within a random highlight is returned instead.
+    """
+    first_game: GameVod = match.gamevod_set.first()
+    best_candidate: FrameCandidate | None = first_game.framecandidate_set.order_by("-score").first()
+
+    if best_candidate is not None:
+        return best_candidate.frame_time
+
+    highlight = random.choice(first_game.highlight_set.all())
+    highlight_second = highlight.start_time_seconds + first_game.game_start_offset
+
+    return highlight_second + random.randint(0, highlight.duration_seconds)
 
 
-def save_match_frame(match: Match, frame_filepath: str, frame_time: float | None) -> float:
-    """Retrieve a frame right before a kill in the first game in the match and save it to the given filepath."""
-    # Select a random highlight from the highlights.
+def get_next_match_frame_time(match: Match, match_frame_time: float | None) -> float | None:
+    """
+    Return the time of the frame candidate after the given frame in the order of the score, starting over after the
+    last frame candidate. None is returned if the first game in the match has no frame candidates.
+    """
+    frame_times = list(match.gamevod_set.first().framecandidate_set.order_by("-score")
+                       .values_list("frame_time", flat=True))
+
+    if len(frame_times) == 0:
+        return None
+
+    if match_frame_time not in frame_times:
+        return frame_times[0]
+
+    return frame_times[(frame_times.index(match_frame_time) + 1) % len(frame_times)]
+
+
+def get_match_frame_source(match: Match, frame_time: float) -> tuple[str, float | None]:
+    """
+    Return where the frame at the given time in the first game in the match is found. This is the filepath of the frame
+    candidate at the time if there is one, otherwise the filepath of the VOD and the time of the frame in it.
+    """
+    first_game: GameVod = match.gamevod_set.first()
+    frame_candidate = first_game.framecandidate_set.filter(frame_time=frame_time).first()
+
+    if frame_candidate is not None:
+        return f"{match.create_unique_folder_path('frame_candidates')}/{frame_candidate.filename}", None
+
+    return f"{match.create_unique_folder_path('vods')}/{first_game.filename}", frame_time
+
+
+def save_match_frame(match_frame_source: tuple[str, float | None], frame_filepath: str) -> str:
+    """
+    Return the filepath of the match frame from the source. If the source is a VOD, the frame is extracted from the VOD
+    and saved to the given filepath.
+    """
+    source_filepath, frame_time = match_frame_source
     if frame_time is None:
-        first_game: GameVod = match.gamevod_set.first()
-        highlight = random.choice(first_game.highlight_set.all())
-        highlight_second = highlight.start_time_seconds + first_game.game_start_offset
-        frame_time = highlight_second + random.randint(0, highlight.duration_seconds)
+        return source_filepath
 
-    # Extract the frame from the VOD and save it.
-    vod_filepath = f"{match.create_unique_folder_path('vods')}/{match.gamevod_set.first().filename}"
-    video_capture = cv2.VideoCapture(vod_filepath)
-    video_capture.set(cv2.CAP_PROP_POS_FRAMES, 60 * frame_time)
+    # Extract the frame from the VOD and save it. The seek uses the time of the frame from the index, since OpenCV maps
+    # frame numbers to timestamps with the average frame rate, which is wrong for variable frame rate VODs.
+    video_index = VideoIndex.load(source_filepath)
+    video_capture = cv2.VideoCapture(source_filepath)
+    video_capture.set(cv2.CAP_PROP_POS_MSEC, video_index.frame_msec(video_index.frame_number_at(frame_time)))
 
     _res, frame = video_capture.read()
+    video_capture.release()
     cv2.imwrite(frame_filepath, frame)
 
-    return frame_time
+    return frame_filepath
+
+
+def create_thumbnail_variants(match: Match, video_metadata: VideoMetadata) -> list[float]:
+    """
+    Render the variants of the thumbnail with the next frame candidates in parallel, so refreshing the match frame only
+    has to copy the variant into place. The times of the match frames in the variants are returned.
+    """
+    frame_times = []
+    frame_time = video_metadata.thumbnail_match_frame_time
+
+    for _ in range(settings.THUMBNAIL_VARIANT_COUNT):
+        frame_time = get_next_match_frame_time(match, frame_time)
+        if frame_time is None or frame_time in frame_times or frame_time == video_metadata.thumbnail_match_frame_time:
+            break
+
+        frame_times.append(frame_time)
+
+    thumbnail_filepath = get_video_thumbnail_filepath(video_metadata)
+    tournament_logo_filepath = f"media/tournaments/{match.tournament.logo_filename}"
+    game = match.team_1.game
+
+    # The database is only queried on this thread, so the worker threads do not open database connections that are
+    # never closed. The workers are only given the files to compose the variants from.
+    variants = []
+    for frame_time in frame_times:
+        variant_filepath = get_thumbnail_variant_filepath(match, video_metadata, frame_time)
+        if not os.path.exists(variant_filepath):
+            variants.append((get_match_frame_source(match, frame_time), variant_filepath))
+
+    def render_variant(variant: tuple[tuple[str, float | None], str]) -> None:
+        match_frame_source, variant_filepath = variant
+
+        # The variant is written to a temporary file first, so a partially written variant is never copied into place.
+        temporary_filepath = variant_filepath.replace(".png", ".partial.png")
+
+        compose_video_thumbnail(thumbnail_filepath, match_frame_source, game, tournament_logo_filepath,
+                                temporary_filepath)
+        os.replace(temporary_filepath, variant_filepath)
+
+    # PIL and OpenCV release the GIL while decoding, resizing, and encoding images, so the variants render in parallel.
+    with ThreadPoolExecutor(max_workers=max(len(variants), 1)) as executor:
+        list(executor.map(render_variant, variants))
+
+    logging.info(f"Rendered {len(variants)} thumbnail variants for {video_metadata}.")
+    return frame_times
 
 
 # TODO: Add flags to team names in table.
@@ -141,7 +267,11 @@ def save_match_frame(match: Match, frame_filepath: str, frame_time: float | None
 # TODO: Maybe change the table colors to league of legends colors.
 # TODO: Maybe change the table colors to valorant colors.
 def create_game_statistics_image(game: GameVod, folder_path: str, filename: str) -> None:
-    """Create an image that contains the statistics for each game and for the total match statistics."""
+    """
+    Create an image that contains the statistics for each game and for the total match statistics. The image is either
+    a screenshot of the HTML of the game taken with the warm headless browser of the worker or drawn directly with PIL.
+    """
+    start = time.perf_counter()
     game_name = game.match.team_1.game.lower().replace("_", "-").replace(" ", "-")
 
     # Pass the data of the game into the html file.
@@ -161,16 +291,21 @@ def create_game_statistics_image(game: GameVod, folder_path: str, filename: str)
                         "mvp_profile_picture": mvp_profile_picture, "mvp_name": str(game.mvp),
                         "mvp_team_logo": os.path.abspath(f"media/teams/{game.mvp.team.organization.logo_filename}")}
 
-        html = html_file.read().format(**team_1_data, **team_2_data, **general_data)
+        card_data = team_1_data | team_2_data | general_data
 
-        hti = Html2Image(output_path=folder_path)
-        hti.screenshot(html_str=html, css_file="videos/html/post-match-statistics.css", save_as=filename)
+        if settings.STATISTICS_CARD_RENDERER == "pil":
+            draw_statistics_card(game_name, card_data, f"{folder_path}/{filename}")
+        else:
+            html = html_file.read().format(**card_data)
+            render_html_card(html, "videos/html/post-match-statistics.css", f"{folder_path}/{filename}")
+
+    logging.info(f"Rendered the statistics card of {game} with the {settings.STATISTICS_CARD_RENDERER} renderer in "
+                 f"{time.perf_counter() - start:.2f} seconds using {get_memory_usage_mb()} MB.")
 
 
 def get_team_statistics_data(game: GameVod, team: Team, team_number: int, game_name: str) -> dict:
     """Return a dict that can be used to populate the HTML for the post match statistics image."""
-    statistics_filename = getattr(game, f"team_{team_number}_statistics_filename")
-    df = pd.read_csv(f"{game.match.create_unique_folder_path('statistics')}/{statistics_filename}")
+    players = list(game.playergamestatistics_set.filter(team=team).order_by("number"))
     team_logo_filepath = os.path.abspath(f"media/teams/{team.organization.logo_filename}")
 
     if team_number == 1:
@@ -178,32 +313,49 @@ def get_team_statistics_data(game: GameVod, team: Team, team_number: int, game_n
     else:
         result = "winner" if game.team_2_round_count > game.team_1_round_count else "loser"
 
-    score = df["kills"].sum() if game_name == "league-of-legends" else getattr(game, f"team_{team_number}_round_count")
+    if game_name == "league-of-legends":
+        score = sum(player.kills or 0 for player in players)
+    else:
+        score = getattr(game, f"team_{team_number}_round_count")
+
     team_data = {f"team_{team_number}_name": str(team.organization), f"team_{team_number}_score": score,
                  f"team_{team_number}_result": result, f"team_{team_number}_logo": team_logo_filepath}
 
+    for player_count, player in enumerate(players):
+        for column, value in get_player_card_values(player, game_name).items():
+            team_data[f"team_{team_number}_player_{player_count + 1}_{column}"] = value
+
+    return team_data
+
+
+def get_player_card_values(player: PlayerGameStatistics, game_name: str) -> dict:
+    """Return the value of each cell in the row of the player in the statistics card, and the sign of the row."""
     if game_name == "counter-strike":
-        columns = ["name", "kd", "plus_minus", "adr", "kast", "rating"]
+        values = {"name": player.name, "kd": f"{format_statistic(player.kills)}-{format_statistic(player.deaths)}",
+                  "adr": format_statistic(player.average_damage_per_round, "g"),
+                  "kast": format_statistic(player.kast_percentage, "g", "%"),
+                  "rating": format_statistic(player.rating, ".2f")}
     elif game_name == "valorant":
-        df = df.drop("A", axis=1)
-        df = df.drop("ADR", axis=1)
-        columns = ["name", "r", "acs", "k", "d", "plus_minus", "kast", "hs_percent"]
+        values = {"name": player.name, "r": format_statistic(player.rating, ".2f"),
+                  "acs": format_statistic(player.average_combat_score), "k": format_statistic(player.kills),
+                  "d": format_statistic(player.deaths), "kast": format_statistic(player.kast_percentage, "g", "%"),
+                  "hs_percent": format_statistic(player.headshot_percentage, "g", "%")}
     else:
-        columns = ["name", "kills", "deaths", "assists", "cs", "cs_minute", "ratio"]
+        ratio = player.kda_ratio or 0
+        return {"name": player.name, "kills": format_statistic(player.kills),
+                "deaths": format_statistic(player.deaths), "assists": format_statistic(player.assists),
+                "cs": format_statistic(player.creep_score),
+                "cs_minute": format_statistic(player.creep_score_per_minute),
+                "ratio": format_statistic(player.kda_ratio, "g"),
+                "sign": "plus" if ratio > 1 else "minus" if ratio < 1 else ""}
 
-    for column_count, column in enumerate(columns):
-        for value_count, value in enumerate(df.iloc[:, column_count].tolist()):
-            team_data[f"team_{team_number}_player_{value_count + 1}_{column}"] = value
+    plus_minus = player.plus_minus or 0
+    values["plus_minus"] = f"+{plus_minus}" if plus_minus > 0 else str(plus_minus)
+    values["sign"] = "plus" if plus_minus > 0 else "minus" if plus_minus < 0 else ""
 
-            if column == "plus_minus":
-                sign = "plus" if value > 0 else "minus" if value < 0 else ""
-                team_data[f"team_{team_number}_player_{value_count + 1}_sign"] = sign
+    return values
 
-                value = f"+{value}" if value > 0 else value
-                team_data[f"team_{team_number}_player_{value_count + 1}_{column}"] = value
 
-            if column == "ratio":
-                sign = "plus" if value > 1 else "minus" if value < 1 else ""
-                team_data[f"team_{team_number}_player_{value_count + 1}_sign"] = sign
-
-    return team_data
+def format_statistic(value: float | None, format_spec: str = "", suffix: str = "") -> str:
+    """Return the statistic formatted for the statistics card, or a dash if the statistic is missing."""
+    return "-" if value is None else f"{value:{format_spec}}{suffix}"
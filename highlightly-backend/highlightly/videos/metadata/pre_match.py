@@ -1,18 +1,21 @@
 import logging
-import math
+import os
 
+import numpy as np
+from django.conf import settings
 from PIL import Image, ImageDraw
-from colorthief import ColorThief
 
 from scrapers.models import Match, Team, Game
-from videos.metadata.util import create_match_frame_part
+from videos.metadata.thumbnail_cache import get_thumbnail_part, get_team_logo_part_name
+from videos.metadata.util import create_match_frame_part, remove_thumbnail_variants
 from videos.models import VideoMetadata
 
 
 def create_pre_match_video_metadata(scheduled_match: Match):
     """
     Create all metadata required for a YouTube video including a title, description, tags, and a thumbnail based on
-    pre-match information.
+    pre-match information. In the lazy thumbnail mode, the thumbnail is only created when the match is selected for a
+    video or the metadata is first requested, since most scraped matches never get a video.
     """
     logging.info(f"Creating pre-match video metadata for {scheduled_match}.")
 
@@ -20,12 +23,23 @@ def create_pre_match_video_metadata(scheduled_match: Match):
     description = create_video_description(scheduled_match)
     tags = create_video_tags(scheduled_match)
 
-    thumbnail_filename = create_video_thumbnail(scheduled_match)
+    thumbnail_filename = create_video_thumbnail(scheduled_match) if settings.PRE_MATCH_THUMBNAIL_MODE == "eager" else ""
 
     VideoMetadata.objects.create(match=scheduled_match, title=title, description=description,
                                  tags=tags, thumbnail_filename=thumbnail_filename)
 
 
+def get_video_thumbnail_filepath(video_metadata: VideoMetadata) -> str:
+    """Return the filepath of the thumbnail of the video metadata, creating the thumbnail if it is not created yet."""
+    if video_metadata.thumbnail_filename == "":
+        video_metadata.thumbnail_filename = create_video_thumbnail(video_metadata.match)
+        video_metadata.save(update_fields=["thumbnail_filename"])
+
+        logging.info(f"Created the thumbnail of {video_metadata} on demand.")
+
+    return f"{video_metadata.match.create_unique_folder_path()}/{video_metadata.thumbnail_filename}"
+
+
 # TODO: Maybe include the week and day in the league of legends matches that are from longer season tournaments.
 def create_video_title(scheduled_match: Match) -> str:
     """Use the teams, tournament, and, if necessary, extra match information to create a video title."""
@@ -92,7 +106,8 @@ def create_video_thumbnail(scheduled_match: Match) -> str:
     thumbnail = Image.new("RGB", (1280, 720), (255, 255, 255))
 
     # Add the "Game highlights" consistent text part to the left of the thumbnail.
-    text_part = Image.open("media/thumbnail_text_part.png")
+    text_part = get_thumbnail_part("text", "media/thumbnail_text_part.png", (),
+                                   lambda: Image.open("media/thumbnail_text_part.png"))
     thumbnail.paste(text_part, (0, 0))
 
     # For both teams, generate a thumbnail team logo if it does not already exist.
@@ -109,24 +124,44 @@ def create_video_thumbnail(scheduled_match: Match) -> str:
     draw.line(xy, fill=(255, 255, 255), width=3)
 
     # Add a temporary match frame for testing how the thumbnail looks before the actual match frame is added later.
-    path = get_temporary_match_frame_path(scheduled_match.team_1.game)
-    match_frame_part = create_match_frame_part(path, team_1_part.width + text_part.width, scheduled_match.team_1.game)
-    thumbnail.paste(match_frame_part, (team_1_part.width + text_part.width, 0))
+    game = scheduled_match.team_1.game
+    path = get_temporary_match_frame_path(game)
+    team_part_width = team_1_part.width + text_part.width
+
+    match_frame_part = get_thumbnail_part(f"match_frame_{game.lower()}", path, (team_part_width,),
+                                          lambda: create_match_frame_part(path, team_part_width, game))
+    thumbnail.paste(match_frame_part, (team_part_width, 0))
 
     # Save the thumbnail to a file and return the filename of the saved thumbnail.
     folder_path = scheduled_match.create_unique_folder_path()
     thumbnail_filename = "thumbnail.png"
-    thumbnail.save(f"{folder_path}/{thumbnail_filename}")
+
+    # The thumbnail is written to a temporary file first, since it can be created by a request and a task at once.
+    thumbnail.save(f"{folder_path}/thumbnail.partial.png")
+    os.replace(f"{folder_path}/thumbnail.partial.png", f"{folder_path}/{thumbnail_filename}")
+
+    # The variants with other match frames were rendered from the previous thumbnail.
+    remove_thumbnail_variants(scheduled_match)
 
     return thumbnail_filename
 
 
 def create_team_logo_thumbnail_part(team: Team) -> Image.Image:
-    """Create an image with a single background color and the logo of the team centered on the image."""
+    """
+    Return an image with a single background color and the logo of the team centered on the image. The image is cached
+    by the logo and the background color, so it is only created again if one of them changes.
+    """
     logo_filepath = f"media/teams/{team.organization.logo_filename}"
+    background_color = get_logo_background_color(team, logo_filepath)
+
+    return get_thumbnail_part(get_team_logo_part_name(team.organization.logo_filename), logo_filepath,
+                              (background_color, 360, 250),
+                              lambda: draw_team_logo_thumbnail_part(logo_filepath, background_color))
+
 
+def draw_team_logo_thumbnail_part(logo_filepath: str, background_color: str) -> Image.Image:
+    """Create an image with the background color and the logo centered on the image."""
     # To best fit a YouTube thumbnail, the background image should be 360 x 360
-    background_color = get_logo_background_color(team, logo_filepath)
     background = Image.new("RGB", (360, 360), background_color)
 
     # Resize the logo, so it fits within the background image.
@@ -149,46 +184,91 @@ def create_team_logo_thumbnail_part(team: Team) -> Image.Image:
 def get_logo_background_color(team: Team, logo_filepath: str) -> str:
     """Generate a background color based on the dominant color in the logo."""
     if team.organization.background_color is None:
-        color_thief = ColorThief(logo_filepath)
-        dominant_color = color_thief.get_color(quality=1)
-        palette = list(set(color_thief.get_palette()))
-
-        # Handle the case where the logo is white since white is not a good background color.
-        if get_color_distance(dominant_color, (255, 255, 255)) < 300:
-            (r, g, b) = (0, 0, 0)
-        # Handle the case where the logo is a single color without a border.
-        elif is_single_colored(palette):
-            (r, g, b) = (26, 44, 85)
-        else:
-            # Darken the color to make it a better background color.
-            (r, g, b) = tuple(channel - 25 for channel in dominant_color)
-
-        # Convert RGB to hex and save it on the team model to avoid calculating the background color each time.
-        team.organization.background_color = "#{0:02x}{1:02x}{2:02x}".format(clamp(r), clamp(g), clamp(b))
+        # Save the background color on the team model to avoid calculating the background color each time.
+        team.organization.background_color = create_logo_background_color(logo_filepath)
         team.organization.save()
 
     return team.organization.background_color
 
 
-def is_single_colored(palette: list[tuple[int, int, int]]) -> bool:
-    """Return True if the given palette can be interpreted as being of a single color."""
-    max_color_distance = 0
+def create_logo_background_color(logo_filepath: str) -> str:
+    """Return the hex code of a background color based on the dominant color in the logo."""
+    dominant_color, palette = get_logo_colors(logo_filepath)
+
+    # Handle the case where the logo is white since white is not a good background color.
+    if get_color_distance(dominant_color, (255, 255, 255)) < 300:
+        (r, g, b) = (0, 0, 0)
+    # Handle the case where the logo is a single color without a border.
+    elif is_single_colored(palette):
+        (r, g, b) = (26, 44, 85)
+    else:
+        # Darken the color to make it a better background color.
+        (r, g, b) = tuple(channel - 25 for channel in dominant_color)
 
-    for current_color in palette:
-        for color in palette:
-            max_color_distance = max(max_color_distance, get_color_distance(current_color, color))
+    return "#{0:02x}{1:02x}{2:02x}".format(clamp(r), clamp(g), clamp(b))
 
-    return max_color_distance < 50
+
+def get_logo_colors(logo_filepath: str, color_count: int = 10) -> tuple[tuple[int, int, int], np.ndarray]:
+    """
+    Return the dominant color and the palette of the logo. Like ColorThief, transparent and white pixels are ignored.
+    The logo is downsampled and the pixels are quantized into a histogram with 16 levels per channel, which is then
+    clustered into the palette with a k-means weighted by the number of pixels in each bin.
+    """
+    with Image.open(logo_filepath) as logo:
+        logo = logo.convert("RGBA")
+        logo.thumbnail((128, 128))
+        pixels = np.asarray(logo).reshape(-1, 4).astype(np.int64)
+
+    rgb = pixels[:, :3][(pixels[:, 3] >= 125) & ~np.all(pixels[:, :3] > 250, axis=1)]
+    if len(rgb) == 0:
+        return (255, 255, 255), np.array([[255, 255, 255]])
+
+    # Each bin is represented by the mean color of its pixels.
+    bins = (rgb[:, 0] >> 4) << 8 | (rgb[:, 1] >> 4) << 4 | rgb[:, 2] >> 4
+    _, bin_indexes, counts = np.unique(bins, return_inverse=True, return_counts=True)
+    colors = np.stack([np.bincount(bin_indexes, weights=rgb[:, channel]) for channel in range(3)], axis=1)
+    colors /= counts[:, np.newaxis]
+
+    # Start from the most common bins, so the dominant color is found in few iterations.
+    centers = colors[np.argsort(counts)[::-1][:color_count]]
+    for _ in range(20):
+        labels = np.argmin(((colors[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2), axis=1)
+        weights = np.bincount(labels, weights=counts, minlength=len(centers))
+        sums = np.stack([np.bincount(labels, weights=colors[:, channel] * counts, minlength=len(centers))
+                         for channel in range(3)], axis=1)
+
+        new_centers = np.where(weights[:, np.newaxis] > 0, sums / np.maximum(weights, 1)[:, np.newaxis], centers)
+        converged = np.allclose(new_centers, centers)
+        centers = new_centers
+
+        if converged:
+            break
+
+    palette = np.rint(centers[weights > 0]).astype(np.int64)
+    dominant_color = np.rint(centers[np.argmax(weights)]).astype(np.int64)
+
+    return tuple(int(channel) for channel in dominant_color), palette
+
+
+def is_single_colored(palette: np.ndarray) -> bool:
+    """Return True if the given palette can be interpreted as being of a single color."""
+    return get_color_distances(palette[:, np.newaxis, :], palette[np.newaxis, :, :]).max() < 50
 
 
 def get_color_distance(rgb_1: tuple[int, int, int], rgb_2: tuple[int, int, int]) -> float:
     """Return the "distance" between the two given colors."""
-    red_mean = (rgb_1[0] + rgb_2[0]) / 2
-    r = rgb_1[0] - rgb_2[0]
-    g = rgb_1[1] - rgb_2[1]
-    b = rgb_1[2] - rgb_2[2]
+    return float(get_color_distances(np.array(rgb_1), np.array(rgb_2)))
+
+
+def get_color_distances(rgb_1: np.ndarray, rgb_2: np.ndarray) -> np.ndarray:
+    """Return the "distance" between each pair of colors in the two arrays, broadcasting the arrays like NumPy."""
+    rgb_1, rgb_2 = rgb_1.astype(np.int64), rgb_2.astype(np.int64)
+
+    red_mean = (rgb_1[..., 0] + rgb_2[..., 0]) / 2
+    r, g, b = np.moveaxis(rgb_1 - rgb_2, -1, 0)
 
-    return math.sqrt((int(((512 + red_mean) * r * r)) >> 8) + 4 * g * g + (int(((767 - red_mean) * b * b)) >> 8))
+    return np.sqrt((np.floor((512 + red_mean) * r * r).astype(np.int64) >> 8) + 4 * g * g +
+                   (np.floor((767 - red_mean) * b * b).astype(np.int64) >> 8))
 
 
 def clamp(x):
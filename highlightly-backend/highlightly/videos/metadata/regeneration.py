@@ -0,0 +1,33 @@
+import logging
+
+from videos.metadata.post_match import add_post_match_text, finish_video_thumbnail
+from videos.metadata.pre_match import create_video_title, create_video_description, create_video_tags, \
+    create_video_thumbnail
+from videos.models import VideoMetadata
+
+
+def regenerate_video_metadata(video_metadata: VideoMetadata, text: bool, thumbnail: bool) -> None:
+    """
+    Regenerate the title, description, and tags of the video metadata if text, and the thumbnail if thumbnail. If the
+    match is finished, the post-match information is added again, reusing the match frame already in the thumbnail.
+    """
+    match = video_metadata.match
+    logging.info(f"Regenerating the {'text ' if text else ''}{'thumbnail ' if thumbnail else ''}of {video_metadata}.")
+
+    if text:
+        video_metadata.title = create_video_title(match)
+        video_metadata.description = create_video_description(match)
+        video_metadata.tags = create_video_tags(match)
+
+        if match.finished:
+            add_post_match_text(match, video_metadata)
+
+        video_metadata.save(update_fields=["title", "description", "tags"])
+
+    # A thumbnail that is not created yet is created with the changed organization when it is first needed.
+    if thumbnail and video_metadata.thumbnail_filename != "":
+        # Only the team logo parts of the changed organization are created again, the other parts are cached.
+        create_video_thumbnail(match)
+
+        if match.finished:
+            finish_video_thumbnail(match, video_metadata, video_metadata.thumbnail_match_frame_time)
@@ -0,0 +1,229 @@
+import atexit
+import logging
+import os
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+from playwright.sync_api import sync_playwright, Browser, Playwright
+
+CARD_SIZE = (1920, 1080)
+
+TEXT_COLOR = "#87a3bf"
+TABLE_COLOR = "#2d3844"
+TABLE_STRIPE_COLOR = "#232d38"
+BORDER_COLOR = "#495867"
+PLUS_COLOR = "#5ebe24"
+MINUS_COLOR = "#e63865"
+
+# The header of each column of the statistics table and the cells of each player for each game.
+TABLE_COLUMNS = {
+    "counter-strike": [("K/D", "{kd}"), ("+/-", "{plus_minus}"), ("ADR", "{adr}"), ("KAST", "{kast}"),
+                       ("Rating 2.0", "{rating}")],
+    "valorant": [("K/D", "{k}-{d}"), ("+/-", "{plus_minus}"), ("KAST", "{kast}"), ("ACS", "{acs}"),
+                 ("HS%", "{hs_percent}"), ("Rating", "{r}")],
+    "league-of-legends": [("KDA", "{kills} / {deaths} / {assists}"), ("Ratio", "{ratio}"), ("CS", "{cs}"),
+                          ("CS/min", "{cs_minute}")],
+}
+
+# Each worker process keeps a single headless browser open, so only the first card launches Chromium.
+playwright: Playwright | None = None
+browser: Browser | None = None
+browser_card_count = 0
+
+
+def render_html_card(html: str, css_filepath: str, filepath: str) -> None:
+    """Take a screenshot of the HTML with the CSS using the warm headless browser of the worker process."""
+    global browser_card_count
+
+    # The HTML is loaded from a file next to the card, so the absolute paths of the images can be loaded as files.
+    with open(css_filepath) as css_file:
+        html = html.replace('<link rel="stylesheet" href="post-match-statistics.css">',
+                            f"<style>{css_file.read()}</style>")
+
+    html_filepath = os.path.abspath(f"{filepath}.html")
+    with open(html_filepath, "w") as html_file:
+        html_file.write(html)
+
+    try:
+        page = get_browser().new_page(viewport={"width": CARD_SIZE[0], "height": CARD_SIZE[1]})
+
+        try:
+            page.goto(Path(html_filepath).as_uri(), wait_until="load")
+            page.screenshot(path=filepath)
+        finally:
+            page.close()
+    finally:
+        os.remove(html_filepath)
+
+    # The browser is restarted now and then, so memory leaked by the browser does not build up in long-lived workers.
+    browser_card_count += 1
+    if browser_card_count >= settings.STATISTICS_CARD_BROWSER_MAX_CARDS:
+        close_browser()
+
+
+def get_browser() -> Browser:
+    """Return the headless browser of the worker process, launching it if it is not running."""
+    global playwright, browser, browser_card_count
+
+    if browser is None or not browser.is_connected():
+        if playwright is None:
+            playwright = sync_playwright().start()
+
+        browser = playwright.chromium.launch(executable_path=settings.CHROMIUM_EXECUTABLE_PATH)
+        browser_card_count = 0
+        logging.info(f"Launched headless browser for rendering statistics cards in process {os.getpid()}.")
+
+    return browser
+
+
+@atexit.register
+def close_browser() -> None:
+    """Close the headless browser of the worker process if it is running."""
+    global playwright, browser
+
+    if browser is not None:
+        browser.close()
+        browser = None
+
+    if playwright is not None:
+        playwright.stop()
+        playwright = None
+
+
+def draw_statistics_card(game_name: str, card_data: dict, filepath: str) -> None:
+    """
+    Draw the post match statistics card with the same layout as the HTML of the game directly with PIL, without a
+    browser. The match and MVP are shown on the left and the statistics table of each team on the right.
+    """
+    background_color = "#191919" if game_name == "league-of-legends" else "#1b1f23"
+    card = Image.new("RGB", CARD_SIZE, background_color)
+    draw = ImageDraw.Draw(card)
+
+    # The left 3/7 of the card matches the first three columns of the grid in the HTML.
+    left_width = 823
+    draw.text((left_width / 2, 130), str(card_data["match_info"]), fill=TEXT_COLOR, font=get_font(65, True),
+              anchor="mm")
+
+    paste_image(card, card_data["team_1_logo"], (0, 180, 302, 450), (200, 200))
+    paste_image(card, card_data["team_2_logo"], (521, 180, 823, 450), (200, 200))
+
+    score_font = get_font(60)
+    team_1_score, team_2_score = str(card_data["team_1_score"]), str(card_data["team_2_score"])
+    draw.text((411 - 20, 340), team_1_score, fill=get_result_color(card_data["team_1_result"]), font=score_font,
+              anchor="rm")
+    draw.text((411 + 20, 340), team_2_score, fill=get_result_color(card_data["team_2_result"]), font=score_font,
+              anchor="lm")
+
+    draw.text((left_width / 2, 535), str(card_data["mvp_title"]), fill=TEXT_COLOR, font=get_font(35, True),
+              anchor="md")
+    paste_image(card, card_data["mvp_team_logo"], (16, 545, left_width - 16, 990), (left_width - 32, 445), 0.65)
+    paste_image(card, card_data["mvp_profile_picture"], (0, 545, left_width, 990), (400, 445), align_bottom=True)
+    draw.text((left_width / 2, 1005), str(card_data["mvp_name"]), fill=TEXT_COLOR, font=get_font(30), anchor="mm")
+
+    draw_team_table(card, draw, game_name, card_data, 1, (left_width, 40, CARD_SIZE[0] - 40, 520))
+    draw_team_table(card, draw, game_name, card_data, 2, (left_width, 560, CARD_SIZE[0] - 40, 1040))
+
+    card.save(filepath)
+
+
+def draw_team_table(card: Image.Image, draw: ImageDraw.ImageDraw, game_name: str, card_data: dict, team_number: int,
+                    box: tuple[int, int, int, int]) -> None:
+    """Draw the header row and a row for each of the five players of the team in the box."""
+    left, top, right, bottom = box
+    columns = TABLE_COLUMNS[game_name]
+    row_height = (bottom - top) / 6
+
+    # The name column is wider than the statistics columns, like in the HTML.
+    name_width = 400 if game_name == "valorant" else 500
+    column_width = (right - left - name_width) / len(columns)
+    font = get_font(28)
+
+    for row in range(6):
+        row_top = top + row * row_height
+        row_color = TABLE_STRIPE_COLOR if row % 2 == 0 else TABLE_COLOR
+        draw.rectangle((left, row_top, right, row_top + row_height), fill=row_color)
+
+        if row < 5:
+            draw.line((left, row_top + row_height, right, row_top + row_height), fill=BORDER_COLOR)
+
+        center_y = row_top + row_height / 2
+        prefix = f"team_{team_number}_player_{row}_"
+        player_data = {key.removeprefix(prefix): value for key, value in card_data.items() if key.startswith(prefix)}
+
+        if row == 0:
+            logo_size = int(row_height * 0.7)
+            logo_box = (left + 15, int(center_y - logo_size / 2), left + 15 + logo_size, int(center_y + logo_size / 2))
+            paste_image(card, card_data[f"team_{team_number}_logo"], logo_box, (logo_size, logo_size))
+            draw.text((logo_box[2] + 7, center_y), str(card_data[f"team_{team_number}_name"]), fill=TEXT_COLOR,
+                      font=get_font(28, True), anchor="lm")
+        else:
+            draw.text((left + 20, center_y), str(card_data[f"{prefix}name"]), fill=TEXT_COLOR, font=font, anchor="lm")
+
+        for column, (header, cell) in enumerate(columns):
+            column_left = left + name_width + column * column_width
+            draw.line((column_left, row_top, column_left, row_top + row_height), fill=BORDER_COLOR)
+            center = (column_left + column_width / 2, center_y)
+
+            if row == 0:
+                draw.text(center, header, fill=TEXT_COLOR, font=get_font(28, True), anchor="mm")
+                continue
+
+            color = get_result_color(player_data.get("sign", "")) if header in ["+/-", "Ratio"] else TEXT_COLOR
+            draw.text(center, cell.format(**player_data), fill=color, font=font, anchor="mm")
+
+
+def paste_image(card: Image.Image, image_filepath: str, box: tuple[int, int, int, int], max_size: tuple[int, int],
+                opacity: float = 1, align_bottom: bool = False) -> None:
+    """Paste the image centered in the box, scaled down to fit within the max size."""
+    if not os.path.exists(image_filepath):
+        return
+
+    image = Image.open(image_filepath).convert("RGBA")
+    image.thumbnail(max_size, Image.LANCZOS)
+
+    if opacity < 1:
+        image.putalpha(image.getchannel("A").point(lambda alpha: int(alpha * opacity)))
+
+    left, top, right, bottom = box
+    x = int(left + (right - left - image.width) / 2)
+    y = bottom - image.height if align_bottom else int(top + (bottom - top - image.height) / 2)
+    card.paste(image, (x, y), image)
+
+
+def get_result_color(result: str) -> str:
+    """Return the color of the text of a winner or a positive value, or a loser or a negative value."""
+    return PLUS_COLOR if result in ["winner", "plus"] else MINUS_COLOR if result in ["loser", "minus"] else TEXT_COLOR
+
+
+def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """Return the font of the statistics card in the given size, falling back to the default font of PIL."""
+    font_file = settings.STATISTICS_CARD_BOLD_FONT_FILE if bold else settings.STATISTICS_CARD_FONT_FILE
+
+    try:
+        return ImageFont.truetype(font_file, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def get_memory_usage_mb() -> float:
+    """Return the resident memory of the worker process and its child processes, including the headless browser."""
+    parents = {}
+    memory_kb = {}
+
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/status") as status_file:
+                status = dict(line.split(":", 1) for line in status_file if ":" in line)
+
+            parents[int(pid)] = int(status["PPid"])
+            memory_kb[int(pid)] = int(status.get("VmRSS", "0 kB").split()[0])
+        except (OSError, KeyError, ValueError):
+            continue
+
+    def is_descendant(pid: int) -> bool:
+        while pid in parents and pid != os.getpid():
+            pid = parents[pid]
+        return pid == os.getpid()
+
+    return round(sum(memory for pid, memory in memory_kb.items() if is_descendant(pid)) / 1024, 1)
@@ -0,0 +1,64 @@
+import functools
+import glob
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from PIL import Image
+
+
+def get_thumbnail_part(part_name: str, source_filepath: str, parameters: tuple,
+                       create_part: Callable[[], Image.Image]) -> Image.Image:
+    """
+    Return the thumbnail part created from the source file with the given parameters. The part is cached on disk by the
+    hash of the source file and the parameters, and kept in memory once loaded, so it is only created once.
+    """
+    stat = os.stat(source_filepath)
+    key = f"{get_file_hash(os.path.abspath(source_filepath), stat.st_size, stat.st_mtime)}:" \
+          f"{':'.join(map(str, parameters))}"
+    part_filepath = f"{settings.THUMBNAIL_CACHE_FOLDER}/{part_name}_{hashlib.sha256(key.encode()).hexdigest()[:16]}.png"
+
+    if not os.path.exists(part_filepath):
+        Path(settings.THUMBNAIL_CACHE_FOLDER).mkdir(parents=True, exist_ok=True)
+
+        # The part is written to a temporary file first, so other workers never load a partially written part.
+        temporary_filepath = part_filepath.replace(".png", ".partial.png")
+        create_part().save(temporary_filepath)
+        os.replace(temporary_filepath, part_filepath)
+
+        logging.info(f"Cached thumbnail part at {part_filepath}.")
+
+    # The part is copied, so changes to the returned image do not change the part kept in memory.
+    return load_thumbnail_part(part_filepath).copy()
+
+
+def invalidate_thumbnail_parts(part_name: str) -> None:
+    """Remove the cached thumbnail parts with the given name, e.g. when the source file is replaced."""
+    for part_filepath in glob.glob(f"{settings.THUMBNAIL_CACHE_FOLDER}/{part_name}_{'?' * 16}.png"):
+        os.remove(part_filepath)
+        logging.info(f"Removed cached thumbnail part at {part_filepath}.")
+
+    load_thumbnail_part.cache_clear()
+
+
+@functools.lru_cache(maxsize=64)
+def load_thumbnail_part(part_filepath: str) -> Image.Image:
+    """Load the cached thumbnail part into memory."""
+    with Image.open(part_filepath) as part:
+        part.load()
+        return part
+
+
+@functools.lru_cache(maxsize=256)
+def get_file_hash(filepath: str, size: int, mtime: float) -> str:
+    """Return the hash of the content of the given version of the file."""
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_team_logo_part_name(logo_filename: str) -> str:
+    """Return the name of the cached thumbnail parts of the team logo."""
+    return f"team_logo_{Path(logo_filename).stem}"
@@ -1,6 +1,9 @@
+import shutil
+
 from PIL import Image
 
-from scrapers.models import Game
+from scrapers.models import Game, Match
+from videos.models import VideoMetadata
 
 
 def create_match_frame_part(match_frame_filepath: str, team_part_width: int, game: Game) -> Image.Image:
@@ -41,3 +44,14 @@ def zoom_at(img, x, y, zoom):
                     x + w / zoom2, y + h / zoom2))
 
     return img.resize((w, h), Image.LANCZOS)
+
+
+def get_thumbnail_variant_filepath(match: Match, video_metadata: VideoMetadata, match_frame_time: float) -> str:
+    """Return the filepath of the variant of the thumbnail with the match frame at the given time."""
+    thumbnail_name = video_metadata.thumbnail_filename.removesuffix(".png")
+    return f"{match.create_unique_folder_path('thumbnail_variants')}/{thumbnail_name}_{match_frame_time:g}.png"
+
+
+def remove_thumbnail_variants(match: Match) -> None:
+    """Remove the rendered variants of the thumbnail, e.g. when the thumbnail they were rendered from is replaced."""
+    shutil.rmtree(match.create_unique_folder_path("thumbnail_variants"), ignore_errors=True)
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 14:05
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0047_gamevod_render_status'),
+        ('videos', '0006_alter_videometadata_thumbnail_match_frame_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EditDecisionList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_start_offset', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('extra_start_time', models.IntegerField()),
+                ('extra_duration', models.IntegerField()),
+                ('segments', models.JSONField()),
+                ('render_mode', models.CharField(max_length=16)),
+                ('transition_duration', models.FloatField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('game_vod', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='scrapers.gamevod')),
+            ],
+        ),
+    ]
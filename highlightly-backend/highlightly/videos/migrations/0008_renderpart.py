@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 15:20
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrapers', '0048_alter_gamevod_render_status'),
+        ('videos', '0007_editdecisionlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.IntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('type', models.CharField(choices=[('COPY', 'Copy'), ('ENCODE', 'Encode')], max_length=16)),
+                ('intervals', models.JSONField()),
+                ('filepath', models.CharField(max_length=256)),
+                ('bumper_filepath', models.CharField(blank=True, max_length=256, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RENDERING', 'Rendering'), ('RENDERED', 'Rendered'), ('FAILED', 'Failed')], default='PENDING', max_length=16)),
+                ('worker', models.CharField(blank=True, max_length=128, null=True)),
+                ('started_datetime', models.DateTimeField(blank=True, null=True)),
+                ('finished_datetime', models.DateTimeField(blank=True, null=True)),
+                ('game_vod', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scrapers.gamevod')),
+            ],
+            options={
+                'unique_together': {('game_vod', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0008_renderpart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videometadata',
+            name='text_outdated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='videometadata',
+            name='thumbnail_outdated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='videometadata',
+            name='outdated_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
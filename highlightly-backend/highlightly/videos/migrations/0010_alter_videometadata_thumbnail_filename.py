@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0009_videometadata_outdated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videometadata',
+            name='thumbnail_filename',
+            field=models.CharField(blank=True, default='', max_length=256),
+        ),
+    ]
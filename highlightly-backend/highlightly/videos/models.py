@@ -1,7 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
 
-from scrapers.models import Match
+from scrapers.models import Match, GameVod
 
 
 class VideoMetadata(models.Model):
@@ -11,11 +11,71 @@ class VideoMetadata(models.Model):
     description = models.TextField(max_length=5000)
     tags = models.JSONField()
 
-    thumbnail_filename = models.CharField(max_length=256)
+    # Empty until the thumbnail is created, which is postponed until it is needed in the lazy thumbnail mode.
+    thumbnail_filename = models.CharField(max_length=256, blank=True, default="")
     thumbnail_match_frame_time = models.FloatField(validators=[MinValueValidator(1)], blank=True, null=True)
 
     language = models.CharField(max_length=256, default="english")
     category_id = models.IntegerField(default=20)
 
+    # Set when an organization in the match changes, so the affected parts of the metadata are regenerated later.
+    text_outdated = models.BooleanField(default=False)
+    thumbnail_outdated = models.BooleanField(default=False)
+    outdated_datetime = models.DateTimeField(blank=True, null=True)
+
     def __str__(self) -> str:
         return self.title
+
+
+class EditDecisionList(models.Model):
+    """The segments of the VOD that the highlight video of the game was last rendered from and how they were joined."""
+    game_vod = models.OneToOneField(GameVod, on_delete=models.CASCADE)
+
+    game_start_offset = models.IntegerField(validators=[MinValueValidator(0)])
+    extra_start_time = models.IntegerField()
+    extra_duration = models.IntegerField()
+
+    # The [start, duration] in seconds of each segment of the VOD, in the order they are shown in the video.
+    segments = models.JSONField()
+
+    render_mode = models.CharField(max_length=16)
+    transition_duration = models.FloatField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Edit decision list of {self.game_vod} ({len(self.segments)} segments)"
+
+
+class RenderPart(models.Model):
+    """A part of the highlight video of a game that is rendered separately by any render worker in distributed renders."""
+    class Meta:
+        unique_together = ["game_vod", "number"]
+
+    class Type(models.TextChoices):
+        COPY = "COPY", "Copy"
+        ENCODE = "ENCODE", "Encode"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RENDERING = "RENDERING", "Rendering"
+        RENDERED = "RENDERED", "Rendered"
+        FAILED = "FAILED", "Failed"
+
+    game_vod = models.ForeignKey(GameVod, on_delete=models.CASCADE)
+
+    number = models.IntegerField(validators=[MinValueValidator(1)])
+    type = models.CharField(max_length=16, choices=Type.choices)
+
+    # The [start, end] in seconds of each interval of the VOD in the part.
+    intervals = models.JSONField()
+
+    filepath = models.CharField(max_length=256)
+    bumper_filepath = models.CharField(max_length=256, blank=True, null=True)
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    worker = models.CharField(max_length=128, blank=True, null=True)
+    started_datetime = models.DateTimeField(blank=True, null=True)
+    finished_datetime = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"Part {self.number} of {self.game_vod} ({self.get_status_display()})"
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from util.file_util import get_base64
+from videos.metadata.pre_match import get_video_thumbnail_filepath
 from videos.models import VideoMetadata
 
 
@@ -12,9 +13,13 @@ class VideoMetadataSerializer(serializers.ModelSerializer):
         fields = ["id", "match", "title", "description", "tags", "thumbnail", "thumbnail_match_frame_time", "language",
                   "category_id"]
 
-    @staticmethod
-    def get_thumbnail(video_metadata: VideoMetadata) -> str:
-        return get_base64(f"{video_metadata.match.create_unique_folder_path()}/{video_metadata.thumbnail_filename}")
+    def get_thumbnail(self, video_metadata: VideoMetadata) -> str | None:
+        # Thumbnails of matches not selected for a video are only created when the metadata itself is requested.
+        if video_metadata.thumbnail_filename == "" and not video_metadata.match.create_video and \
+                not self.context.get("create_thumbnail", False):
+            return None
+
+        return get_base64(get_video_thumbnail_filepath(video_metadata))
 
 
 class VideoMetadataUpdateSerializer(serializers.ModelSerializer):
@@ -23,4 +28,4 @@ class VideoMetadataUpdateSerializer(serializers.ModelSerializer):
         fields = ["title", "description", "tags", "language", "category_id"]
 
     def to_representation(self, video_metadata: VideoMetadata) -> dict:
-        return VideoMetadataSerializer(video_metadata).data
+        return VideoMetadataSerializer(video_metadata, context={"create_thumbnail": True}).data
@@ -1,49 +1,49 @@
 import logging
 import os
 
-from django.db.models import Q
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from scrapers.models import Match, Game, Organization, GameVod
-from videos.editors.counter_strike import CounterStrikeEditor
-from videos.editors.league_of_legends import LeagueOfLegendsEditor
-from videos.editors.valorant import ValorantEditor
-from videos.metadata.post_match import add_post_match_video_metadata
+from scrapers.models import Match, Organization
 from videos.metadata.pre_match import create_pre_match_video_metadata
 from videos.models import VideoMetadata
+from videos.tasks import mark_organization_video_metadata_outdated, create_video_thumbnail
+
+# The attributes of an organization that the text and the thumbnail of the video metadata depend on.
+TEXT_ATTRIBUTES = ["name", "display_name"]
+THUMBNAIL_ATTRIBUTES = ["logo_filename", "background_color"]
 
 
 @receiver(post_save, sender=Match)
 def create_match_video_metadata(instance: Match, created: bool, **_kwargs) -> None:
     if created:
         create_pre_match_video_metadata(instance)
+    elif instance.create_video and VideoMetadata.objects.filter(match=instance, thumbnail_filename="").exists():
+        # The match was selected for a video after it was scraped, so the postponed thumbnail is created now.
+        create_video_thumbnail.delay(instance.id)
+
 
+@receiver(pre_save, sender=Organization)
+def find_changed_attributes(instance: Organization, **_kwargs) -> None:
+    previous = Organization.objects.filter(id=instance.id).values(*TEXT_ATTRIBUTES, *THUMBNAIL_ATTRIBUTES).first() or {}
 
-@receiver(post_save, sender=GameVod)
-def create_game_highlight_video(instance: GameVod, update_fields: frozenset, **_kwargs) -> None:
-    if update_fields is not None and "highlighted" in update_fields and instance.highlighted:
-        if instance.match.team_1.game == Game.COUNTER_STRIKE:
-            editor = CounterStrikeEditor()
-        elif instance.match.team_1.game == Game.VALORANT:
-            editor = ValorantEditor()
-        else:
-            editor = LeagueOfLegendsEditor()
+    # The first background color is found from the logo while creating a thumbnail, so the thumbnails already use it.
+    if previous.get("background_color", "") is None:
+        del previous["background_color"]
 
-        editor.edit_and_upload_video(instance)
+    instance.changed_attributes = [attribute for attribute, value in previous.items()
+                                   if value != getattr(instance, attribute)]
 
 
 @receiver(post_save, sender=Organization)
 def update_video_metadata(instance: Organization, created: bool, **_kwargs) -> None:
     if not created:
-        # For each current match that includes the updated team, update the video metadata for the match by recreating.
-        for match in Match.objects.filter(Q(team_1__in=instance.teams.all()) | Q(team_2__in=instance.teams.all())):
-            if hasattr(match, "videometadata"):
-                match.videometadata.delete()
-                create_pre_match_video_metadata(match)
-
-                if match.finished:
-                    add_post_match_video_metadata(match)
+        # Mark the metadata of the matches with the organization as outdated, so it is regenerated in the background.
+        text = any(attribute in TEXT_ATTRIBUTES for attribute in instance.changed_attributes)
+        thumbnail = any(attribute in THUMBNAIL_ATTRIBUTES for attribute in instance.changed_attributes)
+
+        if text or thumbnail:
+            mark_organization_video_metadata_outdated(instance, text, thumbnail)
 
 
 @receiver(post_delete, sender=VideoMetadata)
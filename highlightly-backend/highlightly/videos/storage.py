@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class LocalStorage:
+    """
+    Files are read from and written to the filesystem of the worker, relative to its working directory. This only works
+    when every render worker runs on the same node, which is the case in development and tests.
+    """
+
+    def get_path(self, path: str) -> str:
+        """Return the absolute path that the worker should use to read or write the file at the given media path."""
+        return os.path.abspath(path)
+
+
+class SharedStorage(LocalStorage):
+    """
+    Files are read from and written to a filesystem that is shared between the nodes, e.g. NFS. The scrapers, the
+    highlighters, and the metadata also write their files relative to the media folder in the working directory, and
+    the render workers read them, so the shared filesystem must be mounted at, or linked from, the media folder on
+    every node. The paths are therefore the same as in the local storage, and the root is only checked against it.
+    """
+
+    def __init__(self, root: str) -> None:
+        if os.path.realpath("media") != os.path.realpath(root):
+            raise ImproperlyConfigured(f"The media folder {os.path.abspath('media')} is not the shared storage root "
+                                       f"{root}. Mount or link the shared filesystem at the media folder.")
+
+        self.root = root
+
+
+def get_render_storage() -> LocalStorage:
+    """Return the storage that the VODs and the rendered videos are read from and written to."""
+    if settings.RENDER_STORAGE_BACKEND == "shared":
+        return SharedStorage(settings.RENDER_SHARED_STORAGE_ROOT)
+
+    return LocalStorage()
@@ -0,0 +1,305 @@
+import logging
+import socket
+from datetime import timedelta
+
+from celery import chain, group
+from celery.canvas import Signature
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from highlightly.celery import app
+from scrapers.models import Game, GameVod, Organization, Match
+from videos.editors.counter_strike import CounterStrikeEditor
+from videos.editors.editor import Editor, get_match_video_filepath, get_match_folder_path, render_video_part, \
+    remove_game_highlight_videos
+from videos.editors.league_of_legends import LeagueOfLegendsEditor
+from videos.editors.valorant import ValorantEditor
+from videos.editors.clip_cache import is_clip_cached
+from videos.metadata.post_match import add_post_match_video_metadata, create_thumbnail_variants
+from videos.metadata.pre_match import get_video_thumbnail_filepath
+from videos.metadata.regeneration import regenerate_video_metadata
+from videos.models import RenderPart, VideoMetadata
+
+
+@app.task
+def render_game_preview_video(game_vod_id: int) -> None:
+    """
+    Render the preview of the highlight video for the game. The final render is started when the preview is approved,
+    or automatically if the preview is not approved before the timeout.
+    """
+    game_vod = GameVod.objects.get(id=game_vod_id)
+    get_editor(game_vod).edit_game_preview_video(game_vod)
+
+    game_vod.render_status = GameVod.RenderStatus.PREVIEW
+    game_vod.preview_datetime = timezone.now()
+    game_vod.save(update_fields=["render_status", "preview_datetime"])
+
+    timeout = settings.FINAL_RENDER_APPROVAL_TIMEOUT
+    logging.info(f"Rendered preview for {game_vod}. Starting the final render in {timeout} seconds if not approved.")
+
+
+@app.task
+def start_timed_out_final_renders() -> None:
+    """
+    Start the final render of each game with a preview that has not been approved before the timeout. This runs
+    periodically instead of scheduling each final render with a countdown, since the broker closes the channel of a
+    worker that holds an unacknowledged task for longer than its consumer timeout.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.FINAL_RENDER_APPROVAL_TIMEOUT)
+
+    for game_vod in GameVod.objects.filter(render_status=GameVod.RenderStatus.PREVIEW, preview_datetime__lte=cutoff):
+        # Only start the final render if another run of this task has not claimed the game in the meantime.
+        claimed = GameVod.objects.filter(id=game_vod.id, preview_datetime=game_vod.preview_datetime).update(
+            preview_datetime=None
+        )
+
+        if claimed:
+            logging.info(f"The preview of {game_vod} was not approved before the timeout. Starting the final render.")
+            get_final_render_pipeline(game_vod).delay()
+
+
+@app.task
+def render_game_highlight_video(game_vod_id: int) -> bool:
+    """
+    Render the highlight video for the game. If it was the last game of the match to be rendered, also combine the
+    highlight videos of the match. Return True if the full match highlight video was created. In distributed renders,
+    the parts of the video are rendered by any render worker, and the video is assembled when the last part is done.
+    """
+    # Both the approval and the timeout start the final render, so only the first to start it renders the game.
+    started = GameVod.objects.filter(id=game_vod_id).exclude(
+        render_status__in=[GameVod.RenderStatus.RENDERING, GameVod.RenderStatus.ASSEMBLING,
+                           GameVod.RenderStatus.RENDERED]
+    ).update(render_status=GameVod.RenderStatus.RENDERING)
+
+    if not started:
+        logging.info(f"The final render of game VOD {game_vod_id} has already been started.")
+        return False
+
+    game_vod = GameVod.objects.get(id=game_vod_id)
+    editor = get_editor(game_vod)
+
+    # The match video has to be combined again with the new highlight video of the game.
+    Match.objects.filter(id=game_vod.match_id).update(video_status=Match.VideoStatus.READY)
+
+    try:
+        render_parts = editor.plan_game_video_parts(game_vod) if settings.VIDEO_RENDER_MODE == "distributed" else None
+
+        if render_parts is None:
+            editor.edit_game_video(game_vod)
+    except Exception:
+        reopen_final_render(game_vod_id)
+        raise
+
+    if render_parts is not None:
+        group([render_game_video_part.si(render_part.id) for render_part in render_parts]).apply_async()
+        return False
+
+    game_vod.render_status = GameVod.RenderStatus.RENDERED
+    game_vod.save(update_fields=["render_status"])
+
+    return editor.create_match_video(game_vod.match)
+
+
+@app.task
+def render_game_video_part(render_part_id: int) -> None:
+    """
+    Render a single part of the highlight video of a game. The progress of the part is saved on the render part. When
+    the last part of the game is rendered, the highlight video of the game is assembled.
+    """
+    render_part = RenderPart.objects.select_related("game_vod").get(id=render_part_id)
+    game_vod = render_part.game_vod
+    part_count = game_vod.renderpart_set.count()
+
+    # The game cannot be assembled if another part failed, so the remaining parts are not rendered.
+    if game_vod.renderpart_set.filter(status=RenderPart.Status.FAILED).exists():
+        logging.info(f"Skipping part {render_part.number} of {game_vod} since another part failed.")
+        RenderPart.objects.filter(id=render_part_id).update(status=RenderPart.Status.FAILED)
+        reopen_failed_distributed_render(game_vod)
+        return
+
+    RenderPart.objects.filter(id=render_part_id).update(status=RenderPart.Status.RENDERING,
+                                                        worker=socket.gethostname(), started_datetime=timezone.now())
+
+    try:
+        # The part might already have been rendered by an earlier render of the game with the same segments.
+        if not is_clip_cached(render_part.filepath):
+            vod_filepath = f"{get_match_folder_path(game_vod.match)}/vods/{game_vod.filename}"
+            render_video_part(vod_filepath, render_part.type.lower(), render_part.intervals,
+                              render_part.bumper_filepath, render_part.filepath)
+    except Exception:
+        # The game cannot be assembled without the part, so the final render is started again once no other part of the
+        # game is still rendering.
+        RenderPart.objects.filter(id=render_part_id).update(status=RenderPart.Status.FAILED)
+        reopen_failed_distributed_render(game_vod)
+        raise
+
+    RenderPart.objects.filter(id=render_part_id).update(status=RenderPart.Status.RENDERED,
+                                                        finished_datetime=timezone.now())
+
+    if game_vod.renderpart_set.filter(status=RenderPart.Status.FAILED).exists():
+        reopen_failed_distributed_render(game_vod)
+        return
+
+    rendered_count = game_vod.renderpart_set.filter(status=RenderPart.Status.RENDERED).count()
+    logging.info(f"Rendered part {render_part.number} of {game_vod} ({rendered_count}/{part_count} parts done).")
+
+    # Parts finishing at the same time can all see every part as rendered, so only the first assembles the video.
+    if rendered_count == part_count:
+        assembling = GameVod.objects.filter(id=game_vod.id, render_status=GameVod.RenderStatus.RENDERING).update(
+            render_status=GameVod.RenderStatus.ASSEMBLING
+        )
+
+        if assembling:
+            chain(assemble_game_highlight_video.si(game_vod.id), add_post_match_metadata.s(game_vod.id)).apply_async()
+
+
+@app.task
+def assemble_game_highlight_video(game_vod_id: int) -> bool:
+    """
+    Concatenate the rendered parts of the highlight video of the game. If it was the last game of the match to be
+    rendered, also combine the highlight videos of the match. Return True if the full match highlight video was created.
+    """
+    game_vod = GameVod.objects.get(id=game_vod_id)
+    editor = get_editor(game_vod)
+
+    try:
+        editor.assemble_game_video(game_vod)
+    except Exception:
+        reopen_final_render(game_vod_id)
+        raise
+
+    game_vod.render_status = GameVod.RenderStatus.RENDERED
+    game_vod.save(update_fields=["render_status"])
+
+    return editor.create_match_video(game_vod.match)
+
+
+@app.task
+def add_post_match_metadata(match_video_created: bool, game_vod_id: int) -> None:
+    """If the full match highlight video was created, finish the video metadata and upload the video."""
+    if match_video_created:
+        game_vod = GameVod.objects.get(id=game_vod_id)
+        add_post_match_video_metadata(game_vod.match)
+
+        match_video_filepath = get_match_video_filepath(game_vod.match)
+        get_editor(game_vod).upload_highlight_video(match_video_filepath, game_vod.match.videometadata)
+        remove_game_highlight_videos(game_vod.match)
+
+
+@app.task
+def create_video_thumbnail(match_id: int) -> None:
+    """Create the pre-match thumbnail of the match if it is not created yet."""
+    get_video_thumbnail_filepath(VideoMetadata.objects.select_related("match").get(match_id=match_id))
+
+
+@app.task
+def warm_up_video_thumbnails() -> None:
+    """Create the missing pre-match thumbnails of the upcoming matches that are selected for a video."""
+    cutoff = timezone.now() + timedelta(hours=settings.THUMBNAIL_WARM_UP_HOURS)
+    video_metadata = VideoMetadata.objects.filter(thumbnail_filename="", match__create_video=True,
+                                                  match__finished=False, match__start_datetime__lte=cutoff)
+
+    for metadata in video_metadata.select_related("match"):
+        try:
+            get_video_thumbnail_filepath(metadata)
+        except Exception:
+            logging.exception(f"Failed to create the thumbnail of {metadata}. It is created when first requested.")
+
+
+@app.task
+def create_match_thumbnail_variants(match_id: int) -> None:
+    """Render the variants of the thumbnail of the match with the next frame candidates."""
+    match = Match.objects.get(id=match_id)
+    create_thumbnail_variants(match, match.videometadata)
+
+
+@app.task
+def regenerate_outdated_video_metadata() -> None:
+    """
+    Regenerate the outdated parts of the video metadata that has not been marked as outdated again for the
+    regeneration delay. Repeated changes to an organization within the delay are coalesced into a single regeneration,
+    since each change moves the outdated time of the metadata forward.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.VIDEO_METADATA_REGENERATION_DELAY)
+
+    for video_metadata in VideoMetadata.objects.filter(outdated_datetime__lte=cutoff).select_related("match"):
+        text, thumbnail = video_metadata.text_outdated, video_metadata.thumbnail_outdated
+
+        # Only regenerate the metadata if it has not been changed again or claimed by another task in the meantime.
+        claimed = VideoMetadata.objects.filter(
+            id=video_metadata.id, outdated_datetime=video_metadata.outdated_datetime
+        ).update(text_outdated=False, thumbnail_outdated=False, outdated_datetime=None)
+
+        if not claimed:
+            continue
+
+        try:
+            regenerate_video_metadata(video_metadata, text, thumbnail)
+        except Exception:
+            logging.exception(f"Failed to regenerate {video_metadata}. Trying again after the regeneration delay.")
+            mark_video_metadata_outdated(VideoMetadata.objects.filter(id=video_metadata.id), text, thumbnail)
+
+
+def mark_organization_video_metadata_outdated(organization: Organization, text: bool, thumbnail: bool) -> None:
+    """Mark the video metadata of each match with a team from the organization as outdated."""
+    teams = organization.teams.all()
+    matches = Match.objects.filter(Q(team_1__in=teams) | Q(team_2__in=teams))
+
+    mark_video_metadata_outdated(VideoMetadata.objects.filter(match__in=matches), text, thumbnail)
+
+
+def mark_video_metadata_outdated(video_metadata: QuerySet[VideoMetadata], text: bool, thumbnail: bool) -> None:
+    """Mark the text and/or the thumbnail of the video metadata as outdated and schedule the regeneration."""
+    outdated_fields = {"text_outdated": True} if text else {}
+    outdated_fields |= {"thumbnail_outdated": True} if thumbnail else {}
+
+    outdated_count = video_metadata.update(outdated_datetime=timezone.now(), **outdated_fields)
+
+    if outdated_count > 0:
+        delay = settings.VIDEO_METADATA_REGENERATION_DELAY
+        logging.info(f"Marked {outdated_count} video metadata as outdated. Regenerating in {delay} seconds.")
+
+        # The task runs slightly after the delay, so the metadata marked now is old enough to be regenerated.
+        regenerate_outdated_video_metadata.apply_async(countdown=delay + 1)
+
+
+def reopen_final_render(game_vod_id: int) -> None:
+    """
+    Allow the final render of the game to be started again after it failed. The game is waiting for approval again, and
+    the final render is retried automatically after the approval timeout.
+    """
+    GameVod.objects.filter(
+        id=game_vod_id, render_status__in=[GameVod.RenderStatus.RENDERING, GameVod.RenderStatus.ASSEMBLING]
+    ).update(render_status=GameVod.RenderStatus.PREVIEW, preview_datetime=timezone.now())
+
+
+def reopen_failed_distributed_render(game_vod: GameVod) -> None:
+    """
+    Reopen the final render of the game with a failed part once none of its parts are pending or rendering, so a new
+    final render cannot plan new parts while the parts of the failed render are still being rendered.
+    """
+    unfinished_parts = game_vod.renderpart_set.filter(status__in=[RenderPart.Status.PENDING,
+                                                                  RenderPart.Status.RENDERING])
+
+    if not unfinished_parts.exists():
+        logging.info(f"A part of {game_vod} failed. Allowing the final render to be started again.")
+        reopen_final_render(game_vod.id)
+
+
+def get_final_render_pipeline(game_vod: GameVod) -> Signature:
+    """Return the canvas that renders the final highlight video of the game and uploads the match video if complete."""
+    return chain(
+        render_game_highlight_video.si(game_vod.id),  # render
+        add_post_match_metadata.s(game_vod.id),  # light
+    )
+
+
+def get_editor(game_vod: GameVod) -> Editor:
+    """Return the editor that should be used to edit the highlight video of the given game."""
+    if game_vod.match.team_1.game == Game.COUNTER_STRIKE:
+        return CounterStrikeEditor()
+    elif game_vod.match.team_1.game == Game.VALORANT:
+        return ValorantEditor()
+    else:
+        return LeagueOfLegendsEditor()
@@ -1,6 +1,6 @@
 from typing import TypeVar
 
-from rest_framework.generics import UpdateAPIView
+from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework.serializers import ModelSerializer
 
 from videos import serializers
@@ -9,6 +9,6 @@ from videos.models import VideoMetadata
 T = TypeVar("T", bound=ModelSerializer)
 
 
-class UpdateVideoMetadata(UpdateAPIView):
+class UpdateVideoMetadata(RetrieveUpdateAPIView):
     serializer_class = serializers.VideoMetadataUpdateSerializer
     queryset = VideoMetadata.objects.all()